@@ -4,6 +4,8 @@ import os
 import imp
 import traceback
 import warnings
+
+from .core.variable import Variable, shared_metadata
 #################
 
 """
@@ -13,23 +15,39 @@ mypysmps.config
 PySMPS configuration.
     load_config
     get_metadata
+    get_variable
     get_field_name
     get_fillvalue
+    get_cache_settings
 
 Created on Fri Jul 10 09:54 2020
 
 @author: flovan / fvanden
 
 Revision history:   10.07.2020 - Created
+                    18.10.2026 - get_cache_settings added
+                               - get_variable added
+                               - missing cache settings take default values
                     
 """
 ## -------------------------------------------------------------------------- ##
 
 
+# metadata shared by the variables created with get_variable
+_SHARED_METADATA = {}
+
 # the path to the default configuration file
 _dirname = os.path.dirname(__file__)
 _DEFAULT_CONFIG_FILE = os.path.join(_dirname, 'default_config.py')
 
+# cache settings for configuration files without CACHE_SETTINGS (i.e.
+# copied from an older default_config.py) or without some of its keys
+_DEFAULT_CACHE_SETTINGS = {
+    'enabled': True,
+    'directory': os.path.join(os.path.expanduser('~'), '.cache', 'mypysmps'),
+    'max_size': 2 * 1024**3, # bytes
+}
+
 def load_config(filename = None):
     """
     Load a PySMPS configuration from a config file.
@@ -70,6 +88,7 @@ def load_config(filename = None):
     global _INSTRUMENT_SETTINGS
     global _INSTRUMENT_HEADERS
     global _CONVERSIONS
+    global _CACHE_SETTINGS
     
     #global _FILE_SPECIFIC_METADATA
     #global _FIELD_MAPPINGS
@@ -88,6 +107,8 @@ def load_config(filename = None):
     _INSTRUMENT_SETTINGS = cfile.INSTRUMENT_SETTINGS
     _INSTRUMENT_HEADERS = cfile.INSTRUMENT_HEADERS
     _CONVERSIONS = cfile.CONVERSIONS
+    _CACHE_SETTINGS = dict(_DEFAULT_CACHE_SETTINGS, **getattr(cfile, 'CACHE_SETTINGS', {}))
+    _SHARED_METADATA.clear()
     return
 
 # load the configuration from the enviromental parameter if it is set
@@ -120,6 +141,18 @@ def get_metadata(p):
     else:
         return {}
     
+def get_variable(p, **items):
+    """
+    Return a Variable with the metadata for a given parameter, p. The
+    metadata is shared with the other variables of p instead of copied.
+
+    Keys given as keyword arguments (i.e. data) are set on the variable.
+    """
+    metadata = _SHARED_METADATA.get(p)
+    if metadata is None:
+        metadata = _SHARED_METADATA[p] = shared_metadata(_DEFAULT_METADATA.get(p, None))
+    return Variable(metadata, **items)
+    
 def get_fillvalue():
     """
     Return the current fill value.
@@ -203,4 +236,15 @@ def get_instrument_header(instrument):
         header = _INSTRUMENT_HEADERS[instrument]
         return header
     else:
-        return None
\ No newline at end of file
+        return None
+
+def get_cache_settings():
+    """
+    Return the cache settings from the configuration file
+    
+    Returns
+    -------
+    settings : dict
+        dictionary with cache settings (enabled, directory, max_size)
+    """
+    return _CACHE_SETTINGS
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 #################
+import warnings
 import datetime as dt
+import numpy as np
 
-from ..config import get_metadata
+from ..config import get_metadata, get_variable
 from ..util.timetransform import TimeTransform
+from ..util.timeaxis import TimeIndex, as_timedelta64, to_datetime64, join_date_time
 tt = TimeTransform()
 #################
 
@@ -19,16 +22,21 @@ Created on Wed Sep 30 12:17 2020
 @author: flovan / fvanden
 
 Revision history:   30.09.2020 - Created
+                    18.10.2026 - time axis kept as datetime64 (timestamp)
+                               - added align_to
 
 
 """
 ## -------------------------------------------------------------------------- ##
 
+# methods known to align_to
+_ALIGN = ('nearest', 'mean')
+
 
 class MET(object):
     """
     A class storing meteorological data
-    
+
     Parameters - required
     ---------------------
     time : dict
@@ -37,30 +45,255 @@ class MET(object):
         Date of each sample
     data : dict
         Data fields of measurements
-    
+
     Parameters - optional
     ---------------------
-    
-    
+    datetime : dict
+        Date and time of each sample, instead of time and date
+    timestamp : dict
+        datetime64 time of each sample, instead of time and date
+
+    Each measurement (i.e. Temperature, Pressure, Relative_Humidity,
+    Wind_Speed, Wind_Direction) is an attribute holding a metadata
+    dictionary with one value per record in 'data'.
+
     """
     ## ------------------------------------------------------------------ ##
     ## Constructors/Destructors                                           ##
     ## ------------------------------------------------------------------ ##
+
+    # attributes rebuilt when used, left out of copies and pickles
+    _TRANSIENT = ('_timeindex',)
+
     def __init__(self, **kwargs):
 
         self.__dict__.update(kwargs)
         self.instrument = 'MET'
-    
+
+        # run this automatically when a MET instance is created:
+        try:
+            self._set_timestamp()
+        except AttributeError:
+            warnings.warn("no date and time of the records, MET data is not time indexed")
+
     def __del__(self):
         pass
 
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key not in self._TRANSIENT}
+
 
     ## ------------------------------------------------------------------ ##
     ## Methods                                                            ##
     ## ------------------------------------------------------------------ ##
 
+    # public:
+
+    def variables(self):
+        """
+        Returns the names of the attributes holding one value per record,
+        without the time attributes
+
+        Returns
+        -------
+        names : list of str
+            attribute names
+        """
+        nrecords = len(self.timestamp['data'])
+        names = []
+        for name, value in self.__dict__.items():
+            if name in ('time', 'date', 'datetime', 'timestamp', 'sample'):
+                continue
+            if not isinstance(value, dict) or 'data' not in value:
+                continue
+            try:
+                if len(value['data']) == nrecords:
+                    names.append(name)
+            except TypeError:
+                pass
+        return names
+
+    def align_to(self, ps, tolerance = None, method = 'nearest', **kwargs):
+        """
+        Maps the meteorological records onto the samples of a particle
+        sizer. All samples are looked up at once in the sorted time axis
+        of the records (binary search), a year of records can be aligned
+        to a year of samples in seconds
+
+        Parameters
+        ----------
+        ps : ParticleSizer
+            particle sizer whose samples the records are aligned to
+
+        tolerance : int, str, datetime.timedelta or numpy.timedelta64
+            largest time difference between a sample and a record, integers
+            are minutes, strings a number and a unit (i.e. '30s', '5min').
+            Samples without record within tolerance are masked - DEFAULT:
+            no limit for 'nearest', for 'mean' half the median interval
+            between the records or between the samples, whichever is
+            longer (i.e. 30 s for 1 min records aligned to 1 s samples)
+
+        method : str
+            'nearest' takes the record closest in time to each sample,
+            'mean' averages the records within tolerance of each sample.
+            Masked and not finite values are left out of the mean, values
+            which are not numeric are taken from the nearest record
+
+        kwargs :
+            fields, list of str : names of the variables to align -
+                DEFAULT: all variables
+            add, bool : if True, the aligned variables are also added to
+                the particle sizer as per sample attributes - DEFAULT: False
+
+        Returns
+        -------
+        aligned : MET
+            MET object with the time axis of the particle sizer and the
+            aligned variables
+        """
+        if method not in _ALIGN:
+            raise ValueError( ('method must be one of %s, not %s')%(', '.join(_ALIGN), method) )
+
+        fields = kwargs.get('fields', None)
+        if fields is None:
+            fields = self.variables()
+
+        targets = np.asarray(ps.timestamp['data'], dtype = 'datetime64[ns]').view(np.int64)
+        index = self._time_index()
+        keys = index.keys
+
+        if tolerance is not None:
+            tolerance = as_timedelta64(tolerance).astype('timedelta64[ns]').astype(np.int64)
+        elif method == 'mean' and max(len(keys), len(targets)) > 1:
+            tolerance = max(_median_interval(keys), _median_interval(np.sort(targets))) // 2
+        else:
+            tolerance = None
+
+        # nearest record of each sample, as position in the sorted axis
+        if len(keys) == 0:
+            raise ValueError('MET data has no records')
+        right = np.clip(np.searchsorted(keys, targets, side = 'left'), 0, len(keys) - 1)
+        left = np.clip(right - 1, 0, len(keys) - 1)
+        nearest = np.where(targets - keys[left] <= keys[right] - targets, left, right)
+        missing = np.zeros(len(targets), dtype = bool)
+        if tolerance is not None:
+            missing = np.abs(keys[nearest] - targets) > tolerance
+
+        if method == 'mean':
+            tol = tolerance if tolerance is not None else 0
+            lo = np.searchsorted(keys, targets - tol, side = 'left')
+            hi = np.searchsorted(keys, targets + tol, side = 'right')
+
+        aligned = {}
+        for name in fields:
+            variable = self.__dict__[name]
+            values = variable['data']
+            if index.order is not None:
+                values = _take_records(values, index.order)
+
+            if method == 'mean' and _is_numeric(values):
+                data = _window_mean(values, lo, hi)
+            else:
+                data = _take_records(values, nearest)
+                if missing.any():
+                    data = _mask_records(data, missing)
+
+            new = variable.copy()
+            new['data'] = data
+            aligned[name] = new
+
+        met = MET.__new__(MET)
+        met.__dict__.update({key: value for key, value in self.__getstate__().items()
+                             if not (isinstance(value, dict) and 'data' in value)})
+        met.__dict__.update(aligned)
+        met.timestamp = ps.timestamp.copy()
+
+        if kwargs.get('add', False):
+            ps.__dict__.update(aligned)
+
+        return met
+
     # private:
-    
-    # sample
-    # header
-    # metadata
\ No newline at end of file
+
+    def _set_timestamp(self):
+        """
+        Builds the time axis (timestamp, datetime64[ns]) from the time and
+        date or the datetime strings of the records
+        """
+        if 'timestamp' in self.__dict__:
+            times = np.asarray(self.timestamp['data'], dtype = 'datetime64[ns]')
+        elif 'time' in self.__dict__ and 'date' in self.__dict__:
+            times = join_date_time(self.date['data'], self.date['units'], self.time['data'], self.time['units'])
+        elif 'datetime' in self.__dict__:
+            times = to_datetime64(self.datetime['data'], self.datetime['units'])
+        else:
+            raise AttributeError('instance has no time information')
+
+        self.timestamp = get_variable('timestamp', data = times)
+        self.__dict__.pop('_timeindex', None)
+
+    def _time_index(self):
+        """
+        Returns the sorted index of the time axis. The index is built when
+        it is first used and again when the time axis was replaced
+
+        Returns
+        -------
+        index : TimeIndex
+            index of timestamp['data']
+        """
+        if 'timestamp' not in self.__dict__:
+            raise AttributeError('MET data is not time indexed')
+        index = self.__dict__.get('_timeindex', None)
+        if index is None or not index.indexes(self.timestamp['data']):
+            index = TimeIndex(self.timestamp['data'])
+            self._timeindex = index
+        return index
+
+
+def _median_interval(times):
+    """
+    Returns the median interval [ns] between sorted times, 0 for less
+    than two times
+    """
+    if len(times) < 2:
+        return 0
+    return int(np.median(np.diff(times)))
+
+def _is_numeric(values):
+    """
+    Returns True for arrays of numbers
+    """
+    return isinstance(values, np.ndarray) and values.dtype.kind in 'biuf'
+
+def _take_records(values, idx):
+    """
+    Returns the records at positions idx of an array or a list
+    """
+    if isinstance(values, np.ndarray):
+        return values[idx]
+    return [values[i] for i in idx]
+
+def _mask_records(values, missing):
+    """
+    Masks records without match, None for values which are not numeric
+    """
+    if _is_numeric(values):
+        return np.ma.masked_where(missing, np.ma.asarray(values, dtype = float))
+    return [None if m else v for v, m in zip(values, missing)]
+
+def _window_mean(values, lo, hi):
+    """
+    Returns the mean of the valid records in the windows [lo, hi) of the
+    sorted records, masked for windows without valid record
+    """
+    data = np.ma.getdata(values).astype(float)
+    valid = ~np.ma.getmaskarray(values) & np.isfinite(data)
+
+    total = np.concatenate(([0.0], np.cumsum(np.where(valid, data, 0.0))))
+    count = np.concatenate(([0], np.cumsum(valid)))
+
+    n = count[hi] - count[lo]
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        mean = (total[hi] - total[lo]) / n
+    return np.ma.masked_where(n == 0, mean)
@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 #################
+import os
 import warnings
 import datetime as dt
 import numpy as np
-import math
 
-from ..config import get_metadata
+from ..config import get_metadata, get_variable
+from .variable import DerivedVariable
 from ..util.timetransform import TimeTransform
+from ..util.bins import bins_from_edges, bins_from_channels, bins_from_diameters
+from ..util.moments import size_moments
+from ..util.resample import time_bins, resample_values
+from ..util.timeaxis import TimeView, TimeIndex, to_datetime64, format_datetime64, join_date_time, parse_time
 tt = TimeTransform()
 #################
 
@@ -30,6 +35,21 @@ Revision history:   09.07.2020 - Created
                     18.08.2020 - Added createTimeDate and findSample functions
                     13.11.2020 - Extended createTimeDate to also create a time
                         and date list from a datetime list
+                    18.10.2026 - Added to_memmap
+                               - time axis kept as datetime64 (timestamp),
+                        time, date and datetime strings are formatted
+                        from it when used
+                               - findSample uses a sorted time index,
+                        added findSamples
+                               - added sel and isel
+                               - variables created as Variable
+                               - added resample
+                               - create_bins uses the cached bin_geometry
+                               - added add_moments
+                               - added add_derived_field
+                               - added append_samples and freeze
+                               - Empty passes its arguments to
+                        ParticleSizer in the right order
 
 
 """
@@ -130,6 +150,10 @@ class ParticleSizer(object):
 
 
     """
+    # attributes caching values derived from other attributes, they are
+    # rebuilt when needed and not pickled, copied or cached
+    _TRANSIENT = ('_timeindex', '_bingeometry', '_buffers')
+
     ## ------------------------------------------------------------------ ##
     ## Constructors/Destructors                                           ##
     ## ------------------------------------------------------------------ ##
@@ -152,13 +176,16 @@ class ParticleSizer(object):
 
         # run this automatically when a ParticleSizer instance is created:
         try:
-            self.createTimeDate()
+            self._set_timestamp()
         except AttributeError:
             pass
 
     def __del__(self):
         pass
 
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key not in self._TRANSIENT}
+
 
     ## ------------------------------------------------------------------ ##
     ## Methods                                                            ##
@@ -185,10 +212,98 @@ class ParticleSizer(object):
         else:
             return False
 
+    def _sample_attributes(self):
+        """
+        Returns the names of the attributes holding one value per sample
+
+        Returns
+        -------
+        names : list of str
+            attribute names
+        """
+        nsamples = len(self.sample['data'])
+        names = []
+        for name, value in self.__dict__.items():
+            if name == 'data' or not isinstance(value, dict) or 'data' not in value:
+                continue
+            if isinstance(value, TimeView):
+                # formatted from timestamp
+                continue
+            try:
+                if len(value['data']) == nsamples:
+                    names.append(name)
+            except TypeError:
+                pass
+        return names
+
+    def _set_timestamp(self):
+        """
+        Builds the time axis (timestamp, datetime64[ns]) from the time and
+        date or the datetime strings and replaces the strings by views of
+        the time axis. Strings which were given are kept, missing strings
+        are only formatted when they are used
+        """
+        if not self.checkAttr('timestamp'):
+            if self.checkAttr('time') and self.checkAttr('date'):
+                times = join_date_time(self.date['data'], self.date['units'], self.time['data'], self.time['units'])
+            elif self.checkAttr('datetime'):
+                times = to_datetime64(self.datetime['data'], self.datetime['units'])
+            else:
+                raise AttributeError('instance has no time information')
+
+            self.timestamp = get_variable('timestamp', data = times)
+
+        self._set_time_views()
+
+    def _time_index(self):
+        """
+        Returns the sorted index of the time axis. The index is built when
+        it is first used and again when the time axis was replaced
+
+        Returns
+        -------
+        index : TimeIndex
+            index of timestamp['data']
+        """
+        index = self.__dict__.get('_timeindex', None)
+        if index is None or not index.indexes(self.timestamp['data']):
+            index = TimeIndex(self.timestamp['data'])
+            self._timeindex = index
+        return index
+
+    def _set_time_views(self, keep = True):
+        """
+        (Re)creates the time, date and datetime attributes as views of the
+        time axis
+
+        Parameters
+        ----------
+        keep : bool
+            if True, strings stored in the attributes are kept, if False
+            all strings are formatted again from the time axis (i.e. after
+            the time axis has changed)
+        """
+        self.__dict__.pop('_timeindex', None)
+
+        for name in ('time', 'date', 'datetime'):
+            current = self.__dict__.get(name, None)
+            if isinstance(current, dict):
+                items = dict.items(current) if isinstance(current, TimeView) else current.items()
+                metadata = {key: value for key, value in items if key != 'data'}
+            else:
+                metadata = get_metadata(name)
+
+            view = TimeView(metadata, self.timestamp)
+            if keep and isinstance(current, dict) and dict.__contains__(current, 'data'):
+                view['data'] = current['data']
+            setattr(self, name, view)
+
     def createTimeDate(self, output = False, **kwargs):
         """
         Creates a dict which combines date and time information (if these are
-        separate). Creates a time and date dict out of a datetime dict
+        separate). Creates a time and date dict out of a datetime dict.
+        The strings are formatted from the time axis (timestamp) when they
+        are used
 
         Parameters
         ----------
@@ -207,44 +322,21 @@ class ParticleSizer(object):
         list : list of str
             date and time combined in a single time format
         """
+        if not self.checkAttr('timestamp'):
+            self._set_timestamp()
 
-        if self.checkAttr('time'):
-
-            tdlist = []
-            timeformat = self.date['units'] + ' ' + self.time['units']
-            self.datetime = get_metadata('datetime')
-            outformat = kwargs.get("outformat",self.datetime['units'])
-
-            for i in range(len(self.date['data'])):
-                nd = self.date['data'][i] + ' ' + self.time['data'][i]
-                tdlist.append(dt.datetime.strftime(dt.datetime.strptime(nd,timeformat), outformat))
-
+        outformat = kwargs.get("outformat", None)
 
-            self.datetime['units'] = outformat
-            self.datetime['data'] = tdlist
-
-            if output:
-                return tdlist
-
-        elif self.checkAttr('datetime'):
-
-            tlist = []
-            dlist = []
-            timeformat = self.datetime['units']
-            self.time = get_metadata('time')
-            self.date = get_metadata('date')
-            outformatD = kwargs.get("outformat",[self.date['units'], self.time['units']])[0]
-            outformatT = kwargs.get("outformat",[self.date['units'], self.time['units']])[1]
-
-            for i in range(len(self.datetime['data'])):
-                nd = dt.datetime.strptime(self.datetime['data'][i],timeformat)
-                tlist.append(dt.datetime.strftime(dt.datetime(2020,1,1,nd.hour,nd.minute,nd.second), outformatT))
-                dlist.append(dt.datetime.strftime(dt.datetime(nd.year, nd.month, nd.day), outformatD))
+        if isinstance(outformat, (list, tuple)):
+            self.date = TimeView(dict(get_metadata('date'), units = outformat[0]), self.timestamp)
+            self.time = TimeView(dict(get_metadata('time'), units = outformat[1]), self.timestamp)
+        else:
+            self.datetime = TimeView(get_metadata('datetime'), self.timestamp)
+            if outformat is not None:
+                self.datetime['units'] = outformat
 
-            self.time['units'] = outformatT
-            self.time['data'] = tlist
-            self.date['units'] = outformatD
-            self.date['data'] = dlist
+        if output:
+            return self.datetime['data']
 
 
     # public:
@@ -255,38 +347,296 @@ class ParticleSizer(object):
 
         Parameters
         ----------
-        sample : int or str
-            either an integer (sample number) or a string (date)
+        sample : int, str, datetime or numpy.datetime64
+            either an integer (sample number) or a date
 
         dtformat : str
-            date time format for output
+            date time format for output and of the input string
+
+        method : str
+            sample returned for a date: 'nearest' the closest sample,
+            'floor' the last sample at or before the date, 'ceil' the
+            first sample at or after the date - DEFAULT: 'nearest'
 
         Returns
         -------
         loc : str or int
             depending on the type of input: the date of the sample
-            or the index of the date (or closest date)
+            or the index of the date (or closest date), None if there
+            is no sample before (floor) or after (ceil) the date
         """
         dtformat = kwargs.get("dtformat",self.datetime['units'])
-        if isinstance(sample, int):
+        method = kwargs.get("method", 'nearest')
+        if isinstance(sample, (int, np.integer)):
             # given sample is an integer,
             # the date and time for the sample
             # will be returned
-            inputformat = self.date['units'] + ' ' + self.time['units']
-            self.createTimeDate(outputformat = [self.date['units'], self.time['units']])
-            return dt.datetime.strftime(dt.datetime.strptime(self.date['data'][sample] + ' ' + self.time['data'][sample],inputformat), dtformat)
-        elif isinstance(sample, str):
-            # given sample is a string,
+            return format_datetime64(self.timestamp['data'][[sample]], dtformat)[0]
+        elif isinstance(sample, (str, dt.datetime, dt.date, np.datetime64)):
+            # given sample is a date,
             # the indice for the given time
             # will be returned
-
-            self.createTimeDate(outformat = dtformat)
-            idx, date = tt.findNearestDate(self.datetime['data'], sample)
-            return idx
+            index = self._time_index()
+            if method not in ('nearest', 'floor', 'ceil'):
+                raise ValueError( ("method must be 'nearest', 'floor' or 'ceil', not %s")%(method) )
+            loc = getattr(index, method)(parse_time(sample, dtformat))
+            if loc < 0 or loc >= len(index):
+                return None
+            return loc
         else:
-            print( ("%s is not a relevant input format"%(type)) )
+            print( ("%s is not a relevant input format"%(type(sample))) )
             pass
 
+    def findSamples(self, start = None, end = None, **kwargs):
+        """
+        Finds the samples between two dates
+
+        Parameters
+        ----------
+        start : str, datetime or numpy.datetime64
+            first date, None for no lower limit
+
+        end : str, datetime or numpy.datetime64
+            last date (included), None for no upper limit
+
+        dtformat : str
+            date time format of input strings
+
+        Returns
+        -------
+        idx : numpy.ndarray
+            indices of the samples, ordered in time
+        """
+        dtformat = kwargs.get("dtformat",self.datetime['units'])
+        if start is not None:
+            start = parse_time(start, dtformat)
+        if end is not None:
+            end = parse_time(end, dtformat)
+        return self._time_index().range(start, end)
+
+
+    def isel(self, samples = None, diameters = None):
+        """
+        Returns a view of a subset of the samples and diameter channels.
+        The data fields and per sample attributes of the view are numpy
+        slices of those of the instance: selections with slices do not
+        copy any data, and changing values in the view changes them in the
+        instance. Selections with index arrays copy the selected values.
+
+        Parameters
+        ----------
+        samples : slice, int or array of int
+            samples to select, None for all samples
+
+        diameters : slice, int or array of int
+            diameter channels (rows of the data fields) to select, None
+            for all channels. Where diameters are bin edges (i.e. OPC)
+            only slices with step 1 are allowed
+
+        Returns
+        -------
+        view : ParticleSizer
+            instance of the same class holding the selection
+        """
+        samples = _as_selection(samples)
+        diameters = _as_selection(diameters)
+
+        view = self.__class__.__new__(self.__class__)
+        view.__dict__.update(self.__getstate__())
+
+        # per sample attributes
+        for name in self._sample_attributes():
+            if name != 'diameter':
+                view.__dict__[name] = _select(self.__dict__[name], samples)
+
+        # time strings are views of the time axis of the view
+        for name in ('time', 'date', 'datetime'):
+            current = self.__dict__.get(name, None)
+            if isinstance(current, TimeView):
+                metadata = {key: value for key, value in dict.items(current) if key != 'data'}
+                timeview = TimeView(metadata, view.__dict__.get('timestamp', None))
+                if current.loaded():
+                    timeview['data'] = _select(current, samples)['data']
+                view.__dict__[name] = timeview
+
+        # data fields and diameters
+        data = dict(self.data)
+        data['variables'] = list(self.data['variables'])
+        coordinates = list(self.data.get('coordinates', ['diameter', 'sample']))
+        nrows = None
+        for var in self.data['variables']:
+            if isinstance(self.data[var], DerivedVariable):
+                # computed from the selected dependencies when used
+                data[var] = self.data[var].bind(view)
+                continue
+            field = self.data[var].copy()
+            values = field['data']
+            if coordinates[0] != 'diameter':
+                field['data'] = _take(values, samples, diameters)
+                nrows = values.shape[1]
+            else:
+                field['data'] = _take(values, diameters, samples)
+                nrows = values.shape[0]
+            data[var] = field
+        view.data = data
+
+        diameter = self.diameter.copy()
+        if nrows is not None and len(self.diameter['data']) == nrows + 1:
+            # diameters are bin edges, a selection of n channels keeps
+            # n + 1 edges
+            if not isinstance(diameters, slice) or diameters.step not in (None, 1):
+                raise ValueError('channels of binned diameters must be selected with a slice')
+            start, stop, _ = diameters.indices(nrows)
+            diameter['data'] = self.diameter['data'][start:stop + 1 if stop > start else start]
+        else:
+            diameter['data'] = _select(self.diameter, diameters)['data']
+        view.diameter = diameter
+
+        return view
+
+    def sel(self, start = None, end = None, dmin = None, dmax = None, **kwargs):
+        """
+        Returns a view of the samples in a time window and the diameter
+        channels in a size range, see isel. Where the time axis is ordered
+        the view does not copy any data
+
+        Parameters
+        ----------
+        start : str, datetime or numpy.datetime64
+            first date, None for no lower limit
+
+        end : str, datetime or numpy.datetime64
+            last date (included), None for no upper limit
+
+        dmin : float
+            smallest diameter, None for no lower limit
+
+        dmax : float
+            largest diameter (included), None for no upper limit.
+            Where diameters are bin edges (i.e. OPC) the bins which
+            overlap the range dmin to dmax are selected
+
+        dtformat : str
+            date time format of input strings
+
+        Returns
+        -------
+        view : ParticleSizer
+            instance of the same class holding the selection
+        """
+        dtformat = kwargs.get("dtformat",self.datetime['units'])
+
+        samples = None
+        if start is not None or end is not None:
+            index = self._time_index()
+            if start is not None:
+                start = parse_time(start, dtformat)
+            if end is not None:
+                end = parse_time(end, dtformat)
+            if index.is_sorted():
+                samples = slice(*index.bounds(start, end))
+            else:
+                samples = index.range(start, end)
+
+        diameters = None
+        if dmin is not None or dmax is not None:
+            field = self.data[self.data['variables'][0]]
+            axis = 0 if list(self.data.get('coordinates', ['diameter', 'sample']))[0] == 'diameter' else 1
+            nrows = np.shape(field['data'])[axis]
+            diameter = np.asarray(self.diameter['data'], dtype = float)
+            if len(diameter) == nrows + 1:
+                # bins overlapping the range
+                lower, upper = diameter[:-1], diameter[1:]
+            else:
+                lower, upper = diameter[:nrows], diameter[:nrows]
+            inside = np.ones(nrows, dtype = bool)
+            if dmin is not None:
+                inside &= (upper > dmin) | (lower >= dmin)
+            if dmax is not None:
+                inside &= (lower < dmax) | (upper <= dmax)
+            rows = np.flatnonzero(inside)
+            if len(rows) == 0:
+                diameters = slice(0, 0)
+            elif rows[-1] - rows[0] + 1 == len(rows):
+                diameters = slice(int(rows[0]), int(rows[-1]) + 1)
+            else:
+                diameters = rows
+
+        return self.isel(samples = samples, diameters = diameters)
+
+    def resample(self, rule, how = 'mean', **kwargs):
+        """
+        Aggregates the samples on a regular time grid. All diameter
+        channels of the data fields and the numeric per sample attributes
+        are reduced at once, masked and not finite values are left out
+        and bins without samples (gaps) are masked
+
+        Parameters
+        ----------
+        rule : int, str, datetime.timedelta or numpy.timedelta64
+            width of the time bins, integers are minutes, strings a number
+            and a unit (i.e. '10min', '1h', '1D')
+
+        how : str
+            'mean', 'median', 'sum', 'count', 'percentile', 'min' or 'max'
+
+        q : float
+            percentile between 0 and 100, for how = 'percentile'
+
+        origin : str, datetime or numpy.datetime64
+            time the bins are aligned to, the grid starts with the bin
+            holding the first sample - DEFAULT: midnight of the day of the
+            first sample
+
+        min_count : int
+            smallest number of valid samples of a bin, bins with fewer
+            samples are masked - DEFAULT: 1
+
+        Returns
+        -------
+        resampled : ParticleSizer
+            instance of the same class with one sample per time bin, the
+            time of a sample is the start of its bin. Attributes which
+            are not numeric keep the first value of each bin
+        """
+        q = kwargs.get('q', None)
+        min_count = kwargs.get('min_count', 1)
+
+        grid, labels = time_bins(self.timestamp['data'], rule, kwargs.get('origin', None))
+        nbins = len(grid)
+        method = ('%s over %s')%(how if how != 'percentile' else '%gth percentile'%(q), rule)
+
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__getstate__())
+
+        # data fields, with samples along the last axis
+        data = dict(self.data)
+        data['variables'] = list(self.data['variables'])
+        transposed = list(self.data.get('coordinates', ['diameter', 'sample']))[0] != 'diameter'
+        for var in self.data['variables']:
+            field = self.data[var].copy()
+            values = field['data'].T if transposed else field['data']
+            values = resample_values(values, labels, nbins, how, q, min_count)
+            field['data'] = values.T if transposed else values
+            field['method'] = method
+            data[var] = field
+        new.data = data
+
+        # per sample attributes
+        for name in self._sample_attributes():
+            if name in ('timestamp', 'sample', 'diameter'):
+                continue
+            attribute = self.__dict__[name].copy()
+            attribute['data'] = resample_values(attribute['data'], labels, nbins, how, q, min_count)
+            new.__dict__[name] = attribute
+
+        new.timestamp = self.timestamp.copy()
+        new.timestamp['data'] = grid
+        new.sample = self.sample.copy()
+        new.sample['data'] = np.arange(1.0, nbins + 1)
+        new._set_time_views(keep = False)
+
+        return new
 
     def add_field(self, fieldname, data, method = None, metadata = None):
         """
@@ -321,9 +671,9 @@ class ParticleSizer(object):
         # get metadata for field
 
         if metadata is None:
-            metadata = get_metadata(fieldname)
-            if metadata == {}:
-                metadata = {'units': '-', 'standard_name': fieldname, 'axis': '-', 'valid_min': None, 'valid_max': None, 'comment': None}
+            metadata = get_variable(fieldname)
+            if len(metadata) == 0:
+                metadata = get_variable(None, units = '-', standard_name = fieldname, axis = '-', valid_min = None, valid_max = None, comment = None)
 
         if method is not None:
             metadata['method'] = method
@@ -355,58 +705,513 @@ class ParticleSizer(object):
         self.data[fieldname] = metadata
         self.data['variables'].append(fieldname)
 
-    def create_bins(self,):
+    def add_derived_field(self, fieldname, function, depends, method = None, metadata = None):
         """
-        Creates bins for histogram plot
+        Adds a field computed from other fields or per sample attributes
+        when it is first used. The result is kept and computed again
+        when one of its dependencies is replaced (i.e. a new array is
+        assigned to its 'data'); after values were changed in place,
+        self.data[fieldname].invalidate() discards it
 
         Parameters
         ----------
+        fieldname : str
+            name of the field to add
+
+        function : callable
+            called with the data of the dependencies, in the order of
+            depends, returns the data of the field
+
+        depends : list of str
+            names of the data fields (including other derived fields) or
+            per sample attributes (i.e. scan_time) the field depends on
+
+        method : str
+            description of the computation
+
+        metadata : dict
+            a dictionary with metadata for the added field,
+            if None, a dictionary from the default config file
+            is loaded
+
+        Example
+        -------
+        ps.add_derived_field('number_concentration', lambda counts, flow, period: counts / (flow * period),
+                             ['raw_counts', 'sample_flow', 'scan_time'])
+        """
+        if isinstance(depends, str):
+            depends = [depends]
+        for name in depends:
+            if name == fieldname:
+                raise ValueError( ("field %s cannot depend on itself")%(fieldname) )
+            if name not in self.data['variables'] and not isinstance(self.__dict__.get(name, None), dict):
+                raise KeyError( ("dependency %s is neither a data field nor an attribute")%(name) )
+
+        if fieldname in self.data['variables']:
+            warnings.warn( ("field name %s already exists, field is overwritten...")%(fieldname) )
+
+        # get metadata for field
+
+        if metadata is None:
+            metadata = get_variable(fieldname)
+            if len(metadata) == 0:
+                metadata = get_variable(None, units = '-', standard_name = fieldname, axis = '-', valid_min = None, valid_max = None, comment = None)
+        metadata = {key: value for key, value in metadata.items() if key != 'data'}
+
+        field = DerivedVariable(metadata, function, depends, self)
+        if method is not None:
+            field['method'] = method
+
+        self.data[fieldname] = field
+        if fieldname not in self.data['variables']:
+            self.data['variables'].append(fieldname)
+
+    def append_samples(self, timestamp, fields = None, **attributes):
+        """
+        Appends samples at the end of the instance. The data fields and
+        the per sample attributes are kept in preallocated buffers whose
+        capacity is doubled when they are full, so appending samples one
+        by one or in chunks costs amortized O(1) per sample. The 'data'
+        of every variable is a view of the filled part of its buffer,
+        freeze trims the buffers to size
+
+        Parameters
+        ----------
+        timestamp : numpy.ndarray, list or numpy.datetime64
+            time of each new sample (datetime64, datetime or ISO strings)
+
+        fields : dict
+            data field name as key, the values of the new samples as value:
+            an array with the samples along the sample axis of the fields
+            (i.e. (diameter, sample)). Fields which are not given are masked
+            for the new samples, fields which do not exist yet are added
+
+        attributes :
+            per sample attributes of the new samples (i.e. temperature =
+            [21.2, 21.3]). Attributes which are not given are NaN (numeric)
+            or None for the new samples. Sample numbers continue from the
+            last sample unless given
+
+        Returns
+        -------
+        self : ParticleSizer
+            the instance, holding the new samples
 
         See Also
         --------
+        freeze
+        """
+        fields = dict(fields or {})
+        times = np.atleast_1d(np.asarray(timestamp, dtype = 'datetime64[ns]'))
+        nnew = len(times)
+        nsamples = len(self.timestamp['data'])
+
+        coordinates = list(self.data.setdefault('coordinates', ['diameter', 'sample']))
+        axis = 1 if coordinates[0] == 'diameter' else 0
+        buffers = self.__dict__.setdefault('_buffers', {})
+
+        # data fields
+
+        for var, values in fields.items():
+            values = np.ma.asarray(values)
+            if values.ndim != 2 or values.shape[axis] != nnew:
+                raise ValueError( ('field %s must have %d samples along axis %d')%(var, nnew, axis) )
+            if var not in self.data['variables']:
+                shape = list(values.shape)
+                shape[axis] = nsamples
+                field = get_variable(var)
+                if len(field) == 0:
+                    field = get_variable(None, units = '-', standard_name = var, axis = '-', valid_min = None, valid_max = None, comment = None)
+                field['data'] = np.ma.masked_all(shape, dtype = values.dtype)
+                self.data[var] = field
+                self.data['variables'].append(var)
+
+        for var in self.data['variables']:
+            field = self.data[var]
+            if isinstance(field, DerivedVariable):
+                continue
+            field['data'] = _append(buffers, ('data', var), field['data'], fields.get(var), nsamples, nnew, axis)
+
+        # per sample attributes
+
+        names = [name for name in self._sample_attributes() if name not in ('timestamp', 'diameter')]
+        if 'sample' not in attributes:
+            sample = np.asarray(self.sample['data'], dtype = float)
+            last = sample[-1] if len(sample) > 0 else 0.0
+            attributes['sample'] = last + np.arange(1.0, nnew + 1)
+        for name, values in attributes.items():
+            if name not in self.__dict__:
+                self.__dict__[name] = get_variable(name, data = _empty_like(values, nsamples))
+                names.append(name)
+
+        for name in names:
+            attribute = self.__dict__[name]
+            attribute['data'] = _append(buffers, name, attribute['data'], attributes.get(name), nsamples, nnew, -1)
+
+        self.timestamp['data'] = _append(buffers, 'timestamp', self.timestamp['data'], times, nsamples, nnew, -1)
+        self._set_time_views(keep = False)
+
+        return self
+
+    def freeze(self):
+        """
+        Trims the buffers of append_samples to the number of samples, the
+        'data' of every variable is then an array of its own
 
+        Returns
+        -------
+        self : ParticleSizer
+            the instance
         """
+        buffers = self.__dict__.pop('_buffers', {})
+        for key, buffer in buffers.items():
+            if isinstance(key, tuple):
+                variable = self.data.get(key[1], None)
+            else:
+                variable = self.__dict__.get(key, None)
+            if isinstance(variable, DerivedVariable) or not isinstance(variable, dict):
+                continue
+            if variable['data'] is buffer['view']:
+                variable['data'] = buffer['view'].copy()
+        return self
+
+    def to_memmap(self, directory, mode = 'r'):
+        """
+        Moves the data fields and the per sample numeric attributes
+        into memory mapped files. Only the pages which are used are
+        read from disk, and several processes mapping the same files
+        share a single copy in memory.
 
-        if self.instrument_type == 'SMPS':
-            # create empty matrix
-            bins = np.empty((np.asarray(self.diameter['data']).shape[0], 3))
+        Parameters
+        ----------
+        directory : str
+            directory in which the .npy files are written
+
+        mode : str
+            mode in which the files are mapped again after writing,
+            'r' (read-only), 'r+' (read and write) or 'c' (copy-on-write)
 
-            # obtain number of channels per decade
-            cpd = float(self.metadata['Channels/Decade'])
+        Returns
+        -------
+        self : ParticleSizer
+            the instance, now backed by memory mapped files
+        """
+        os.makedirs(directory, exist_ok = True)
+
+        def _mapped(name, values):
+            path = os.path.join(directory, name + '.npy')
+            masked = isinstance(values, np.ma.MaskedArray)
+            mask = np.ma.getmask(values)
+            array = np.ma.getdata(values) if masked else np.asarray(values)
+            if array.dtype.kind not in 'biufcmM':
+                return values
+            mm = np.lib.format.open_memmap(path, mode = 'w+', dtype = array.dtype, shape = array.shape)
+            mm[...] = array
+            mm.flush()
+            del mm
+            mm = np.load(path, mmap_mode = mode)
+            if masked:
+                return np.ma.MaskedArray(mm, mask = mask)
+            return mm
+
+        for field in self.data['variables']:
+            if not isinstance(self.data[field], DerivedVariable):
+                self.data[field]['data'] = _mapped('data.' + field, self.data[field]['data'])
+
+        for name in self._sample_attributes():
+            if isinstance(self.__dict__[name]['data'], np.ndarray):
+                self.__dict__[name]['data'] = _mapped(name, self.__dict__[name]['data'])
+
+        return self
+
+    def bin_geometry(self):
+        """
+        Returns the geometry of the size bins (edges, midpoints, widths and
+        dlogDp of every channel). It is computed once per diameter grid
+        and computed again when the diameters change
 
-            # fill bins with NaNs so that bins fail if method fails
-            bins.fill(np.NaN)
+        Returns
+        -------
+        geometry : BinGeometry
+            bin geometry of the data fields
+        """
+        diameter = np.asarray(self.diameter['data'], dtype = float)
+        nrows = None
+        if self.data.get('variables'):
+            field = self.data[self.data['variables'][0]]
+            axis = 0 if list(self.data.get('coordinates', ['diameter', 'sample']))[0] == 'diameter' else 1
+            nrows = np.shape(field['data'])[axis]
+        instrument_type = getattr(self, 'instrument_type', None)
+        key = (instrument_type, nrows, self.diameter.get('valid_min'), self.diameter.get('valid_max'),
+               self.metadata.get('Channels/Decade') if isinstance(self.metadata, dict) else None)
+
+        cached = self.__dict__.get('_bingeometry', None)
+        if cached is not None and cached[0] == key and np.array_equal(cached[1], diameter):
+            return cached[2]
+
+        if nrows is not None and len(diameter) == nrows + 1:
+            # diameters are bin edges (i.e. OPC)
+            geometry = bins_from_edges(diameter)
+        elif str(instrument_type).split('_')[0] == 'OPC':
+            # lower edges only (i.e. concatenated OPC), the last upper
+            # edge is extrapolated in log space
+            geometry = bins_from_edges(np.append(diameter, diameter[-1]**2 / diameter[-2]))
+        else:
+            cpd = self.metadata.get('Channels/Decade') if isinstance(self.metadata, dict) else None
+            dmin = self.diameter.get('valid_min')
+            dmax = self.diameter.get('valid_max')
+            limits = dmin is not None and dmax is not None and dmin <= diameter[0] and diameter[-1] <= dmax
+            if cpd is not None and limits:
+                geometry = bins_from_channels(diameter, float(cpd), dmin, dmax)
+            else:
+                # size limits missing or not enclosing the diameters
+                geometry = bins_from_diameters(diameter, dmax if limits else None)
+
+        self._bingeometry = (key, diameter.copy(), geometry)
+        return geometry
 
-            # fill bins with diameters
-            bins[:, 1] = np.asarray(self.diameter['data'])
-            bins[0, 0] = self.diameter['valid_min']
-            bins[-1, -1] = self.diameter['valid_max']
+    def create_bins(self,):
+        """
+        Creates bins for histogram plot
 
-            for i in range(bins.shape[0] - 1):
-                bins[i, 2] = round(math.pow(10, np.log10(bins[i, 0]) + 1./cpd), 4)
-                bins[i+1, 0] = bins[i, 2]
+        Returns
+        -------
+        bins : numpy.ndarray
+            nominal diameter of each bin (SMPS) or its lower edge (OPC)
+
+        dwidths : numpy.ndarray
+            width of each bin
 
-            # take only bin widths
-            dwidths = bins[:,2] - bins[:,0]
+        binmatrix : numpy.ndarray or None
+            (channel, 3) array with lower edge, diameter and upper edge
+            of each bin (SMPS), None for OPC
 
-            # keep only a list of bins
-            binmatrix = bins
-            bins = bins[:,1]
+        See Also
+        --------
+        bin_geometry
 
-        elif self.instrument_type ==  'OPC_concatenated':
-            bins = np.append(self.diameter['data'], np.asarray([40.0])) # very dirty fix.. TODO: something about this..
-            dwidths = np.diff(bins)
-            bins = bins[:-1]
-            binmatrix = None
+        """
+        geometry = self.bin_geometry()
 
-        else: #if self.instrument_type == 'OPC':
-            bins = self.diameter['data']
-            dwidths = np.diff(bins)
-            bins = bins[:-1]
-            binmatrix = None
+        if self.instrument_type == 'SMPS':
+            binmatrix = np.column_stack((geometry.lower, geometry.diameters, geometry.upper))
+            return geometry.diameters, geometry.widths, binmatrix
 
-        return bins, dwidths, binmatrix
+        return geometry.lower, geometry.widths, None
+
+    def add_moments(self, field = None, density = None, overwrite = False, **kwargs):
+        """
+        Computes the integral properties of the size distribution of every
+        sample at once and adds them as per sample variables:
+        total_concentration, total_surface_concentration,
+        total_volume_concentration, total_mass_concentration, mean,
+        geo_mean, geo_std_dev, median (count median diameter) and mode
+
+        Parameters
+        ----------
+        field : str
+            data field with the size distribution - DEFAULT: the first of
+            number_concentration, normalised_number_concentration and
+            raw_counts. Raw counts are divided by sample_flow [ml/s] x
+            scan_time [s]
 
+        density : float or numpy.ndarray
+            particle density [g/cm3] - DEFAULT: the density of the
+            samples if present, else 1.0
+
+        overwrite : bool
+            if False, variables already present (i.e. read from an AIM
+            file) are kept
+
+        kwargs :
+            diameter_units, str : units of the diameters, 'nm' or 'um' -
+                DEFAULT: 'um' for OPC and Grimm, else 'nm'
+
+        Returns
+        -------
+        moments : list
+            names of the variables added
+        """
+        if field is None:
+            for name in ('number_concentration', 'normalised_number_concentration', 'raw_counts'):
+                if name in self.data['variables']:
+                    field = name
+                    break
+            else:
+                raise ValueError('no size distribution field found, field is required')
+
+        values = self.data[field]['data']
+        if list(self.data.get('coordinates', ['diameter', 'sample']))[0] != 'diameter':
+            values = values.T
+
+        geometry = self.bin_geometry()
+        if field == 'normalised_number_concentration':
+            values = geometry.denormalise(values)
+        elif field == 'raw_counts':
+            flow = self.__dict__.get('sample_flow')
+            period = self.__dict__.get('scan_time')
+            if isinstance(flow, dict) and isinstance(period, dict):
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    values = values / (np.asarray(flow['data'], dtype = float) * np.asarray(period['data'], dtype = float))
+            else:
+                warnings.warn("sample_flow or scan_time missing, raw counts are used as number concentration")
+
+        if density is None:
+            density = self.density['data'] if isinstance(self.__dict__.get('density'), dict) else 1.0
+
+        diameter_units = kwargs.get('diameter_units', None)
+        if diameter_units is None:
+            diameter_units = 'um' if str(getattr(self, 'instrument_type', '')).split('_')[0] in ('OPC', 'Grimm') else 'nm'
+
+        moments = size_moments(values, geometry, density, diameter_units)
+
+        added = []
+        for name, data in moments.items():
+            if not overwrite and isinstance(self.__dict__.get(name), dict):
+                continue
+            variable = get_variable(name, data = data)
+            if diameter_units != 'nm' and isinstance(variable.get('units'), str):
+                variable['units'] = variable['units'].replace('nm', diameter_units)
+            if name in ('total_concentration', 'total_surface_concentration', 'total_volume_concentration', 'total_mass_concentration'):
+                variable['method'] = ('moment of %s')%(field)
+            self.__dict__[name] = variable
+            added.append(name)
+
+        return added
+
+
+
+def _as_selection(selection):
+    """
+    Returns a selection of samples or channels as slice or index array,
+    a single index is kept as a slice of length one
+    """
+    if selection is None:
+        return slice(None)
+    if isinstance(selection, slice):
+        return selection
+    if isinstance(selection, (int, np.integer)):
+        return slice(int(selection), int(selection) + 1 if selection != -1 else None)
+    selection = np.asarray(selection)
+    if selection.dtype.kind == 'b':
+        selection = np.flatnonzero(selection)
+    return selection.astype(np.intp)
+
+def _select(attribute, selection):
+    """
+    Returns a copy of a metadata dictionary with the selected values of
+    'data', slices of arrays are views
+    """
+    if isinstance(attribute, TimeView):
+        selected = {key: value for key, value in dict.items(attribute) if key != 'data'}
+    else:
+        selected = attribute.copy()
+    values = attribute['data']
+    if isinstance(values, np.ndarray):
+        selected['data'] = values[selection]
+    elif isinstance(selection, slice):
+        selected['data'] = values[selection]
+    else:
+        selected['data'] = [values[i] for i in selection]
+    return selected
+
+def _take(values, rows, columns):
+    """
+    Returns the selected rows and columns of a 2-D array, a view where
+    both selections are slices
+    """
+    if isinstance(rows, slice) or isinstance(columns, slice):
+        return values[rows, columns]
+    return values[np.ix_(rows, columns)]
+
+def _append(buffers, key, current, values, nsamples, nnew, axis):
+    """
+    Appends the values of new samples to the buffer of a variable along
+    axis and returns the view of the filled part of the buffer. The
+    buffer is created from the current values if the variable has no
+    buffer or its data was replaced, and its capacity is doubled when
+    it is full. Values which are None are filled with NaN (floats) or masked
+    """
+    buffer = buffers.get(key, None)
+    if buffer is not None and current is not buffer['view']:
+        buffer = None
+
+    if not isinstance(current, np.ndarray) and not (buffer is None and isinstance(values, np.ndarray)):
+        # lists (i.e. strings) are extended in place
+        current = list(current) if buffer is None else current
+        current.extend([None] * nnew if values is None else list(values))
+        buffers[key] = {'view': current}
+        return current
+
+    masked = isinstance(current, np.ma.MaskedArray) or isinstance(values, np.ma.MaskedArray)
+    if buffer is None:
+        current = np.asarray(current) if not isinstance(current, np.ma.MaskedArray) else current
+        dtype = current.dtype if values is None or current.size > 0 else np.asarray(values).dtype
+        if values is not None:
+            dtype = np.result_type(dtype, np.ma.getdata(values))
+        buffer = {'values': np.ma.getdata(current).astype(dtype, copy = True), 'mask': None, 'view': None}
+        if masked:
+            buffer['mask'] = np.ma.getmaskarray(current).copy()
+    elif masked and buffer['mask'] is None:
+        buffer['mask'] = np.zeros(buffer['values'].shape, dtype = bool)
+
+    axis = axis % buffer['values'].ndim
+    capacity = buffer['values'].shape[axis]
+    if nsamples + nnew > capacity:
+        capacity = max(2 * capacity, nsamples + nnew, 16)
+        buffer['values'] = _resize(buffer['values'], capacity, axis, nsamples)
+        if buffer['mask'] is not None:
+            buffer['mask'] = _resize(buffer['mask'], capacity, axis, nsamples)
+
+    index = [slice(None)] * buffer['values'].ndim
+    index[axis] = slice(nsamples, nsamples + nnew)
+    index = tuple(index)
+    if values is None:
+        if buffer['values'].dtype.kind in 'fc' and buffer['mask'] is None:
+            buffer['values'][index] = np.nan
+        else:
+            if buffer['mask'] is None:
+                buffer['mask'] = np.zeros(buffer['values'].shape, dtype = bool)
+            buffer['mask'][index] = True
+    else:
+        buffer['values'][index] = np.ma.getdata(values)
+        if buffer['mask'] is not None:
+            buffer['mask'][index] = np.ma.getmaskarray(values)
+
+    index = [slice(None)] * buffer['values'].ndim
+    index[axis] = slice(0, nsamples + nnew)
+    index = tuple(index)
+    if buffer['mask'] is None:
+        view = buffer['values'][index]
+    else:
+        view = np.ma.MaskedArray(buffer['values'][index], mask = buffer['mask'][index])
+    buffer['view'] = view
+    buffers[key] = buffer
+    return view
+
+def _resize(values, capacity, axis, nsamples):
+    """
+    Returns a buffer with the given capacity along axis holding the first
+    nsamples values of values
+    """
+    shape = list(values.shape)
+    shape[axis] = capacity
+    resized = np.empty(shape, dtype = values.dtype)
+    index = [slice(None)] * values.ndim
+    index[axis] = slice(0, nsamples)
+    resized[tuple(index)] = values[tuple(index)]
+    return resized
+
+def _empty_like(values, nsamples):
+    """
+    Returns the values of an attribute before its first samples, missing
+    values of the type of values
+    """
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind in 'fc':
+            return np.full(nsamples, np.nan, dtype = values.dtype)
+        return np.ma.masked_all(nsamples, dtype = values.dtype)
+    return [None] * nsamples
 
 
 class SMPS(ParticleSizer):
@@ -458,6 +1263,11 @@ class Empty(ParticleSizer):
     ----------
     None : class can be initiated empty
 
+    kwargs :
+        diameter, metadata and header replace the empty ones, other
+        kwargs are added as attributes (i.e. instrument_type). Samples
+        are added with append_samples
+
     See Also
     --------
     mysmps.core.read.ParticleSizer
@@ -479,16 +1289,17 @@ class Empty(ParticleSizer):
 
         data = {}
         data['variables'] = []
+        data['coordinates'] = ['diameter', 'sample']
 
-        diameter = get_metadata('diameter')
-        diameter['data'] = []
-
-        metadata = {}
+        diameter = kwargs.pop('diameter', None)
+        if diameter is None:
+            diameter = get_metadata('diameter')
+            diameter['data'] = []
 
-        pddata = []
+        metadata = kwargs.pop('metadata', {})
 
-        header = []
-        ParticleSizer.__init__(self, time, date, sample, data, diameter, metadata, pddata,header, **kwargs)
+        header = kwargs.pop('header', [])
+        ParticleSizer.__init__(self, time, sample, data, diameter, metadata, header, date = date, **kwargs)
         # other stuff if necessary
 
     def __del__(self):
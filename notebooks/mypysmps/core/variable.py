@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+#################
+import copy
+import weakref
+#################
+
+"""
+mysmps.core.variable
+====================
+
+Container of the values and metadata of a variable:
+    Variable
+    DerivedVariable
+    shared_metadata
+
+Created on Sun Oct 18 19:20 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+                               - Added DerivedVariable
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# metadata dictionaries shared between variables, by content
+_SHARED = {}
+
+# ids of the shared dictionaries, which are never released
+_SHARED_IDS = set()
+
+# metadata of variables without metadata
+_NO_METADATA = {}
+
+def shared_metadata(metadata):
+    """
+    Returns the shared metadata dictionary with the same content as
+    metadata. The dictionary returned must not be changed
+
+    Parameters
+    ----------
+    metadata : dict
+        metadata of a variable
+
+    Returns
+    -------
+    shared : dict
+        the same dictionary for metadata with the same content
+    """
+    if id(metadata) in _SHARED_IDS or not metadata:
+        return metadata if metadata else _NO_METADATA
+    try:
+        key = tuple(metadata.items())
+        shared = _SHARED.get(key)
+    except TypeError:
+        # unhashable values (i.e. lists) are not shared
+        return dict(metadata)
+    if shared is None:
+        shared = _SHARED[key] = dict(metadata)
+        _SHARED_IDS.add(id(shared))
+    return shared
+
+
+class Variable(dict):
+    """
+    Metadata dictionary of a variable with its values in 'data'. The
+    metadata from the configuration is not copied for every variable but
+    shared between all variables with the same metadata. Keys which are
+    set on a variable ('data' and changed metadata) are stored in the
+    variable itself and take precedence over the shared metadata, so
+    changing a variable never changes another one.
+
+    Parameters
+    ----------
+    metadata : dict
+        metadata of the variable (i.e. from the default config file)
+
+    items :
+        keys set on the variable, i.e. data
+
+    Example
+    -------
+    sample = Variable(get_metadata('sample'), data = np.arange(10))
+    sample['units']   # from the shared metadata
+    sample['data']    # stored in the variable
+    """
+    __slots__ = ('_metadata',)
+
+    def __init__(self, metadata = None, **items):
+        dict.__init__(self, items)
+        self._metadata = shared_metadata(metadata)
+
+    def __reduce__(self):
+        return (_restore, (self._metadata, dict(dict.items(self))))
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        new = Variable()
+        new._metadata = self._metadata
+        memo[id(self)] = new
+        for key, value in dict.items(self):
+            dict.__setitem__(new, key, copy.deepcopy(value, memo))
+        return new
+
+    def __missing__(self, key):
+        return self._metadata[key]
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._metadata
+
+    def __iter__(self):
+        for key in self._metadata:
+            yield key
+        for key in dict.__iter__(self):
+            if key not in self._metadata:
+                yield key
+
+    def __len__(self):
+        return len(self._metadata) + sum(1 for key in dict.__iter__(self) if key not in self._metadata)
+
+    def __delitem__(self, key):
+        if key in self._metadata:
+            self._unshare()
+        dict.__delitem__(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def keys(self):
+        return list(iter(self))
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def get(self, key, default = None):
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        if key in self._metadata:
+            self._unshare()
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        self._unshare()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default = None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def clear(self):
+        dict.clear(self)
+        self._metadata = _NO_METADATA
+
+    def copy(self):
+        """
+        Returns a copy sharing the metadata and the values of the variable
+        """
+        new = Variable()
+        new._metadata = self._metadata
+        dict.update(new, dict.items(self))
+        return new
+
+    def _unshare(self):
+        """
+        Copies the shared metadata into the variable before a key of
+        it is removed
+        """
+        own = dict(dict.items(self))
+        dict.update(self, self._metadata)
+        dict.update(self, own)
+        self._metadata = _NO_METADATA
+
+
+class DerivedVariable(Variable):
+    """
+    Variable whose 'data' is computed by a function from other variables
+    of a particle sizer (its dependencies) when it is first used. The
+    result is kept until a dependency is replaced, then it is computed
+    again. Values of a dependency which are changed in place are not
+    detected, see invalidate.
+
+    Copies, pickles and deep copies of a derived variable are Variables
+    holding the computed values.
+
+    Parameters
+    ----------
+    metadata : dict
+        metadata of the variable (i.e. from the default config file)
+
+    function : callable
+        called with the 'data' of the dependencies, in order, returns the
+        data of the variable
+
+    depends : list of str
+        names of the data fields or per sample attributes the variable is
+        computed from
+
+    owner : ParticleSizer
+        instance holding the dependencies, only a weak reference is kept
+
+    items :
+        keys set on the variable, i.e. method
+    """
+    __slots__ = ('_function', '_depends', '_owner', '_inputs')
+
+    def __init__(self, metadata, function, depends, owner, **items):
+        items.pop('data', None)
+        Variable.__init__(self, metadata, **items)
+        self._function = function
+        self._depends = tuple(depends)
+        self._owner = weakref.ref(owner)
+        self._inputs = None
+
+    def __reduce__(self):
+        return self.copy().__reduce__()
+
+    def __deepcopy__(self, memo):
+        new = self.copy()
+        memo[id(self)] = new
+        dict.__setitem__(new, 'data', copy.deepcopy(new['data'], memo))
+        return new
+
+    def __getitem__(self, key):
+        if key == 'data':
+            return self._evaluate()
+        return Variable.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        if key == 'data':
+            raise KeyError('data of a derived variable is computed from its dependencies')
+        Variable.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        return key == 'data' or Variable.__contains__(self, key)
+
+    def __iter__(self):
+        for key in Variable.__iter__(self):
+            yield key
+        if not dict.__contains__(self, 'data') and 'data' not in self._metadata:
+            yield 'data'
+
+    def __len__(self):
+        return len(self.keys())
+
+    def copy(self):
+        """
+        Returns a Variable sharing the metadata of the derived variable,
+        holding its computed values
+        """
+        new = Variable.copy(self)
+        dict.__setitem__(new, 'data', self._evaluate())
+        return new
+
+    def bind(self, owner):
+        """
+        Returns the same derived variable computed from the dependencies
+        of another particle sizer (i.e. a selection)
+
+        Parameters
+        ----------
+        owner : ParticleSizer
+            instance holding the dependencies
+
+        Returns
+        -------
+        variable : DerivedVariable
+            not yet computed
+        """
+        new = DerivedVariable(self._metadata, self._function, self._depends, owner)
+        dict.update(new, ((key, value) for key, value in dict.items(self) if key != 'data'))
+        return new
+
+    def depends(self):
+        """
+        Returns the names of the dependencies
+        """
+        return list(self._depends)
+
+    def evaluated(self):
+        """
+        Returns True if the data is computed and none of its dependencies
+        has been replaced since
+        """
+        if self._inputs is None:
+            return False
+        return all(value is previous for value, previous in zip(self._resolve(), self._inputs))
+
+    def invalidate(self):
+        """
+        Discards the computed data, it is computed again when it is next
+        used (i.e. after values of a dependency were changed in place)
+        """
+        dict.pop(self, 'data', None)
+        self._inputs = None
+
+    def _resolve(self):
+        """
+        Returns the data of the dependencies
+        """
+        owner = self._owner()
+        if owner is None:
+            raise ReferenceError('the particle sizer holding the dependencies no longer exists')
+        data = owner.__dict__.get('data', {})
+        values = []
+        for name in self._depends:
+            if name in data and isinstance(data[name], dict):
+                values.append(data[name]['data'])
+            elif isinstance(owner.__dict__.get(name, None), dict):
+                values.append(owner.__dict__[name]['data'])
+            else:
+                raise KeyError( ('dependency %s is neither a data field nor an attribute')%(name) )
+        return values
+
+    def _evaluate(self):
+        """
+        Returns the data, computed if a dependency has been replaced
+        """
+        inputs = self._resolve()
+        if self._inputs is None or any(value is not previous for value, previous in zip(inputs, self._inputs)):
+            dict.__setitem__(self, 'data', self._function(*inputs))
+            self._inputs = inputs
+        return dict.__getitem__(self, 'data')
+
+
+def _restore(metadata, items):
+    """
+    Restores a pickled Variable, its metadata is shared again
+    """
+    variable = Variable(metadata)
+    dict.update(variable, items)
+    return variable
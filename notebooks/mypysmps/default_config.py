@@ -9,6 +9,7 @@ PySMPS configuration can be modified by changing this file, it is recommended
 that the user keeps a copy of this original file.
 
 """
+import os
 
 ##############################################################################
 ##############################################################################
@@ -177,6 +178,9 @@ geo_mean = 'geo_mean'
 mode = 'mode'
 geo_std_dev = 'geo_std_dev'
 total_concentration = 'total_concentration'
+total_surface_concentration = 'total_surface_concentration'
+total_volume_concentration = 'total_volume_concentration'
+total_mass_concentration = 'total_mass_concentration'
 title = 'title'
 user_name = 'user_name' 
 sample_id = 'sample_id'
@@ -308,6 +312,9 @@ DEFAULT_FIELD_NAMES = {
     'mode': mode,
     'geo_std_dev': geo_std_dev,
     'total_concentration': total_concentration,
+    'total_surface_concentration': total_surface_concentration,
+    'total_volume_concentration': total_volume_concentration,
+    'total_mass_concentration': total_mass_concentration,
     'title': title,
     'user_name': user_name,
     'sample_id': sample_id,
@@ -942,6 +949,16 @@ DEFAULT_METADATA = {
         'meta_group': 'measurement_parameter',
         'comment': ('Date at the start of the sample measurement?')},
     
+    'timestamp': {
+        'units': 'datetime64[ns]',
+        'standard_name': 'timestamp',
+        'long_name': 'date_and_time_of_sample_measurement',
+        'axis': 'Time',
+        'dimensions': ('time'),
+        'meta_group': 'measurement_parameter',
+        'comment': ('Date and time at the start of the sample measurement, '
+                    'the time, date and datetime strings are formatted from it')},
+    
     'diameter': {
         'units': 'nm',
         'standard_name': 'diameter_midpoint',
@@ -1319,6 +1336,30 @@ DEFAULT_METADATA = {
         'dimensions': ('time'),
         'axis': 'Sample total concentration [#/cm3]'},
     
+    'total_surface_concentration': {
+        'comments': ('sample total surface concentration'),
+        'meta_group': 'instrument_parameters',
+        'long_name': 'sample_total_surface_concentration',
+        'units': 'nm2/cm3',
+        'dimensions': ('time'),
+        'axis': 'Sample total surface concentration [nm2/cm3]'},
+    
+    'total_volume_concentration': {
+        'comments': ('sample total volume concentration'),
+        'meta_group': 'instrument_parameters',
+        'long_name': 'sample_total_volume_concentration',
+        'units': 'nm3/cm3',
+        'dimensions': ('time'),
+        'axis': 'Sample total volume concentration [nm3/cm3]'},
+    
+    'total_mass_concentration': {
+        'comments': ('sample total mass concentration'),
+        'meta_group': 'instrument_parameters',
+        'long_name': 'sample_total_mass_concentration',
+        'units': 'ug/m3',
+        'dimensions': ('time'),
+        'axis': 'Sample total mass concentration [ug/m3]'},
+    
     'title' : {
         'comments': ('title of file'),
         'meta_group': 'instrument_parameters',
@@ -1970,4 +2011,17 @@ DEFAULT_FIGURE_SETTINGS = {
         },
     'timeplot':{'size':(20,7)
         }
-}
\ No newline at end of file
+}
+##############################################################################
+# Cache settings
+#
+# Parsed files are kept in a binary cache so that reading an unchanged file
+# a second time is fast. The cache is bounded in size, the least recently
+# used entries are removed first.
+##############################################################################
+
+CACHE_SETTINGS = {
+    'enabled': True,
+    'directory': os.path.join(os.path.expanduser('~'), '.cache', 'mypysmps'),
+    'max_size': 2 * 1024**3, # bytes
+}
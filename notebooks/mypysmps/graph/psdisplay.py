@@ -16,6 +16,7 @@ from ._cm import customcb
 from ..util.mathfuncs import roundup
 from ..config import get_figure_settings, get_field_limits, _DEFAULT_FIELD_LIMITS
 import mypysmps.util.timetransform as timetransform
+from ..util.timeaxis import format_datetime64, nearest_index
 tt = timetransform.TimeTransform()
 #################
 
@@ -48,6 +49,8 @@ Revision history:   20.07.2020 - Created
         and adapted ylim handling in plot and histogram scripts
                     24.09.2020 - Added some exceptions to timeline
                     plots to handle widget input
+                    18.10.2026 - time labels and periods are taken from
+                    the datetime64 time axis
 
 
 """
@@ -224,24 +227,15 @@ class PSDisplay(object):
         set_time = kwargs.get("set_time", True)
         if set_time is True:
 
-            datetimes = self._smps.createTimeDate(output=True)
-            #datetimes = []
-            #for i in range(0, len(self._smps.time['data'])):
-            #    datetimes.append( self._smps.date['data'][i] + ' ' + self._smps.time['data'][i] )
-
-            x_values = [dt.datetime.strptime(d,self._smps.datetime['units']) for d in datetimes]
+            x_values = self._smps.timestamp['data']
             time_format = kwargs.get("time_format", '%d-%m %H:%M')
-            newlabels = [dt.datetime.strftime(d, time_format) for d in x_values]
             #labelnums = [int(item.get_position()[0]) for item in ax.get_xticklabels()]
-            labelnums = np.ceil(np.arange(0,roundup(len(newlabels))+1, roundup(len(newlabels))/8))
+            labelnums = np.ceil(np.arange(0,roundup(len(x_values))+1, roundup(len(x_values))/8))
             labelnums = [int(d) for d in labelnums]
-            labels = []
 
-            for i in range(0, len(labelnums)):
-                try:
-                    labels.append(newlabels[labelnums[i]])
-                except IndexError:
-                    labels.append(newlabels[-1])
+            # only the labelled samples are formatted, past the last
+            # sample the last label is repeated
+            labels = format_datetime64(x_values[np.minimum(labelnums, len(x_values)-1)], time_format)
 
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore")
@@ -589,24 +583,13 @@ class PSDisplay(object):
 
         if set_time is True:
             try:
-                datetimes = []
-                for i in range(0, len(self._smps.time['data'])):
-                    datetimes.append( self._smps.date['data'][i] + ' ' + self._smps.time['data'][i] )
-
-                x_values = [dt.datetime.strptime(d,"%d/%m/%Y %H:%M:%S") for d in datetimes]
-                newlabels = [dt.datetime.strftime(d, time_format) for d in x_values]
+                x_values = self._smps.timestamp['data']
 
                 #pos = [int(item.get_position()[0]) for item in ax.get_xticklabels()]
                 #labels = [newlabels[0]] + list(np.asarray(newlabels)[pos[1:-1]])  + [newlabels[-1]]
-                labelnums = np.ceil(np.arange(0,roundup(len(newlabels))+1, roundup(len(newlabels))/8))
+                labelnums = np.ceil(np.arange(0,roundup(len(x_values))+1, roundup(len(x_values))/8))
                 labelnums = [int(d) for d in labelnums]
-                labels = []
-
-                for i in range(0, len(labelnums)):
-                    try:
-                        labels.append(newlabels[labelnums[i]])
-                    except IndexError:
-                        labels.append(newlabels[-1])
+                labels = format_datetime64(x_values[np.minimum(labelnums, len(x_values)-1)], time_format)
 
                 with warnings.catch_warnings():
                     warnings.simplefilter("ignore")
@@ -679,7 +662,7 @@ class PSDisplay(object):
             sample number
 
         """
-        date = dt.datetime.strftime(dt.datetime.strptime(self._smps.date['data'][sample], '%d/%m/%Y'), '%A, %d %B %Y, ')  +  self._smps.time['data'][sample]
+        date = format_datetime64(self._smps.timestamp['data'][[sample]], '%A, %d %B %Y, %H:%M:%S')[0]
         text = ("Date: " + date)
         print(text)
 
@@ -735,17 +718,13 @@ class PSDisplay(object):
             pass
         else:
             starttime = '00:00:00'
-        datetimes = []
-        for i in range(0, len(self._smps.time['data'])):
-            datetimes.append( self._smps.date['data'][i] + ' ' + self._smps.time['data'][i] )
+        offset = dt.datetime.strptime(starttime, '%H:%M:%S')
+        offset = np.timedelta64(offset.hour * 3600 + offset.minute * 60 + offset.second, 's')
 
-        times = tt.convertTime(datetimes,'%d/%m/%Y %H:%M:%S','%Y.%m.%d %H:%M:%S')
+        times = self._smps.timestamp['data']
+        days = np.unique(times.astype('datetime64[D]'))
 
-        indices = []
-        for day in np.unique(self._smps.date['data']):
-            newtime = tt.convertTime([day + ' ' + starttime],'%d/%m/%Y %H:%M:%S','%Y.%m.%d %H:%M:%S')
-            ind = tt.findNearestDate(times, newtime[0])
-            indices.append( ind[0])
+        indices = nearest_index(times, days + offset)
 
-        indices = sorted(indices)
+        indices = sorted(int(i) for i in indices)
         return indices
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+#################
+import os
+import json
+import shutil
+import hashlib
+import importlib
+import tempfile
+import warnings
+import numpy as np
+
+from ..config import get_cache_settings, get_variable
+from ..util.timeaxis import TimeView
+from ..core.variable import Variable, DerivedVariable
+#################
+
+"""
+mypysmps.io.cache
+=================
+
+Binary on-disk cache of parsed instrument files:
+    load_cached
+    store_cached
+    clear_cache
+
+Every entry is a directory holding uncompressed numpy arrays (.npy) and a
+small json file describing the object. Entries are keyed on the path of
+the source file, its organisation and the reading options. The size and
+modification time of the source file are stored with the entry: if the
+file changed, the entry is discarded. The total size of the cache is
+bounded, least recently used entries are removed first.
+
+Created on Sun Oct 18 12:20 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+                               - time strings are not stored, they are
+                        formatted from the time axis when restored
+                               - state of objects from __getstate__
+                               - Variable attributes are restored as
+                        Variable
+                               - derived variables are stored with
+                        their computed values
+                               - restored variables share the metadata
+                        of the configuration
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# increase when the layout of the cache or of the cached objects changes
+CACHE_VERSION = 2
+
+_META_FILE = 'meta.json'
+
+# lists longer than this are stored as arrays
+_MIN_ARRAY_LIST = 16
+
+# modules from which cached objects can be restored
+_ALLOWED_MODULES = ('mypysmps.core.',)
+
+
+def load_cached(filename, fileorg, **kwargs):
+    """
+    Returns the cached object for a file if an up to date entry exists
+
+    Parameters
+    ----------
+    filename : str
+        path and name of the source file
+
+    fileorg : str
+        organisation of the file
+
+    kwargs :
+        reading options, these are part of the cache key
+        cache_dir, str : cache directory - DEFAULT: from config
+        mmap_mode, str : if given, arrays are memory mapped (see numpy.load)
+
+    Returns
+    -------
+    obj : object or None
+        cached object, None if not in cache or out of date
+    """
+    cache_dir = kwargs.pop('cache_dir', None) or get_cache_settings()['directory']
+    mmap_mode = kwargs.pop('mmap_mode', None)
+
+    entry = os.path.join(cache_dir, _entry_name(filename, fileorg, **kwargs))
+    metafile = os.path.join(entry, _META_FILE)
+
+    try:
+        with open(metafile) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get('version') != CACHE_VERSION or meta.get('fingerprint') != _fingerprint(filename):
+        # source file changed since it was cached
+        _remove(entry)
+        return None
+
+    try:
+        obj = _decode_object(meta['object'], entry, mmap_mode)
+    except Exception:
+        warnings.warn( ('cache entry %s could not be read and is discarded')%(entry) )
+        _remove(entry)
+        return None
+
+    # mark entry as recently used
+    try:
+        os.utime(metafile)
+    except OSError:
+        pass
+
+    return obj
+
+def store_cached(obj, filename, fileorg, **kwargs):
+    """
+    Stores an object read from a file in the cache
+
+    Parameters
+    ----------
+    obj : object
+        object read from file (i.e. mypysmps.core.smps.ParticleSizer)
+
+    filename : str
+        path and name of the source file
+
+    fileorg : str
+        organisation of the file
+
+    kwargs :
+        reading options, these are part of the cache key
+        cache_dir, str : cache directory - DEFAULT: from config
+        cache_size, int : maximum size of the cache in bytes - DEFAULT: from config
+
+    Returns
+    -------
+    stored : bool
+        True if the object was stored
+    """
+    settings = get_cache_settings()
+    cache_dir = kwargs.pop('cache_dir', None) or settings['directory']
+    max_size = kwargs.pop('cache_size', None) or settings['max_size']
+    kwargs.pop('mmap_mode', None)
+
+    name = _entry_name(filename, fileorg, **kwargs)
+    entry = os.path.join(cache_dir, name)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(prefix='.' + name, dir=cache_dir)
+    except OSError:
+        # read-only or missing cache location
+        return False
+
+    try:
+        arrays = []
+        meta = {'version': CACHE_VERSION,
+                'source': os.path.abspath(filename),
+                'fileorg': fileorg,
+                'fingerprint': _fingerprint(filename),
+                'object': _encode_object(obj, arrays)}
+
+        for i, array in enumerate(arrays):
+            np.save(os.path.join(tmpdir, '%d.npy'%(i)), array, allow_pickle=False)
+        with open(os.path.join(tmpdir, _META_FILE), 'w') as f:
+            json.dump(meta, f)
+
+        _remove(entry)
+        os.rename(tmpdir, entry)
+    except (TypeError, ValueError) as err:
+        warnings.warn( ('%s could not be cached: %s')%(filename, err) )
+        _remove(tmpdir)
+        return False
+    except OSError:
+        _remove(tmpdir)
+        return False
+
+    _evict(cache_dir, max_size)
+
+    return True
+
+def clear_cache(cache_dir = None):
+    """
+    Removes all entries from the cache
+
+    Parameters
+    ----------
+    cache_dir : str
+        cache directory - DEFAULT: from config
+    """
+    cache_dir = cache_dir or get_cache_settings()['directory']
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            _remove(os.path.join(cache_dir, name))
+
+
+## -------------------------------------------------------------------------- ##
+## Cache entries                                                              ##
+## -------------------------------------------------------------------------- ##
+
+def _entry_name(filename, fileorg, **kwargs):
+    """
+    Returns the name of the cache entry of a file read with given options
+    """
+    key = repr((os.path.abspath(filename), fileorg, sorted((k, repr(v)) for k, v in kwargs.items())))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def _fingerprint(filename):
+    """
+    Returns the size and modification time of a file
+    """
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _entry_size(entry):
+    """
+    Returns the size of a cache entry in bytes
+    """
+    size = 0
+    for name in os.listdir(entry):
+        size += os.path.getsize(os.path.join(entry, name))
+    return size
+
+def _evict(cache_dir, max_size):
+    """
+    Removes least recently used entries until the cache fits in max_size
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, name)
+        try:
+            used = os.path.getmtime(os.path.join(entry, _META_FILE))
+            entries.append((used, _entry_size(entry), entry))
+        except OSError:
+            # entry being written by another process
+            continue
+
+    total = sum(e[1] for e in entries)
+    for used, size, entry in sorted(entries):
+        if total <= max_size:
+            break
+        _remove(entry)
+        total -= size
+
+def _remove(entry):
+    """
+    Removes a cache entry if it exists
+    """
+    shutil.rmtree(entry, ignore_errors=True)
+
+
+## -------------------------------------------------------------------------- ##
+## Encoding of objects                                                        ##
+## -------------------------------------------------------------------------- ##
+
+def _encode_object(obj, arrays):
+    """
+    Encodes an object into json compatible values, arrays are appended
+    to arrays and referenced by their index
+    """
+    cls = type(obj)
+    if not cls.__module__.startswith(_ALLOWED_MODULES):
+        raise TypeError( ('objects of type %s are not cached')%(cls.__name__) )
+
+    # caches held by the object are left out
+    state = obj.__getstate__() if hasattr(cls, '__getstate__') else None
+    if not isinstance(state, dict):
+        state = obj.__dict__
+
+    return {'__class__': [cls.__module__, cls.__name__],
+            '__state__': _encode(state, arrays)}
+
+def _decode_object(value, entry, mmap_mode):
+    """
+    Restores an object encoded with _encode_object
+    """
+    module, name = value['__class__']
+    if not module.startswith(_ALLOWED_MODULES):
+        raise TypeError( ('objects of type %s are not restored')%(name) )
+    cls = getattr(importlib.import_module(module), name)
+
+    obj = cls.__new__(cls)
+    obj.__dict__.update(_decode(value['__state__'], entry, mmap_mode))
+
+    # time strings are views of the time axis of the object
+    for attribute in obj.__dict__.values():
+        if isinstance(attribute, TimeView) and attribute.source is None:
+            attribute.source = obj.__dict__.get('timestamp', None)
+
+    return obj
+
+def _encode(value, arrays):
+    """
+    Encodes a value into json compatible values
+    """
+    if isinstance(value, np.ma.MaskedArray):
+        out = {'__array__': _add_array(np.ma.getdata(value), arrays), '__masked__': True}
+        if np.ma.getmask(value) is not np.ma.nomask:
+            out['__mask__'] = _add_array(np.ma.getmaskarray(value), arrays)
+        return out
+    if isinstance(value, np.ndarray):
+        return {'__array__': _add_array(value, arrays)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, DerivedVariable):
+        # stored with its computed values
+        value = value.copy()
+    if isinstance(value, Variable):
+        # only the metadata is stored, it is shared with the variables
+        # of the configuration again when restored (see _restore_variable)
+        return {'__variable__': [_encode(value._metadata, arrays), _encode(dict(dict.items(value)), arrays)]}
+    if isinstance(value, TimeView):
+        # only strings stored in the view are kept
+        return {'__timeview__': _encode(dict(dict.items(value)), arrays)}
+    if isinstance(value, dict):
+        for key in value:
+            if not isinstance(key, str):
+                raise TypeError( ('dictionary key %r is not a string')%(key) )
+        return {'__dict__': {k: _encode(v, arrays) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        if isinstance(value, list) and len(value) >= _MIN_ARRAY_LIST and len(set(map(type, value))) == 1:
+            array = np.asarray(value)
+            if array.ndim == 1 and array.dtype.kind in 'Ufib':
+                return {'__list__': _add_array(array, arrays)}
+        items = [_encode(v, arrays) for v in value]
+        if isinstance(value, tuple):
+            return {'__tuple__': items}
+        return items
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    raise TypeError( ('values of type %s are not cached')%(type(value).__name__) )
+
+def _decode(value, entry, mmap_mode, name = None):
+    """
+    Restores a value encoded with _encode, name is the key of the value
+    in the dictionary holding it
+    """
+    if isinstance(value, list):
+        return [_decode(v, entry, mmap_mode) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if '__array__' in value:
+        array = _load_array(entry, value['__array__'], mmap_mode)
+        if '__mask__' in value:
+            return np.ma.MaskedArray(array, mask=_load_array(entry, value['__mask__'], mmap_mode))
+        if value.get('__masked__'):
+            return np.ma.MaskedArray(array)
+        return array
+    if '__list__' in value:
+        return _load_array(entry, value['__list__'], None).tolist()
+    if '__variable__' in value:
+        metadata, items = value['__variable__']
+        variable = _restore_variable(_decode(metadata, entry, mmap_mode), name)
+        dict.update(variable, _decode(items, entry, mmap_mode))
+        return variable
+    if '__timeview__' in value:
+        return TimeView(_decode(value['__timeview__'], entry, mmap_mode), None)
+    if '__tuple__' in value:
+        return tuple(_decode(v, entry, mmap_mode) for v in value['__tuple__'])
+    if '__dict__' in value:
+        return {k: _decode(v, entry, mmap_mode, k) for k, v in value['__dict__'].items()}
+    raise ValueError('unknown cache value')
+
+def _restore_variable(metadata, name):
+    """
+    Returns a Variable without values sharing the metadata of the
+    configuration for name, if the restored metadata is the same.
+    Otherwise the metadata is shared with the variables of the same
+    metadata (i.e. attributes whose name is not the configuration key)
+    """
+    if name is not None:
+        variable = get_variable(name)
+        try:
+            if variable._metadata == metadata:
+                return variable
+        except ValueError:
+            # metadata holding arrays
+            pass
+    return Variable(metadata)
+
+def _add_array(array, arrays):
+    """
+    Adds an array to the list of arrays to store and returns its index
+    """
+    if array.dtype.kind == 'O':
+        raise TypeError('object arrays are not cached')
+    arrays.append(array)
+    return len(arrays) - 1
+
+def _load_array(entry, index, mmap_mode):
+    """
+    Loads a stored array
+    """
+    return np.load(os.path.join(entry, '%d.npy'%(index)), mmap_mode=mmap_mode, allow_pickle=False)
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+#################
+import os
+import fnmatch
+import sqlite3
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from ..core.smps import ParticleSizer
+from .read import read
+#################
+
+"""
+mypysmps.io.catalog
+===================
+
+Index of the instrument files in an archive and of their time coverage:
+    Catalog
+
+The index is kept in a SQLite database. A scan only reads files which are
+new or changed since the previous scan, a query returns the files whose
+time coverage overlaps a time window without opening any file.
+
+Created on Sun Oct 18 17:05 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# files considered when scanning a directory
+_PATTERNS = ('*.csv', '*.txt', '*.TXT', '*.gz', '*.bz2', '*.xz', '*.zip')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    fileorg TEXT,
+    instrument TEXT,
+    first TEXT,
+    last TEXT,
+    nsamples INTEGER,
+    diameter_hash TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS files_coverage ON files (instrument, first, last);
+"""
+
+
+class Catalog(object):
+    """
+    A catalog of instrument files and their time coverage
+
+    Parameters
+    ----------
+    database : str
+        path and name of the SQLite database, created if it does not exist
+
+    Example
+    -------
+    catalog = Catalog('archive.sqlite')
+    catalog.scan('/data/opc', fileorg = 'OPC')
+    files = catalog.query('OPC', '2020-11-24', '2020-11-25')
+    """
+    ## ------------------------------------------------------------------ ##
+    ## Constructors/Destructors                                           ##
+    ## ------------------------------------------------------------------ ##
+
+    def __init__(self, database):
+        self.database = database
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+
+    def __del__(self):
+        pass
+
+    ## ------------------------------------------------------------------ ##
+    ## Methods                                                            ##
+    ## ------------------------------------------------------------------ ##
+
+    # public:
+
+    def scan(self, directory, fileorg = 'AIM', instrument = None, workers = None, **kwargs):
+        """
+        Adds the files in a directory tree to the catalog. Files which did
+        not change since the previous scan are not read again, files
+        matching the patterns which no longer exist are removed from the
+        catalog
+
+        Parameters
+        ----------
+        directory : str
+            root of the archive
+
+        fileorg : str
+            organisation of the files
+
+        instrument : str
+            name under which the files are catalogued - DEFAULT: the
+            instrument type of the files
+
+        workers : int
+            number of processes reading files - DEFAULT: number of processors
+
+        kwargs :
+            patterns, tuple of str : glob patterns of the files to catalogue
+                - DEFAULT: csv, txt and compressed files
+            other kwargs are passed to read
+
+        Returns
+        -------
+        nread : int
+            number of files read
+        """
+        patterns = kwargs.pop('patterns', _PATTERNS)
+        directory = os.path.abspath(directory)
+
+        found = {}
+        for root, dirs, files in os.walk(directory):
+            for name in files:
+                if any(fnmatch.fnmatch(name, p) for p in patterns):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found[path] = (stat.st_size, stat.st_mtime_ns)
+
+        # rows of the files in the directory tree, selected by exact prefix
+        # (LIKE takes _ and % as wildcards and ignores case)
+        prefix = os.path.join(directory, '')
+        with self._connect() as con:
+            known = {row[0]: (row[1], row[2], row[3]) for row in
+                     con.execute("SELECT path, size, mtime_ns, fileorg FROM files WHERE substr(path, 1, ?) = ?",
+                                 (len(prefix), prefix))}
+
+            # only files matching the patterns of this scan are removed
+            removed = [path for path in known if path not in found and
+                       any(fnmatch.fnmatch(os.path.basename(path), p) for p in patterns)]
+            con.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+
+        changed = [path for path, fingerprint in found.items()
+                   if path not in known or known[path] != fingerprint + (fileorg,)]
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(changed))
+
+        if workers <= 1:
+            rows = [_scan_file(path, fileorg, instrument, **kwargs) for path in changed]
+        else:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                futures = [executor.submit(_scan_file, path, fileorg, instrument, **kwargs) for path in changed]
+                rows = [future.result() for future in futures]
+
+        with self._connect() as con:
+            con.executemany("INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+
+        return len(changed)
+
+    def query(self, instrument = None, start = None, end = None, **kwargs):
+        """
+        Returns the files whose time coverage overlaps a time window
+
+        Parameters
+        ----------
+        instrument : str
+            instrument name, None for all instruments
+
+        start : str, datetime or numpy.datetime64
+            start of the time window, None for no lower limit
+
+        end : str, datetime or numpy.datetime64
+            end of the time window, None for no upper limit
+
+        kwargs :
+            fileorg, str : only files of this organisation
+            details, bool : if True, a dict with the catalogue entry is
+                returned for each file instead of its path - DEFAULT: False
+
+        Returns
+        -------
+        files : list
+            paths of the files ordered by their first sample
+        """
+        fileorg = kwargs.get('fileorg', None)
+        details = kwargs.get('details', False)
+
+        conditions = ["error IS NULL"]
+        values = []
+        if instrument is not None:
+            conditions.append("instrument = ?")
+            values.append(instrument)
+        if fileorg is not None:
+            conditions.append("fileorg = ?")
+            values.append(fileorg)
+        if end is not None:
+            conditions.append("first <= ?")
+            values.append(_isoformat(end))
+        if start is not None:
+            conditions.append("last >= ?")
+            values.append(_isoformat(start))
+
+        with self._connect() as con:
+            con.row_factory = sqlite3.Row
+            rows = con.execute("SELECT * FROM files WHERE " + " AND ".join(conditions) +
+                               " ORDER BY first, path", values).fetchall()
+
+        if details:
+            return [dict(row) for row in rows]
+        return [row['path'] for row in rows]
+
+    def failed(self):
+        """
+        Returns the files which could not be read, with the error message
+
+        Returns
+        -------
+        failed : dict
+            path as key, error as value
+        """
+        with self._connect() as con:
+            return dict(con.execute("SELECT path, error FROM files WHERE error IS NOT NULL"))
+
+    # private:
+
+    def _connect(self):
+        """
+        Returns a connection to the database, used as context manager it
+        commits on success
+        """
+        return _Connection(self.database)
+
+
+class _Connection(object):
+    """
+    Connection to the catalog database which is closed on exit
+    """
+
+    def __init__(self, database):
+        self.con = sqlite3.connect(database)
+
+    def __enter__(self):
+        return self.con
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.con.commit()
+        self.con.close()
+        return False
+
+
+def _scan_file(path, fileorg, instrument = None, **kwargs):
+    """
+    Reads a file and returns its catalogue entry
+    """
+    stat = os.stat(path)
+    entry = [path, fileorg, instrument, None, None, 0, None, stat.st_size, stat.st_mtime_ns, None]
+
+    try:
+        ps = read(path, fileorg = fileorg, cache = False, **kwargs)
+        if not isinstance(ps, ParticleSizer):
+            raise TypeError('file does not contain particle sizer data')
+        times = ps.timestamp['data']
+    except Exception as err:
+        entry[9] = '%s: %s'%(type(err).__name__, err)
+        return tuple(entry)
+
+    if instrument is None:
+        entry[2] = str(getattr(ps, 'instrument_type', fileorg)).split('_')[0]
+    if len(times) > 0:
+        entry[3] = _isoformat(times.min())
+        entry[4] = _isoformat(times.max())
+    entry[5] = len(times)
+    entry[6] = hashlib.sha1(np.asarray(ps.diameter['data'], dtype = float).tobytes()).hexdigest()
+
+    return tuple(entry)
+
+def _isoformat(value):
+    """
+    Returns a time as sortable ISO string (2020-11-24T12:00:00.000000)
+    """
+    return str(np.datetime64(value, 'us'))
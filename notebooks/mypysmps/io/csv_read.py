@@ -1,15 +1,23 @@
 # -*- coding: utf-8 -*-
 #################
 import os
+import re
+import warnings
 import numpy as np
+import datetime as dt
 #import pandas as pd
 import csv
 from csv import reader
 from copy import deepcopy
+from io import BytesIO
+from itertools import islice, chain
 
 from ..core.smps import ParticleSizer, SMPS
-from ..config import get_metadata, get_instrument_header
-from .read_aux import smps_file_to_config, opc_file_to_config, grimm_file_to_config, file_to_config
+from ..config import get_metadata, get_variable, get_instrument_header, _FIELD_MAPPING, _CONVERSIONS
+from ..util.ps_utils import OPCseconds
+from ..util.timeaxis import to_datetime64, as_datetime64
+from .read_aux import smps_file_to_config, opc_file_to_config, grimm_file_to_config, file_to_config, _OPC_BIN, _AIM_ORGANISATIONS
+from .columnar import open_binary, read_text, decode, sniff_delimiter, split_rows, find_header_row, parse_columns, to_float
 #################
 
 """
@@ -18,6 +26,9 @@ mysmps.io.csv_read
 
 Functions for reading of csv files:
     read_aim_csv
+    read_opc_csv
+    iter_opc_chunks
+    read_csv
 
 Created on Thu Jul 9 15:02 2020
 
@@ -27,17 +38,41 @@ Revision history:   09.07.2020 - Created
                     15.07.2020 - added metadata from config
                     20.07.2020 - completed with file_to_config variables
                     27.07.2020 - reading issues resolved for txt file
+                    18.10.2026 - read_aim_csv decodes the file once and
+                        parses columns directly into numpy arrays
+                               - read_opc_csv reads in blocks, iter_opc_chunks
+                        added
+                               - AIM and OPC readers accept file objects
+                               - OPC header and line parsing shared with
+                        io.follow
+                               - start and end select a time window, rows
+                        outside of it are skipped without being parsed
+                               - columns and fields select the columns which
+                        are read, other columns are not converted
+                               - empty instance when no sample is in the
+                        time window
+                               - times of day of csv files (MET) are dated
+                        from the file name or date into timestamp
 
 """
 
+# number of lines parsed at once when reading OPC files
+_OPC_BLOCKSIZE = 100000
+
+# first columns of the AIM data table, always read
+_AIM_INDEX = ['Sample #', 'Date', 'Start Time']
+
+# variables holding the time of a sample
+_TIME_COLUMNS = ('time', 'date', 'datetime')
+
 def read_aim_csv(filename, fileorg = 'AIM', **kwargs):
     """
     Reads SMPS data from a csv file generated by AIM software
 
     Parameters
     ----------
-    filename : str
-        path and name of file to read
+    filename : str or file object
+        path and name of file to read, or binary file object
 
     fileorg : str
         different file organisations can be found in the default_config
@@ -47,6 +82,11 @@ def read_aim_csv(filename, fileorg = 'AIM', **kwargs):
         metadata, dict : user defined metadata - DEFAULT: taken from file
         header, list : user defined header - DEFAULT: taken from file
         delimiter, str : user defined delimiter - DEFAULT: taken from file
+        columns, list : names of the file columns to read - DEFAULT: all
+        fields, list : names of the attributes to read (i.e. 'temperature')
+            - DEFAULT: all. If columns or fields are given, only these
+            columns are read, the sample number, date, time and size
+            distribution are always read
 
     Returns
     -------
@@ -59,71 +99,30 @@ def read_aim_csv(filename, fileorg = 'AIM', **kwargs):
     delimiter = kwargs.get("delimiter", None)
     encoding = kwargs.get("encoding", None)
 
-    with open(filename, encoding = encoding, newline='') as csvfile:
-        # get dialect from file
-        try:
-            dialect = csv.Sniffer().sniff(csvfile.read(2048), delimiters=',:.; ')
-            delimiter = dialect.delimiter
-        except:
-            delimiter = ','
+    # decode the file once and keep it in memory as lines
+    lines = read_text(filename, encoding = encoding).splitlines()
 
-    datastart = False
-    metadata = []
-    data = []
-    # open file in read mode
+    # get dialect from file
+    if delimiter is None:
+        delimiter = sniff_delimiter('\n'.join(lines[:50])[:2048], default = ',')
 
-    try:
-        with open(filename, encoding = encoding, newline='') as read_obj:
-            # pass the file object to reader() to get the reader object
-            csv_reader = csv.reader(read_obj, delimiter=delimiter)
-            # Iterate over each r'Start Time'ow in the csv using reader object
-            # read until "Sample #" is detected, or 100 iterations have passed
-            for i, row in enumerate(csv_reader):
-                if datastart is True:
-                    # put all below "Sample #" in data
-                    data.append(row)
-                elif row[0] == "Sample #":
-                    #"Sample #" row is header
-                    header = row
-                    datastart = True
-                    header_row = i
-                else:
-                    # put all above "Sample #" in metadata
-                    metadata.append(row)
-    except UnicodeDecodeError: # try reading with different encoding
-        with open(filename, encoding = 'iso8859_15', newline='') as read_obj:
-            # pass the file object to reader() to get the reader object
-            csv_reader = csv.reader(read_obj, delimiter=delimiter)
-            # Iterate over each r'Start Time'ow in the csv using reader object
-            # read until "Sample #" is detected, or 100 iterations have passed
-            for i, row in enumerate(csv_reader):
-                if datastart is True:
-                    # put all below "Sample #" in data
-                    data.append(row)
-                elif row[0] == "Sample #":
-                    #"Sample #" row is header
-                    header = row
-                    datastart = True
-                    header_row = i
-                else:
-                    # put all above "Sample #" in metadata
-                    metadata.append(row)
+    # everything above "Sample #" is metadata, "Sample #" row is header
+    header_row = find_header_row(lines, "Sample #", delimiter)
+    if header_row is None:
+        raise ValueError('"Sample #" header row not found in ' + str(filename))
 
-    # organise data in dict
+    metadata = split_rows(lines[:header_row], delimiter)
+    header = split_rows([lines[header_row]], delimiter)[0]
 
-    datadict = {}
-    for hname in header:
-        datadict[hname] = []
+    # organise data in dict of typed columns, columns after the last
+    # selected column are not split off
 
-    for row in range(0,len(data)):
-        for column in range(0,len(data[row])):
-            datadict[header[column]].append(data[row][column])
+    required = _AIM_INDEX + [item for item in header if _is_number(item)]
+    usecols = _usecols(header, fileorg, required, **kwargs)
+    ncols = _ncols(header, usecols)
 
-    # also organise data in pandas dataframe (TEMPORARY??)
-    try:
-        pddata = pd.read_table(filename, skiprows=int(np.floor(header_row/2)), delimiter=delimiter, header=int(np.floor(header_row/2))+1, encoding = encoding)
-    except UnicodeDecodeError: # try reading with different encoding
-        pddata = pd.read_table(filename, skiprows=int(np.floor(header_row/2)), delimiter=delimiter, header=int(np.floor(header_row/2))+1, encoding = 'iso8859_15')
+    datadict = parse_columns(split_rows(lines[header_row+1:], delimiter, ncols), header[:ncols], usecols)
+    del lines
 
     # organise metadata in dict
 
@@ -162,106 +161,383 @@ def read_aim_csv(filename, fileorg = 'AIM', **kwargs):
 
     datadict, diameter, date, time, sample,temperature, pressure, relative_humidity, mean_free_path, viscosity, scan_time, retrace_time, scan_resolution, scans_per_sample, sheath_flow, aerosol_flow, bypass_flow, low_voltage, high_voltage, lower_size, upper_size, density, td05, tf, D50, median, mean, geo_mean, mode, geo_std_dev, total_concentration, title, user_name, sample_id, instrument_id, lab_id, leak_test_rate, instrument_errors, comment = smps_file_to_config(datadict, metadatadict, header,fileorg = fileorg)
 
+    attributes = dict(date = date, temperature = temperature, pressure= pressure, relative_humidity=relative_humidity, mean_free_path=mean_free_path, viscosity=viscosity, scan_time=scan_time, retrace_time=retrace_time, scan_resolution=scan_resolution, scans_per_sample=scans_per_sample, sheath_flow=sheath_flow, aerosol_flow=aerosol_flow, bypass_flow=bypass_flow, low_voltage=low_voltage, high_voltage=high_voltage, lower_size=lower_size, upper_size=upper_size, density=density, td05=td05, tf=tf, D50=D50, median=median, mean=mean, geo_mean=geo_mean, mode=mode, geo_std_dev=geo_std_dev, total_concentration=total_concentration, title=title, user_name=user_name, sample_id=sample_id, instrument_id = instrument_id, lab_id=lab_id, leak_test_rate=leak_test_rate, instrument_errors=instrument_errors, comment=comment)
+
+    # attributes whose columns were not read are left out
+    attributes = {key: value for key, value in attributes.items() if value is not None}
 
     # write to SMPS
 
-    return SMPS(time, sample, datadict, diameter,metadatadict, header, date = date, pddata = pddata, temperature = temperature, pressure= pressure, relative_humidity=relative_humidity, mean_free_path=mean_free_path, viscosity=viscosity, scan_time=scan_time, retrace_time=retrace_time, scan_resolution=scan_resolution, scans_per_sample=scans_per_sample, sheath_flow=sheath_flow, aerosol_flow=aerosol_flow, bypass_flow=bypass_flow, low_voltage=low_voltage, high_voltage=high_voltage, lower_size=lower_size, upper_size=upper_size, density=density, td05=td05, tf=tf, D50=D50, median=median, mean=mean, geo_mean=geo_mean, mode=mode, geo_std_dev=geo_std_dev, total_concentration=total_concentration, title=title, user_name=user_name, sample_id=sample_id, instrument_id = instrument_id, lab_id=lab_id, leak_test_rate=leak_test_rate, instrument_errors=instrument_errors, comment=comment)
+    return SMPS(time, sample, datadict, diameter,metadatadict, header, **attributes)
 
 
 
-def read_opc_csv(filename, fileorg = 'OPC', **kwargs):
+def read_opc_csv(filename, fileorg = 'OPC', chunksize = None, **kwargs):
     """
     Reads OPC data from a csv file
 
     Parameters
     ----------
-    filename : str
-        path and name of file to read
+    filename : str or file object
+        path and name of file to read, or binary file object
 
     fileorg : str
         different file organisations can be found in the default_config
         for new filetypes add mappings here and specify the filetype
 
+    chunksize : int or str
+        if given, the file is not read at once but an iterator is returned
+        which yields ParticleSizer objects of chunksize samples, or of one
+        calendar day if chunksize is 'day'. See iter_opc_chunks
+
     kwargs :
         metadata, dict : user defined metadata - DEFAULT: taken from file
         header, list : user defined header - DEFAULT: taken from mypysmps.default_config file
         delimiter, str : user defined delimiter - DEFAULT: taken from file
+        name, str : name of the file, from which the date is taken when
+            filename is a file object - DEFAULT: name of the file object
+        start, str or datetime : only samples at or after start are read -
+            DEFAULT: None
+        end, str or datetime : only samples at or before end are read, 
+            reading stops at the first later sample - DEFAULT: None
+        columns, list : names of the file columns to read - DEFAULT: all
+        fields, list : names of the attributes to read (i.e. 'temperature')
+            - DEFAULT: all. If columns or fields are given, only these
+            columns are read, the time and the bins are always read
 
     Returns
     -------
     smps : smps
-        mysmps.core.smps object
+        mysmps.core.smps object, without samples if no sample is between
+        start and end
     """
+    if chunksize is not None:
+        return iter_opc_chunks(filename, fileorg = fileorg, chunksize = chunksize, **kwargs)
 
-    # header is global in config.py and here we add a variable
-    # date to it (if it is present in the file)
+    # read the file in blocks of lines, only the typed columns are kept
+
+    blocks = []
+    for datadict, header in _opc_blocks(filename, fileorg, _OPC_BLOCKSIZE, **kwargs):
+        blocks.append(datadict)
 
-    header = []
-    header = deepcopy(get_instrument_header(fileorg))
+    ps = _opc_particlesizer(_join_columns(blocks), header, fileorg, **kwargs)
+    if len(ps.sample['data']) == 0 and _window(**kwargs) is not None:
+        warnings.warn('no samples between start and end, the instance is empty')
+    return ps
 
+def iter_opc_chunks(filename, fileorg = 'OPC', chunksize = 10000, **kwargs):
+    """
+    Reads OPC data from a csv file in chunks. Only one chunk of the
+    file is held in memory at a time.
+
+    Parameters
+    ----------
+    filename : str
+        path and name of file to read
+
+    fileorg : str
+        different file organisations can be found in the default_config
+        for new filetypes add mappings here and specify the filetype
+
+    chunksize : int or str
+        number of samples per chunk, or 'day' for one chunk per
+        calendar day
+
+    kwargs :
+        see read_opc_csv
+
+    Returns
+    -------
+    chunks : iterator
+        iterator of mysmps.core.smps.ParticleSizer objects
+    """
+    nsamples = 0
+
+    if chunksize == 'day':
+        pending = None
+        for datadict, header in _opc_blocks(filename, fileorg, _OPC_BLOCKSIZE, **kwargs):
+            if pending is not None:
+                datadict = _join_columns([pending, datadict])
+
+            # split the block where the date changes, the last day
+            # may continue in the next block
+            dates = datadict['date']
+            starts = [0] + [i for i in range(1, len(dates)) if dates[i] != dates[i-1]]
+            for i0, i1 in zip(starts[:-1], starts[1:]):
+                yield _opc_particlesizer(_slice_columns(datadict, i0, i1), header, fileorg, sample_offset = nsamples, **kwargs)
+                nsamples += i1 - i0
+            pending = _slice_columns(datadict, starts[-1], len(dates))
+
+        if pending is not None and len(pending['date']) > 0:
+            yield _opc_particlesizer(pending, header, fileorg, sample_offset = nsamples, **kwargs)
+
+    else:
+        for datadict, header in _opc_blocks(filename, fileorg, int(chunksize), **kwargs):
+            if len(next(iter(datadict.values()))) == 0:
+                # no samples of the block in the time window
+                continue
+            ps = _opc_particlesizer(datadict, header, fileorg, sample_offset = nsamples, **kwargs)
+            nsamples += len(ps.sample['data'])
+            yield ps
+
+def _opc_particlesizer(datadict, fileheader, fileorg, sample_offset = 0, **kwargs):
+    """
+    Creates a ParticleSizer from columns read from an OPC file
+    """
     metadata = kwargs.get("metadata", None)
-    header = kwargs.get("header", header)
+
+    # sort and organise variables
+
+    time, sample, data, diameter, outdict = opc_file_to_config(datadict, metadata, fileheader, fileorg = fileorg, sample_offset = sample_offset)
+
+    return ParticleSizer(time, sample, data, diameter, metadata, fileheader, instrument_type = fileorg, **outdict)
+
+def _opc_blocks(filename, fileorg, blocksize, **kwargs):
+    """
+    Reads an OPC file in blocks of lines
+
+    Parameters
+    ----------
+    filename : str
+        path and name of file to read
+
+    fileorg : str
+        organisation of the file
+
+    blocksize : int
+        number of lines per block
+
+    kwargs :
+        see read_opc_csv
+
+    Returns
+    -------
+    blocks : iterator
+        iterator of (datadict, header) tuples, datadict holds the
+        typed columns of each block
+    """
     delimiter = kwargs.get("delimiter", None)
     encoding = kwargs.get("encoding", None)
 
-    with open(filename, encoding = encoding, newline='') as csvfile:
-        # get dialect from file
-        try:
-            dialect = csv.Sniffer().sniff(csvfile.read(2048), delimiters=',:.; ')
-            delimiter = dialect.delimiter
-        except:
-            delimiter = ';'
+    header, state = _opc_header(filename, fileorg, **kwargs)
+    usecols = _opc_usecols(header, fileorg, **kwargs)
 
-    data = []
-    # open file in read mode
+    window = _window(**kwargs)
+    flags = {}
 
-    try:
-        with open(filename, encoding = encoding, newline='') as read_obj:
-            # pass the file object to reader() to get the reader object
-            csv_reader = csv.reader(read_obj, delimiter=delimiter)
-            # Iterate over each line in the csv using reader object
-            for i, row in enumerate(csv_reader):
-                data.append(row)
-    except UnicodeDecodeError: # try reading with different encoding
-        with open(filename, encoding = 'iso8859_15', newline='') as read_obj:
-            # pass the file object to reader() to get the reader object
-            csv_reader = csv.reader(read_obj, delimiter=delimiter)
-             # Iterate over each line in the csv using reader object
-            for i, row in enumerate(csv_reader):
-                data.append(row)
+    with open_binary(filename) as read_obj:
+        lines_obj = read_obj
 
-    # organise data in dict
+        # get dialect from file, without rewinding so that streams
+        # are read only once
+        if delimiter is None:
+            sample = read_obj.read(2048) + read_obj.readline()
+            delimiter = sniff_delimiter(decode(sample, encoding), default = ';')
+            lines_obj = chain(BytesIO(sample), read_obj)
 
-    datadict = {}
-    for hname in header:
-        datadict[hname] = []
+        while True:
+            lines = list(islice(lines_obj, blocksize))
+            if not lines:
+                break
+
+            datadict = _opc_parse(lines, header, delimiter, encoding, state, window = window, flags = flags, usecols = usecols)
+            del lines
+
+            yield datadict, header
+
+            # samples are ordered in time, the rest of the file is
+            # after the window
+            if flags.get('done'):
+                break
+
+def _window(**kwargs):
+    """
+    Returns the time window (start, end) given in kwargs as
+    numpy.datetime64, None if no window is given
+    """
+    start = as_datetime64(kwargs.get('start', None))
+    end = as_datetime64(kwargs.get('end', None))
+    if start is None and end is None:
+        return None
+    return (start, end)
+
+def _opc_header(filename, fileorg, **kwargs):
+    """
+    Returns the header of an OPC file and the state needed to date its
+    samples. If the header has no date column, a date column is added to
+    the header, the date is taken from the file name.
+
+    Returns
+    -------
+    header : list of str
+        header of the file, with 'date' appended if not in the file
 
-    for row in range(0,len(data)):
-        for column in range(0,len(data[row])):
-            datadict[header[column]].append(data[row][column])
+    state : dict or None
+        date and time of day of the last parsed sample and the name of
+        the time column, None if the file has a date column
+    """
+    # header is global in config.py and here we add a variable
+    # date to it (if it is present in the file)
 
+    header = deepcopy(kwargs.get("header", get_instrument_header(fileorg)))
 
-    # add date from filename if not in header
-    add_date = True
-    for key in list(datadict.keys()):
+    for key in header:
         if 'date' in key:
-            add_date = False
-        else:
-            pass
+            return header, None
 
-    if add_date is True:
-        date = os.path.splitext(os.path.split(filename)[-1])[0]
-        daten = '20' + date
-        datadict['date'] = len(data) * [daten]
-        header.append('date')
+    date = _opc_file_date(kwargs.get('name', getattr(filename, 'name', filename)))
+    timecolumn = [key for key in header if _FIELD_MAPPING[fileorg].get(key) == 'time'][0]
+    header.append('date')
 
-    # sort and organise variables
+    # state carried from block to block to detect day rollovers
+    return header, {'date': date, 'last': None, 'column': timecolumn}
+
+def _opc_parse(lines, header, delimiter, encoding, state, window = None, flags = None, usecols = None):
+    """
+    Parses complete lines (bytes) of an OPC file into typed columns,
+    the date column is added if state is given. If a time window
+    (start, end) is given, only the time column of each line is parsed
+    first and only the lines inside the window are parsed completely.
+    flags['done'] is set once a line after the end of the window is met.
+    If usecols is given, only these columns are converted.
+    """
+    if flags is None:
+        flags = {}
+
+    filecolumns = header[:-1] if state is not None else header
+    ncols = _ncols(filecolumns, usecols)
+
+    lines = decode(b''.join(lines), encoding).splitlines()
+
+    if window is not None and state is not None:
+        # date the lines from their time column only
+        column = filecolumns.index(state['column'])
+        tokens = [(line.split(delimiter, column + 1) + [''])[column] for line in lines]
+        days, seconds = _opc_days(OPCseconds(to_float(tokens)), state)
+        keep = _in_window(days + seconds.astype('timedelta64[s]'), window, flags)
+
+        rows = split_rows([line for line, k in zip(lines, keep) if k], delimiter, ncols)
+        datadict = parse_columns(rows, filecolumns[:ncols], usecols)
+        datadict['date'] = days[keep]
+        return datadict
+
+    rows = split_rows(lines, delimiter, ncols)
+    datadict = parse_columns(rows, filecolumns[:ncols], usecols)
+    del rows
+
+    if state is not None:
+        datadict['date'] = _opc_dates(datadict[state['column']], state)
+
+    elif window is not None:
+        # date column in the file
+        datecolumn = [key for key in header if 'date' in key][0]
+        timecolumn = [key for key in header if _FIELD_MAPPING['OPC'].get(key) == 'time'][0]
+        dates = np.array(['%08d'%(d) for d in to_float(datadict[datecolumn]).astype(np.int64)])
+        times = to_datetime64(dates, '%Y%m%d') + OPCseconds(datadict[timecolumn]).astype('timedelta64[s]')
+        keep = _in_window(times, window, flags)
+        datadict = {key: np.asarray(column)[keep] if isinstance(column, np.ndarray) else [c for c, k in zip(column, keep) if k]
+                    for key, column in datadict.items()}
+
+    return datadict
+
+def _in_window(times, window, flags):
+    """
+    Returns a boolean array which is True for times inside the window
+    (start, end), sets flags['done'] if a time after the end is found
+    """
+    start, end = window
+    keep = np.ones(len(times), dtype = bool)
+    if start is not None:
+        keep &= times >= start
+    if end is not None:
+        after = times > end
+        keep &= ~after
+        if after.any():
+            flags['done'] = True
+    return keep
+
+def _opc_usecols(fileheader, fileorg, **kwargs):
+    """
+    Returns the columns of an OPC file to read given the columns and
+    fields options, None if all columns are read. The time, date and
+    bin columns are always read
+    """
+    mapping = _FIELD_MAPPING.get(fileorg) or {}
+    required = [key for key in fileheader if _OPC_BIN.match(key) or 'date' in key or mapping.get(key) == 'time']
+    return _usecols(fileheader, fileorg, required, **kwargs)
+
+def _opc_file_date(filename):
+    """
+    Returns the date in the name of an OPC file (i.e. 201124_210202.csv)
+    as numpy.datetime64
+    """
+    name = os.path.split(str(filename))[-1]
+    match = re.search(r'(\d{6})', name)
+    if match is None:
+        raise ValueError( ('date could not be determined from file name %s, add a date column to the header')%(name) )
+    return np.datetime64(dt.datetime.strptime('20' + match.group(1), '%Y%m%d'), 'D')
+
+def _opc_dates(times, state):
+    """
+    Returns the date of each OPC sample. The date is advanced by one day
+    every time the time of day rolls over midnight
 
-    time, sample, data, diameter, outdict = opc_file_to_config(datadict, metadata, header)
+    Parameters
+    ----------
+    times : numpy.ndarray
+        OPC times (HHMMSS.ms)
 
-    #return time, sample, data, diameter, outdict
+    state : dict
+        date and time of day of the last sample of the previous block,
+        updated in place
 
-    return ParticleSizer(time, sample, data, diameter, metadata, header, instrument_type = fileorg, **outdict)
+    Returns
+    -------
+    dates : numpy.ndarray
+        date of each sample (datetime64[D])
+    """
+    days, seconds = _opc_days(OPCseconds(times), state)
+
+    return days
+
+def _opc_days(seconds, state):
+    """
+    Returns the day (numpy.datetime64[D]) of OPC samples given as seconds
+    since midnight, and the seconds. See _opc_dates
+    """
+    if len(seconds) == 0:
+        return np.array([], dtype = 'datetime64[D]'), seconds
+
+    last = seconds[0] if state['last'] is None else state['last']
+    previous = np.concatenate(([last], seconds[:-1]))
+    days = state['date'] + np.cumsum(seconds - previous < -43200)
+
+    state['last'] = seconds[-1]
+    state['date'] = days[-1]
+
+    return days, seconds
+
+def _join_columns(blocks):
+    """
+    Joins the typed columns of consecutive blocks
+    """
+    if len(blocks) == 1:
+        return blocks[0]
+
+    datadict = {}
+    for key in blocks[0]:
+        columns = [block[key] for block in blocks]
+        if all(isinstance(c, np.ndarray) for c in columns):
+            datadict[key] = np.concatenate(columns)
+        else:
+            datadict[key] = [i for c in columns for i in c]
+    return datadict
+
+def _slice_columns(datadict, i0, i1):
+    """
+    Returns rows i0 to i1 of typed columns
+    """
+    return {key: column[i0:i1] for key, column in datadict.items()}
 
 
 def read_csv(filename, fileorg = None, default_delimiter = ',', default_comment = '#', **kwargs):
@@ -289,6 +565,18 @@ def read_csv(filename, fileorg = None, default_delimiter = ',', default_comment
         header, list : user defined header - DEFAULT: taken from file
         delimiter, str : user defined delimiter - DEFAULT: taken from file
         data_has_header, bool : set to True if the file has a header - DEFAULT: FALSE, TRUE for Grimm data
+        columns, list : names of the file columns to read - DEFAULT: all
+        fields, list : names of the variables to read - DEFAULT: all. If
+            columns or fields are given, only these columns are read, time
+            columns and Grimm size bins are always read
+        start, str or datetime : only samples at or after start are read -
+            DEFAULT: None
+        end, str or datetime : only samples at or before end are read -
+            DEFAULT: None. Samples are expected in time order: for full time
+            stamps (Grimm) the window is found by bisection of the file, for 
+            times of day (MET) the date is taken from the file name
+        date, str or datetime : date of the first record of files with
+            times of day (MET) - DEFAULT: taken from the file name
 
     Returns
     -------
@@ -315,59 +603,71 @@ def read_csv(filename, fileorg = None, default_delimiter = ',', default_comment
     metadata = kwargs.get("metadata", get_metadata('metadata'))
     delimiter = kwargs.get("delimiter", None)
     encoding = kwargs.get("encoding", None)
+    window = _window(**kwargs)
+    name = kwargs.get('name', getattr(filename, 'name', filename))
+    dates = {'date': kwargs.get('date', None)}
+
+    with open_binary(filename) as read_obj:
+        sample = read_obj.read(2048) + read_obj.readline()
 
-    with open(filename, encoding = encoding, newline='') as csvfile:
         # get dialect from file
-        try:
-            dialect = csv.Sniffer().sniff(csvfile.read(2048), delimiters=',:.; ')
-            delimiter = dialect.delimiter
-        except:
-            delimiter = default_delimiter
+        if delimiter is None:
+            try:
+                dialect = csv.Sniffer().sniff(decode(sample, encoding), delimiters=',:.; ')
+                delimiter = dialect.delimiter
+            except:
+                delimiter = default_delimiter
+
+        if window is None:
+            lines = decode(sample + read_obj.read(), encoding).splitlines()
+        else:
+            lines = _csv_window_lines(read_obj, sample, window, fileorg, header, get_header_from_file,
+                                      data_has_header, default_comment, delimiter, encoding, name, dates)
 
     data = []
-    # open file in read mode
-
-    try:
-        with open(filename, encoding = encoding, newline='') as read_obj:
-            # pass the file object to reader() to get the reader object
-            csv_reader = csv.reader(read_obj, delimiter=delimiter)
-            # Iterate over each line in the csv using reader object
-            for i, row in enumerate(csv_reader):
-                if default_comment in row[0]:
-                    metadata['comment'] += (' '.join(row) + '\n')
-                    header_skip += 1
-                elif get_header_from_file:
-                    header = row
-                    get_header_from_file = False
-                elif i == header_skip and data_has_header:
-                    pass
-                else:
-                    data.append(row)
-    except UnicodeDecodeError: # try reading with different encoding
-        with open(filename, encoding = 'iso8859_15', newline='') as read_obj:
-            # pass the file object to reader() to get the reader object
-            csv_reader = csv.reader(read_obj, delimiter=delimiter)
-             # Iterate over each line in the csv using reader object
-            for i, row in enumerate(csv_reader):
-                if row[0] == default_comment:
-                    metadata['comment'] += (' '.join(row) + '\n')
-                    header_skip += 1
-                elif get_header_from_file:
-                    header = row
-                elif i == header_skip and data_has_header:
-                    pass
-                else:
-                    data.append(row)
+    usecols = None
+
+    # pass the lines to reader() to get the reader object
+    csv_reader = csv.reader(lines, delimiter=delimiter)
+    # Iterate over each line in the csv using reader object
+    for i, row in enumerate(csv_reader):
+        if not row:
+            continue
+        elif default_comment in row[0]:
+            metadata['comment'] += (' '.join(row) + '\n')
+            header_skip += 1
+        elif get_header_from_file:
+            header = row
+            get_header_from_file = False
+        elif i == header_skip and data_has_header:
+            pass
+        else:
+            # first data line, the header is known: the remaining lines
+            # are split at once up to the last selected column
+            usecols = _csv_usecols(header, fileorg, **kwargs)
+            data = split_rows(lines[csv_reader.line_num-1:], delimiter, _ncols(header, usecols))
+            break
+    del lines
+
+    # comment lines between the data
+    for row in data:
+        if row and default_comment in row[0]:
+            metadata['comment'] += (' '.join(row) + '\n')
+    data = [row for row in data if row and default_comment not in row[0]]
 
     # organise data in dict
 
     datadict = {}
-    for hname in header:
-        datadict[hname] = []
+    columns = []
+    for column, hname in enumerate(header):
+        if usecols is None or hname in usecols:
+            datadict[hname] = []
+            columns.append((column, hname))
 
-    for row in range(0,len(data)):
-        for column in range(0,len(data[row])):
-            datadict[header[column]].append(data[row][column])
+    for row in data:
+        for column, hname in columns:
+            if column < len(row):
+                datadict[hname].append(row[column])
 
     if fileorg == 'Grimm':
 
@@ -377,4 +677,291 @@ def read_csv(filename, fileorg = None, default_delimiter = ',', default_comment
 
         vardict = file_to_config(datadict, metadata, header, fileorg)
 
+        if 'time' in vardict and not any(name in vardict for name in ('date', 'datetime', 'timestamp')):
+            # times of day (HHMMSS.ms), dated from the file name
+            vardict['timestamp'] = get_variable('timestamp', data = _dated_times(vardict['time']['data'], name, dates['date']))
+
         return vardict
+
+
+def _dated_times(times, name, date = None):
+    """
+    Returns the time axis (datetime64[ns]) of records with times of day
+    (HHMMSS.ms). The records start on date or on the date in the file
+    name, the date advances when the time of day rolls over midnight
+    """
+    try:
+        day = _first_day(name, date)
+    except ValueError:
+        raise ValueError( ('date could not be determined from file name %s, give the date of the first record (date)')%(os.path.split(str(name))[-1]) )
+    days, seconds = _opc_days(OPCseconds(to_float(times)), {'date': day, 'last': None})
+    return (days + seconds.astype('timedelta64[s]')).astype('datetime64[ns]')
+
+def _first_day(name, date = None):
+    """
+    Returns date as numpy.datetime64[D], the date in the file name if
+    date is None
+    """
+    if date is not None:
+        return as_datetime64(date).astype('datetime64[D]')
+    return _opc_file_date(name)
+
+def _csv_usecols(fileheader, fileorg, **kwargs):
+    """
+    Returns the columns of a csv file to read given the columns and fields
+    options, None if all columns are read. Time columns and size bins
+    (numeric column names) are always read
+    """
+    mapping = _FIELD_MAPPING.get(fileorg, {}) or {}
+    required = [name for name in fileheader if _is_number(name) or _is_time_column(name, mapping)]
+    return _usecols(fileheader, fileorg, required, **kwargs)
+
+def _usecols(fileheader, fileorg, required, **kwargs):
+    """
+    Returns the names of the columns to read, in the order of the header,
+    given the columns (file column names) and fields (variable names)
+    options. None if neither option is given, all columns are read then.
+    Required columns are always read
+
+    Parameters
+    ----------
+    fileheader : list
+        file header
+
+    fileorg : str
+        organisation of the file, its field mapping translates fields into
+        column names
+
+    required : list
+        columns which are read in any case
+
+    kwargs :
+        columns, list : names of the file columns to read
+        fields, list : names of the variables to read
+
+    Returns
+    -------
+    usecols : list or None
+        names of the columns to read
+    """
+    columns = kwargs.get('columns', None)
+    fields = kwargs.get('fields', None)
+    if columns is None and fields is None:
+        return None
+
+    columns = list(columns or [])
+    fields = list(fields or [])
+
+    # field mappings are organised file name to variable name (OPC) or
+    # variable name to file name (AIM), both directions are looked up
+    mappings = [_FIELD_MAPPING.get(fileorg, {}) or {}]
+    if fileorg in _AIM_ORGANISATIONS:
+        mappings += [_FIELD_MAPPING[org] for org in _AIM_ORGANISATIONS if org != fileorg]
+
+    def is_field(name, field):
+        if name == field:
+            return True
+        return any(mapping.get(field) == name or (isinstance(name, str) and mapping.get(name) == field)
+                   for mapping in mappings)
+
+    usecols = [name for name in fileheader
+               if name in required or name in columns or any(is_field(name, field) for field in fields)]
+
+    missing = [name for name in columns if name not in fileheader]
+    missing += [field for field in fields if not any(is_field(name, field) for name in fileheader)]
+    if missing:
+        warnings.warn( ('%s not found in the file header')%(', '.join(str(name) for name in missing)) )
+
+    return usecols
+
+def _ncols(header, usecols):
+    """
+    Returns the number of leading columns holding all selected columns,
+    None if all columns are read
+    """
+    if usecols is None:
+        return None
+    indices = [i for i, name in enumerate(header) if name in usecols]
+    return max(indices) + 1 if indices else 1
+
+def _is_number(name):
+    """
+    Returns True for numeric column names (diameters)
+    """
+    try:
+        float(name)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def _is_time_column(name, mapping):
+    """
+    Returns True for the date and time columns of a file
+    """
+    internal = mapping.get(name, name) if isinstance(name, str) else None
+    if internal in _TIME_COLUMNS:
+        return True
+    return any(mapping.get(key) == name for key in _TIME_COLUMNS)
+
+# below this many bytes the window is searched line by line
+_BISECT_LINEAR = 65536
+
+def _csv_window_lines(read_obj, sample, window, fileorg, header, get_header_from_file,
+                      data_has_header, default_comment, delimiter, encoding, name, dates):
+    """
+    Returns the lines of a csv file before the data (comments and header)
+    followed by the data lines inside the time window. For times of day,
+    dates['date'] is the date of the first record (None: from the file
+    name), it is set to the date of the first line inside the window
+    """
+    key = _csv_time_key(fileorg, header, delimiter)
+    seekable = hasattr(read_obj, 'seekable') and read_obj.seekable()
+
+    if seekable:
+        read_obj.seek(0)
+        content = None
+    else:
+        content = BytesIO(sample + read_obj.read())
+        read_obj = content
+
+    # comments and header lines, the data starts after them
+    head = []
+    data_start = 0
+    ncontent = 0
+    while True:
+        data_start = read_obj.tell()
+        raw = read_obj.readline()
+        if not raw:
+            break
+        line = decode(raw, encoding).rstrip('\r\n')
+        row = split_rows([line], delimiter)
+        row = row[0] if row else ['']
+        if default_comment in row[0]:
+            head.append(line)
+        elif get_header_from_file:
+            header = row
+            key = _csv_time_key(fileorg, header, delimiter)
+            get_header_from_file = False
+            head.append(line)
+            ncontent += 1
+        elif data_has_header and ncontent == 0:
+            head.append(line)
+            ncontent += 1
+        else:
+            break
+
+    read_obj.seek(0, 2)
+    size = read_obj.tell()
+
+    if key is None:
+        warnings.warn('no time column found, start and end are ignored')
+        read_obj.seek(data_start)
+        return head + decode(read_obj.read(), encoding).splitlines()
+
+    kind, parse = key
+    start, end = window
+
+    if kind == 'timestamp':
+        # full time stamps, bisection of the byte offsets
+        lo = data_start
+        if start is not None:
+            lo = _bisect_lines(read_obj, data_start, size, lambda line: _before(parse(line), start, False))
+        hi = size
+        if end is not None:
+            hi = _bisect_lines(read_obj, lo, size, lambda line: _before(parse(line), end, True))
+        read_obj.seek(lo)
+        return head + decode(read_obj.read(max(hi - lo, 0)), encoding).splitlines()
+
+    # times of day, dated from the file name
+    read_obj.seek(data_start)
+    lines = decode(read_obj.read(), encoding).splitlines()
+    try:
+        state = {'date': _first_day(name, dates['date']), 'last': None}
+    except ValueError:
+        warnings.warn('date could not be determined from the file name, start and end are ignored')
+        return head + lines
+
+    lines = [line for line in lines if line]
+    days, seconds = _opc_days(OPCseconds(to_float([parse(line) for line in lines])), state)
+    keep = _in_window(days + seconds.astype('timedelta64[s]'), window, {})
+    if keep.any():
+        dates['date'] = days[np.argmax(keep)]
+    return head + [line for line, k in zip(lines, keep) if k]
+
+def _csv_time_key(fileorg, header, delimiter):
+    """
+    Returns how to read the time of a data line: ('timestamp', parse)
+    where parse returns numpy.datetime64 for files with full time stamps,
+    ('timeofday', parse) where parse returns the time cell for files with
+    times of day (HHMMSS.ms), None if there is no time column
+    """
+    mapping = _FIELD_MAPPING.get(fileorg, {}) or {}
+    conversions = _CONVERSIONS.get(fileorg, {}) or {}
+
+    for idx, name in enumerate(header or []):
+        try:
+            internal = mapping.get(name, name)
+        except TypeError:
+            continue
+        if internal == 'datetime' and 'datetime' in conversions:
+            fmt = conversions['datetime'][1]
+            return ('timestamp', lambda line, idx=idx, fmt=fmt: _parse_timestamp(line, idx, fmt, delimiter))
+        if internal == 'time' or mapping.get('time') == name:
+            return ('timeofday', lambda line, idx=idx: _cell(line, idx, delimiter))
+    return None
+
+def _cell(line, idx, delimiter):
+    """
+    Returns cell idx of a line (str or bytes)
+    """
+    if isinstance(line, bytes):
+        line = line.decode('utf-8', 'replace')
+    cells = line.rstrip('\r\n').split(delimiter, idx + 1)
+    if len(cells) <= idx:
+        return ''
+    return cells[idx].strip().strip('"')
+
+def _parse_timestamp(line, idx, fmt, delimiter):
+    """
+    Returns the time stamp in cell idx of a line, None if it can not be
+    parsed
+    """
+    try:
+        return np.datetime64(dt.datetime.strptime(_cell(line, idx, delimiter), fmt), 'ns')
+    except ValueError:
+        return None
+
+def _before(time, limit, inclusive):
+    """
+    Returns True if a line with this time lies before the searched line,
+    lines without time are skipped
+    """
+    if time is None:
+        return True
+    if inclusive:
+        return time <= limit
+    return time < limit
+
+def _bisect_lines(f, lo, hi, before):
+    """
+    Returns the byte offset of the first line of a time ordered file for
+    which before(line) is False, searching from offset lo (start of a
+    line) to hi
+    """
+    while hi - lo > _BISECT_LINEAR:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        f.readline()
+        pos = f.tell()
+        line = f.readline()
+        if line and pos < hi and before(line):
+            lo = pos + len(line)
+        else:
+            hi = mid
+
+    f.seek(lo)
+    while True:
+        line = f.readline()
+        if not line or not before(line):
+            return lo
+        lo += len(line)
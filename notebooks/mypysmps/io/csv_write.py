@@ -1,20 +1,18 @@
 # -*- coding: utf-8 -*-
 #################
-import numpy as np
-import pandas as pd
 import csv
-from csv import writer
+import numpy as np
+from itertools import chain
 
 from ..core.smps import SMPS
-from ..config import get_metadata, get_instrument_header
-from .read_aux import smps_file_to_config, opc_file_to_config
+from ..config import get_metadata, get_instrument_header, _FIELD_MAPPING, _DEFAULT_VARIABLES
 #################
 
 """
 mysmps.io.csv_write
 ==================
 
-Functions for reading of csv files:
+Functions for writing of csv files:
     write_aim_csv
 
 Created on Wed Sep 30 12:00 2020
@@ -22,28 +20,172 @@ Created on Wed Sep 30 12:00 2020
 @author: flovan / fvanden
 
 Revision history:   30.09.2020 - Created
+                    18.10.2026 - write_aim_csv implemented, rows are
+                                formatted and written in blocks
+                               - attribute columns in the order of the
+                                header the instance was read from
 
 
 """
-def write_aim_csv(smps, fileorg = 'AIM', **kwargs):
+
+# number of samples formatted and written at once
+_WRITE_BLOCKSIZE = 10000
+
+# first columns of the AIM data table
+_AIM_INDEX = ['Sample #', 'Date', 'Start Time']
+
+def write_aim_csv(smps, filename, fileorg = 'AIM', **kwargs):
     """
     Writes SMPS object to a csv file in the same organisation
     as the file generated by the AIM software
-    
+
     Parameters
     ----------
     smps - SMPS
-        core.SMPS object to use for creating plots
-        
+        core.SMPS object to write
+
+    filename : str
+        path and name of file to write
+
     fileorg : str
         different file organisations can be found in the default_config
         for new filetypes add mappings here and specify the filetype
-        
-    kwargs : 
-        
-        
+
+    kwargs :
+        variable, str : data field to write - DEFAULT: first variable
+        delimiter, str : delimiter of the file - DEFAULT: ','
+        encoding, str : encoding of the file - DEFAULT: 'iso8859_15'
+        float_format, str : format of floating point numbers - DEFAULT: '%.7g'
+        blocksize, int : number of samples formatted at once - DEFAULT: 10000
+
     Returns
     -------
     None
     """
-    pass
\ No newline at end of file
+    variable = kwargs.get('variable', smps.data['variables'][0])
+    delimiter = kwargs.get('delimiter', ',')
+    encoding = kwargs.get('encoding', 'iso8859_15')
+    float_format = kwargs.get('float_format', '%.7g')
+    blocksize = kwargs.get('blocksize', _WRITE_BLOCKSIZE)
+
+    nsamples = len(smps.sample['data'])
+    header = smps.header if isinstance(smps.header, list) else []
+
+    # metadata block, Units and Weight tell the reader which variable
+    # is in the table
+
+    metadata = dict(smps.metadata) if isinstance(smps.metadata, dict) else {}
+    for units, weights in _DEFAULT_VARIABLES.items():
+        for weight, name in weights.items():
+            if name == variable:
+                metadata['Units'] = units
+                metadata['Weight'] = weight
+
+    # table columns : sample, date, time, one column per diameter
+    # and one column per sample attribute
+
+    names = list(_AIM_INDEX)
+    columns = [smps.sample['data'], smps.date['data'], smps.time['data']]
+
+    field = smps.data[variable]['data']
+    for d, diameter in enumerate(smps.diameter['data'][:field.shape[0]]):
+        names.append(_diameter_name(diameter, header))
+        columns.append(field[d])
+
+    # all columns of the organisation are written, those not in the
+    # instance are left empty. Columns are in the order of the header
+    # the instance was read from, the others follow in mapping order
+    keys = [key for key in _FIELD_MAPPING[fileorg] if key not in ('date', 'time', 'diameter')]
+    colnames = {key: _column_name(key, fileorg, header) for key in keys}
+    position = {name: i for i, name in enumerate(header)}
+    keys.sort(key = lambda key: position.get(colnames[key], len(header)))
+
+    for key in keys:
+        values = getattr(smps, key.replace('+', ''), None)
+        if isinstance(values, dict) and len(values.get('data', [])) == nsamples:
+            columns.append(values['data'])
+        else:
+            columns.append([''] * nsamples)
+        names.append(colnames[key])
+
+    with open(filename, 'w', encoding = encoding, errors = 'replace', newline = '') as f:
+        csvwriter = csv.writer(f, delimiter = delimiter, lineterminator = '\r\n')
+        for key, value in metadata.items():
+            csvwriter.writerow([key, value])
+        csvwriter.writerow(names)
+
+        _write_columns(f, columns, delimiter, float_format, blocksize)
+
+    return None
+
+def _write_columns(f, columns, delimiter, float_format, blocksize):
+    """
+    Writes columns of equal length as delimited rows. A block of rows is
+    formatted with one string formatting operation.
+    """
+    nrows = len(columns[0]) if columns else 0
+
+    formats = []
+    for column in columns:
+        if isinstance(column, np.ndarray) and column.dtype.kind in 'fc':
+            if column.dtype.kind == 'f' and not np.ma.is_masked(column) and np.all(np.mod(column, 1) == 0):
+                formats.append('%d')
+            else:
+                formats.append(float_format)
+        elif isinstance(column, np.ndarray) and column.dtype.kind in 'iub':
+            formats.append('%d')
+        else:
+            formats.append('%s')
+
+    for i0 in range(0, nrows, blocksize):
+        i1 = min(i0 + blocksize, nrows)
+        block = [_block_values(column, i0, i1, fmt, delimiter) for column, fmt in zip(columns, formats)]
+        rowformat = delimiter.join(formats) + '\r\n'
+        f.write((rowformat * (i1 - i0)) % tuple(chain.from_iterable(zip(*block))))
+
+def _block_values(column, i0, i1, fmt, delimiter):
+    """
+    Returns rows i0 to i1 of a column as a list of python values
+    """
+    values = column[i0:i1]
+    if fmt == '%s':
+        return [_quote(str(v), delimiter) for v in values]
+    if isinstance(values, np.ma.MaskedArray):
+        values = values.filled(np.nan)
+    return np.asarray(values).tolist()
+
+def _quote(value, delimiter):
+    """
+    Quotes a cell if it contains the delimiter or quotes
+    """
+    if delimiter in value or '"' in value or '\n' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def _diameter_name(diameter, header):
+    """
+    Returns the column name of a diameter, as in the header it was read
+    from if possible
+    """
+    for item in header:
+        try:
+            if float(item) == diameter:
+                return item
+        except (ValueError, TypeError):
+            continue
+    return '%g'%(diameter)
+
+def _column_name(key, fileorg, header):
+    """
+    Returns the column name of a variable, as in the header it was read
+    from if possible
+    """
+    for org in (fileorg, 'AIM_csv', 'AIM_text'):
+        name = _FIELD_MAPPING.get(org, {}).get(key)
+        if name is not None and name in header:
+            return name
+    name = _FIELD_MAPPING[fileorg][key]
+    if '\ufffd' in name:
+        # mapping for files with unknown encoding
+        name = _FIELD_MAPPING['AIM_csv'].get(key, name)
+    return name
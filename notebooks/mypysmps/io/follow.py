@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#################
+import os
+import re
+import glob
+import warnings
+
+from .columnar import decode, sniff_delimiter
+from .csv_read import _opc_header, _opc_parse, _opc_usecols, _opc_particlesizer, _opc_file_date
+#################
+
+"""
+mypysmps.io.follow
+==================
+
+Incremental reading of instrument logs which are still being written:
+    Follower
+
+Created on Sun Oct 18 16:30 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# maximum number of bytes read from a file at once
+_FOLLOW_READSIZE = 64 * 2**20
+
+
+class Follower(object):
+    """
+    Follows a growing OPC log. Every call of update parses only the
+    complete lines appended since the previous call and appends them to
+    the ParticleSizer in ps. When a newer daily file appears in the same
+    directory, the follower moves on to that file.
+
+    Parameters
+    ----------
+    filename : str
+        path and name of file to follow
+
+    fileorg : str
+        organisation of the file, see read_opc_csv
+
+    kwargs :
+        pattern, str : glob pattern of the files which follow on filename
+            in its directory - DEFAULT: all files with the same extension
+        other kwargs are passed to the OPC reader (header, delimiter,
+            encoding, metadata, columns, fields)
+
+    Attributes
+    ----------
+    ps : ParticleSizer
+        all samples read so far, None before the first sample is read
+
+    filename : str
+        file currently followed
+
+    offset : int
+        number of bytes of filename which have been parsed
+
+    Example
+    -------
+    follower = Follower('/data/opc/201124_000000.csv')
+    while True:
+        if follower.update():
+            plot(follower.ps)
+        time.sleep(60)
+    """
+    ## ------------------------------------------------------------------ ##
+    ## Constructors/Destructors                                           ##
+    ## ------------------------------------------------------------------ ##
+
+    def __init__(self, filename, fileorg = 'OPC', **kwargs):
+        self.fileorg = fileorg
+        self.pattern = kwargs.pop('pattern', None)
+        self.kwargs = kwargs
+        self.ps = None
+
+        self._nsamples = 0
+        self._open(filename)
+
+    def __del__(self):
+        pass
+
+    ## ------------------------------------------------------------------ ##
+    ## Methods                                                            ##
+    ## ------------------------------------------------------------------ ##
+
+    # public:
+
+    def update(self):
+        """
+        Parses the lines appended to the log since the last update
+
+        Returns
+        -------
+        nsamples : int
+            number of new samples
+        """
+        nsamples = self._read_appended()
+
+        nextfile = self._next_file()
+        while nextfile is not None:
+            # the current file is no longer written to
+            nsamples += self._read_appended()
+            if os.path.getsize(self.filename) > self.offset:
+                warnings.warn( ('incomplete last line of %s is ignored')%(self.filename) )
+            self._open(nextfile)
+            nsamples += self._read_appended()
+            nextfile = self._next_file()
+
+        return nsamples
+
+    # private:
+
+    def _open(self, filename):
+        """
+        Starts following a file from its beginning
+        """
+        self.filename = filename
+        self.offset = 0
+        self._delimiter = self.kwargs.get('delimiter', None)
+        self._encoding = self.kwargs.get('encoding', None)
+        self._header, self._state = _opc_header(filename, self.fileorg, **self.kwargs)
+        self._usecols = _opc_usecols(self._header, self.fileorg, **self.kwargs)
+
+    def _read_appended(self):
+        """
+        Parses the complete lines after offset, a partial last line is
+        left for the next update
+        """
+        try:
+            size = os.path.getsize(self.filename)
+        except OSError:
+            return 0
+
+        if size < self.offset:
+            warnings.warn( ('%s was truncated, it is read again from the start')%(self.filename) )
+            self._open(self.filename)
+
+        nsamples = 0
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                raw = f.read(_FOLLOW_READSIZE)
+                end = raw.rfind(b'\n')
+                if end < 0:
+                    break
+                chunk = raw[:end+1]
+                self.offset += end + 1
+                f.seek(self.offset)
+                nsamples += self._parse(chunk)
+
+        return nsamples
+
+    def _parse(self, chunk):
+        """
+        Parses complete lines and appends them to ps
+        """
+        if self._delimiter is None:
+            self._delimiter = sniff_delimiter(decode(chunk[:2048], self._encoding), default = ';')
+
+        datadict = _opc_parse([chunk], self._header, self._delimiter, self._encoding, self._state, usecols = self._usecols)
+        if len(next(iter(datadict.values()))) == 0:
+            return 0
+
+        newps = _opc_particlesizer(datadict, self._header, self.fileorg, sample_offset = self._nsamples, **self.kwargs)
+        nsamples = len(newps.sample['data'])
+
+        if self.ps is None:
+            self.ps = newps
+        else:
+            self._append(newps)
+
+        self._nsamples += nsamples
+        return nsamples
+
+    def _append(self, newps):
+        """
+        Appends the samples of newps to ps, see ParticleSizer.append_samples
+        """
+        fields = {var: newps.data[var]['data'] for var in newps.data['variables']}
+        attributes = {name: getattr(newps, name)['data'] for name in newps._sample_attributes()
+                      if name not in ('timestamp', 'diameter')}
+        self.ps.append_samples(newps.timestamp['data'], fields, **attributes)
+
+    def _next_file(self):
+        """
+        Returns the file following on the current file, None if there is
+        no newer file
+        """
+        directory, name = os.path.split(self.filename)
+        pattern = self.pattern or '*' + os.path.splitext(name)[1]
+
+        try:
+            current = _opc_file_date(name)
+        except ValueError:
+            return None
+
+        candidates = []
+        for path in glob.glob(os.path.join(directory, pattern)):
+            other = os.path.basename(path)
+            if other <= name or not re.search(r'\d{6}', other):
+                continue
+            if _opc_file_date(other) >= current:
+                candidates.append(path)
+
+        if not candidates:
+            return None
+        return sorted(candidates)[0]
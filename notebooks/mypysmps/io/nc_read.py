@@ -16,12 +16,17 @@ mypysmps.io.nc_read
 Automatic reading of files by detecting format:
     read_mpl
     
+Variables are returned as lazy proxies: the data of a variable is only
+read from the file when its 'data' key is first accessed, and only the
+requested hyperslab is read.
+    
 Created on Mon Nov 16 18:56 2020
 
 @author: flovan / fvanden
 
 Revision history:   16.11.2020 - Created
-                    
+                    18.10.2026 - variables are read lazily, variables, 
+                                time_slice and range_slice added
 
 
 
@@ -48,51 +53,66 @@ def read_mpl(filename, fileorg, **kwargs):
         keepvars, list of str : a number of variables are considered redundant
             and are therefore ignored by the reader. If you want to keep these
             input their netCDF names here
+        variables, list of str : only these variables are returned, given by
+            their netCDF or their mypysmps name - DEFAULT: all variables
+        time_slice, slice or tuple : profiles to read, as a slice or as 
+            (start, stop) indices - DEFAULT: all profiles
+        range_slice, slice or tuple : range bins to read, as a slice or as
+            (start, stop) indices - DEFAULT: all range bins
         
         
     Returns
     -------
-    smps : smps
-        mysmps.core.smps object
+    smps : dict
+        variable name as key, metadata dictionary as value. The 'data' of 
+        each variable is read from the file on first access
     """
     #TODO: put copol etc in fields using meta_group = variable key
     
-    # read netCDF file
-    datafile = nc.Dataset(filename)
-    
     # get kwargs
     metadata = kwargs.get("metadata", None)
-    header = kwargs.get('header', list(datafile.variables.keys()))
     message = kwargs.get('message', True)
     keepvars = kwargs.get('keepvars', [])
+    variables = kwargs.get('variables', None)
+    time_slice = _to_slice(kwargs.get('time_slice', None))
+    range_slice = _to_slice(kwargs.get('range_slice', None))
     
     # get conversions dict if exists
-    if fileorg in _CONVERSIONS:
-        convdict = _CONVERSIONS[fileorg]
-        convvars = list(convdict.keys())
-        
+    convdict = _CONVERSIONS.get(fileorg, {})
     
     redundant = []
     rejected = []
     outdict = {}
     
-    for variable in header:
-        try:
-            filenaming =  _FIELD_MAPPING[fileorg][variable]
-        except KeyError:
-            if variable in keepvars:
-                filenaming = variable
-            else:
-                redundant.append(variable)
+    # only the structure of the file is read here
+    with nc.Dataset(filename) as datafile:
+        header = kwargs.get('header', list(datafile.variables.keys()))
+        time_dims, range_dims = _mpl_dimensions(datafile, fileorg)
+        
+        for variable in header:
+            try:
+                filenaming =  _FIELD_MAPPING[fileorg][variable]
+            except KeyError:
+                if variable in keepvars:
+                    filenaming = variable
+                else:
+                    redundant.append(variable)
+                    continue
+            
+            if variables is not None and variable not in variables and filenaming not in variables:
+                continue
+            
+            try:
+                dimensions = datafile[variable].dimensions
+            except (IndexError, KeyError):
+                rejected.append(variable)
                 continue
-        outdict[filenaming] = get_metadata(filenaming)
-        try:
-            if filenaming in convvars:
-                outdict[filenaming]['data'] = convert_units(datafile[variable][:], *convdict[filenaming])
-            else:
-                outdict[filenaming]['data'] = datafile[variable][:]
-        except:
-            rejected.append(variable)
+            
+            index = tuple(time_slice if dim in time_dims else range_slice if dim in range_dims else slice(None)
+                          for dim in dimensions)
+            
+            outdict[filenaming] = _LazyVariable(get_metadata(filenaming), filename, variable,
+                                                index, convdict.get(filenaming, None))
                 
     if message:
         print('Could not read: \n')
@@ -106,3 +126,69 @@ def read_mpl(filename, fileorg, **kwargs):
         print('---- set message = False to suppress message output ----')
     
     return outdict
+
+
+class _LazyVariable(dict):
+    """
+    Metadata dictionary of a netCDF variable whose 'data' is read from
+    the file on first access. The file is opened and closed for every
+    read, so no file handle is kept open.
+    """
+    
+    def __init__(self, metadata, filename, variable, index, conversion = None):
+        dict.__init__(self, metadata)
+        self._source = (filename, variable, index, conversion)
+    
+    def __missing__(self, key):
+        if key != 'data':
+            raise KeyError(key)
+        filename, variable, index, conversion = self._source
+        with nc.Dataset(filename) as datafile:
+            data = datafile[variable][index]
+        if conversion is not None:
+            data = convert_units(data, *conversion)
+        self['data'] = data
+        return data
+    
+    def __contains__(self, key):
+        return key == 'data' or dict.__contains__(self, key)
+    
+    def get(self, key, default = None):
+        if key in self:
+            return self[key]
+        return default
+    
+    def loaded(self):
+        """
+        Returns True if the data has been read from the file
+        """
+        return dict.__contains__(self, 'data')
+
+
+def _mpl_dimensions(datafile, fileorg):
+    """
+    Returns the names of the time (profile) and range dimensions of an
+    MPL file. The time dimensions are those of the time variables, the
+    range dimensions those of the range variables.
+    """
+    time_dims = set()
+    range_dims = set()
+    for variable, filenaming in _FIELD_MAPPING[fileorg].items():
+        if variable not in datafile.variables:
+            continue
+        if filenaming in ('time', 'date'):
+            time_dims.update(datafile[variable].dimensions)
+        elif filenaming.startswith('range'):
+            range_dims.update(datafile[variable].dimensions)
+    
+    return time_dims, range_dims - time_dims
+
+def _to_slice(value):
+    """
+    Converts a slice given as None, (start, stop) or slice to a slice
+    """
+    if value is None:
+        return slice(None)
+    if isinstance(value, slice):
+        return value
+    return slice(*value)
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#################
+import numpy as np
+import netCDF4 as nc
+
+from ..config import get_fillvalue
+from ..util.timeaxis import to_datetime64
+#################
+
+"""
+mypysmps.io.nc_write
+====================
+
+Writing of particle sizer and meteorological data to CF netCDF4 files:
+    write_netcdf
+
+Samples are stored along an unlimited 'time' dimension and size
+distributions as (time, diameter) variables. Variables are chunked along
+time, so that reading a time window only decompresses the chunks that
+cover it.
+
+Created on Sun Oct 18 15:40 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# CF time units, times are stored as seconds since the epoch
+_TIME_UNITS = 'seconds since 1970-01-01 00:00:00'
+
+# time attributes replaced by the CF time variable
+_TIME_ATTRIBUTES = ('time', 'date', 'datetime', 'timestamp')
+
+# coordinates, written as dimensions and not as per sample variables
+_COORDINATES = ('diameter', 'sample')
+
+# metadata keys written as variable attributes, valid_min and valid_max
+# are left out as readers mask values outside of them
+_VARIABLE_ATTRIBUTES = ('units', 'long_name', 'comment')
+
+# upper limit of the size of a chunk in bytes
+_MAX_CHUNK_BYTES = 4 * 2**20
+
+def write_netcdf(ps, filename, chunks = None, complevel = 4, **kwargs):
+    """
+    Writes a particle sizer (or MET) object to a CF netCDF4 file
+
+    Parameters
+    ----------
+    ps : ParticleSizer, SMPS or MET
+        mypysmps object to write
+
+    filename : str
+        path and name of file to write
+
+    chunks : int
+        number of samples per chunk. DEFAULT: one day of samples, reduced
+        until a chunk is smaller than 4 MB
+
+    complevel : int
+        zlib compression level between 0 (no compression) and 9
+
+    kwargs :
+        format, str : netCDF format - DEFAULT: 'NETCDF4'
+        title, str : title of the file - DEFAULT: instrument type
+
+    Returns
+    -------
+    None
+    """
+    fmt = kwargs.get('format', 'NETCDF4')
+    fill_value = get_fillvalue()
+
+    times = _time_axis(ps)
+    nsamples = len(times)
+
+    fields = {}
+    if isinstance(getattr(ps, 'data', None), dict) and 'variables' in ps.data:
+        fields = {var: ps.data[var] for var in ps.data['variables']}
+
+    attributes = [name for name, value in ps.__dict__.items()
+                  if name not in _TIME_ATTRIBUTES and name not in _COORDINATES and name != 'data' and isinstance(value, dict)
+                  and 'data' in value and _is_sequence(value['data']) and len(value['data']) == nsamples]
+
+    diameters = None
+    edges = None
+    if fields:
+        nrows = min(np.shape(field['data'])[0] for field in fields.values())
+        diameter = np.asarray(ps.diameter['data'], dtype = float)
+        if len(diameter) == nrows + 1:
+            # diameters are bin edges (i.e. OPC)
+            edges = diameter
+        diameters = diameter[:nrows]
+
+    # chunk along time
+
+    rowbytes = 8 * (len(diameters) if diameters is not None else 1)
+    if chunks is None:
+        chunks = _default_chunks(times, rowbytes)
+    chunks = int(max(1, min(chunks, max(nsamples, 1))))
+
+    compression = dict(zlib = complevel > 0, complevel = complevel, shuffle = complevel > 0)
+
+    with nc.Dataset(filename, 'w', format = fmt) as ds:
+        ds.Conventions = 'CF-1.8'
+        ds.title = kwargs.get('title', str(getattr(ps, 'instrument_type', getattr(ps, 'instrument', ''))))
+        ds.source = 'mypysmps'
+        for name in ('instrument_type', 'instrument'):
+            if isinstance(getattr(ps, name, None), str):
+                setattr(ds, name, getattr(ps, name))
+        if isinstance(getattr(ps, 'metadata', None), dict):
+            for key, value in ps.metadata.items():
+                _set_attribute(ds, _clean_name(key), value)
+
+        ds.createDimension('time', None)
+        var = ds.createVariable('time', 'f8', ('time',), chunksizes = (chunks,), **compression)
+        var.standard_name = 'time'
+        var.long_name = 'time_of_sample_measurement'
+        var.units = _TIME_UNITS
+        var.calendar = 'standard'
+        var.axis = 'T'
+        var[:] = (times - np.datetime64('1970-01-01', 'ns')).astype(np.int64) / 1e9
+
+        if diameters is not None:
+            ds.createDimension('diameter', len(diameters))
+            var = ds.createVariable('diameter', 'f8', ('diameter',))
+            _set_attributes(var, ps.diameter)
+            var[:] = diameters
+            if edges is not None:
+                ds.createDimension('nv', 2)
+                var.bounds = 'diameter_bnds'
+                bnds = ds.createVariable('diameter_bnds', 'f8', ('diameter', 'nv'))
+                bnds[:] = np.column_stack((edges[:-1], edges[1:]))
+
+        for name, field in fields.items():
+            data = np.ma.asarray(field['data'])
+            if list(ps.data.get('coordinates', ['diameter', 'sample']))[0] != 'diameter':
+                data = data.T
+            data = data[:len(diameters)]
+            var = ds.createVariable(name, _nc_type(data), ('time', 'diameter'), fill_value = _fill(data, fill_value),
+                                    chunksizes = (chunks, len(diameters)), **compression)
+            _set_attributes(var, field)
+            var[:] = data.T
+
+        for name in attributes:
+            values = getattr(ps, name)
+            data = values['data']
+            if isinstance(data, np.ndarray) and data.dtype.kind in 'fiub':
+                var = ds.createVariable(name, _nc_type(data), ('time',), fill_value = _fill(data, fill_value),
+                                        chunksizes = (chunks,), **compression)
+                var[:] = data
+            else:
+                # text, not compressed (variable length strings)
+                var = ds.createVariable(name, str, ('time',), chunksizes = (chunks,))
+                var[:] = np.array([str(v) for v in data], dtype = object)
+            _set_attributes(var, values)
+
+    return None
+
+def _time_axis(ps):
+    """
+    Returns the time of each sample as datetime64[ns]
+    """
+    if hasattr(ps, 'timestamp'):
+        return np.asarray(ps.timestamp['data'], dtype = 'datetime64[ns]')
+    if hasattr(ps, 'datetime') and 'data' in ps.datetime:
+        return to_datetime64(ps.datetime['data'], ps.datetime['units'])
+    if hasattr(ps, 'date') and hasattr(ps, 'time'):
+        strings = [d + ' ' + t for d, t in zip(ps.date['data'], ps.time['data'])]
+        return to_datetime64(strings, ps.date['units'] + ' ' + ps.time['units'])
+    raise ValueError('object has no time information')
+
+def _default_chunks(times, rowbytes):
+    """
+    Returns the number of samples in one day, halved until a chunk of
+    rows of rowbytes bytes is smaller than _MAX_CHUNK_BYTES
+    """
+    if len(times) < 2:
+        return max(len(times), 1)
+    step = np.median(np.diff(times).astype(np.int64)) / 1e9
+    chunks = int(86400 / step) if step > 0 else len(times)
+    while chunks > 1 and chunks * rowbytes > _MAX_CHUNK_BYTES:
+        chunks = (chunks + 1) // 2
+    return chunks
+
+def _nc_type(data):
+    """
+    Returns the netCDF type of an array, booleans are stored as bytes
+    """
+    if data.dtype.kind == 'b':
+        return 'i1'
+    if data.dtype == np.int64 or data.dtype == np.uint64:
+        return 'i8'
+    return data.dtype.str.lstrip('<>=|')
+
+def _fill(data, fill_value):
+    """
+    Returns the fill value of an array, integer arrays use the netCDF
+    default fill value
+    """
+    if data.dtype.kind == 'f':
+        return fill_value
+    return None
+
+def _set_attributes(var, metadata):
+    """
+    Copies the metadata of a variable to netCDF attributes
+    """
+    for key in _VARIABLE_ATTRIBUTES:
+        if metadata.get(key) is not None:
+            _set_attribute(var, key, metadata[key])
+
+def _set_attribute(obj, key, value):
+    """
+    Sets a netCDF attribute, values which can not be stored are converted
+    to str
+    """
+    if value is None:
+        return
+    if not isinstance(value, (str, int, float, np.number)):
+        value = str(value)
+    obj.setncattr(key, value)
+
+def _clean_name(name):
+    """
+    Returns a valid netCDF attribute name
+    """
+    cleaned = ''.join(c if c.isalnum() or c == '_' else '_' for c in str(name).strip())
+    if not cleaned or not cleaned[0].isalpha():
+        cleaned = 'attr_' + cleaned
+    return cleaned
+
+def _is_sequence(value):
+    """
+    Returns True for lists and one dimensional arrays
+    """
+    return isinstance(value, list) or (isinstance(value, np.ndarray) and value.ndim == 1)
@@ -1,12 +1,22 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 #################
+import os
+import bz2
 import gzip
+import lzma
+import zipfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 
+from ..config import get_cache_settings
 from ..core.met import MET
+from ..core.smps import ParticleSizer
 from .csv_read import read_aim_csv, read_opc_csv, read_csv
 from .txt_read import read_aim_txt, read_opc_txt
 from .nc_read import read_mpl
+from .cache import load_cached, store_cached
+from ..util.ps_utils import concat
 #################
 """
 mypysmps.io.read
@@ -14,6 +24,7 @@ mypysmps.io.read
 
 Automatic reading of files by detecting format:
     read
+    read_many
     determine_filetype
     
 Created on Thu Jul 9 14:37 2020
@@ -24,6 +35,12 @@ Revision history:   09.07.2020 - Created
                     20.07.2020 - filetype added to allow for different
                     file organisations
                     30.09.2020 - metdata added
+                    18.10.2026 - parsed files are cached on disk
+                               - data can be memory mapped from the cache
+                               - read_many added
+                               - gzip, bz2, xz and zip files are read
+                                without decompressing them to disk
+                               - MET files return a MET object
 
 
 
@@ -43,7 +60,20 @@ def read(filename, fileorg = 'AIM', **kwargs):
     fileorg : str
         refers to the organisation of the file
         
-        
+    kwargs :
+        cache, bool : if True, the parsed file is kept in a binary cache
+            and read from it while the file does not change - DEFAULT: 
+            taken from config
+        cache_dir, str : cache directory - DEFAULT: taken from config
+        cache_size, int : maximum size of the cache in bytes - DEFAULT: 
+            taken from config
+        mmap_mode, str : if given ('r' or 'c'), the data fields are memory
+            mapped from the cache instead of being loaded into memory, so
+            that processes reading the same file share one copy - DEFAULT:
+            None
+        workers, int : number of processes parsing the members of a zip
+            archive - DEFAULT: number of processors
+        other kwargs are passed to the file reader
         
     Returns
     -------
@@ -51,21 +81,104 @@ def read(filename, fileorg = 'AIM', **kwargs):
         mysmps.core.smps object
         
     """
+    settings = get_cache_settings()
+    cache = kwargs.pop('cache', settings['enabled'])
+    cachekwargs = {'cache_dir': kwargs.pop('cache_dir', None),
+                   'cache_size': kwargs.pop('cache_size', None)}
+    mmap_mode = kwargs.pop('mmap_mode', None)
+    workers = kwargs.pop('workers', None)
+    
+    if cache and isinstance(filename, str) and os.path.isfile(filename) and kwargs.get('chunksize') is None:
+        smps = load_cached(filename, fileorg, cache_dir = cachekwargs['cache_dir'], mmap_mode = mmap_mode, **kwargs)
+        if smps is not None:
+            return smps
+        
+        smps = _read(filename, fileorg = fileorg, workers = workers, **kwargs)
+        if isinstance(smps, ParticleSizer):
+            stored = store_cached(smps, filename, fileorg, **cachekwargs, **kwargs)
+            if stored and mmap_mode is not None:
+                # map the cached copy instead of keeping a private one
+                smps = load_cached(filename, fileorg, cache_dir = cachekwargs['cache_dir'], mmap_mode = mmap_mode, **kwargs) or smps
+        return smps
+    
+    if mmap_mode is not None:
+        warnings.warn("mmap_mode requires the cache, data is loaded into memory")
+    
+    return _read(filename, fileorg = fileorg, workers = workers, **kwargs)
+
+
+def read_many(filenames, fileorg = 'AIM', workers = None, **kwargs):
+    """
+    Read several files of the same instrument in parallel and return
+    one SMPS object holding the data of all files
+    
+    Parameters
+    ----------
+    filenames : list of str
+        paths and names of files to read
+    
+    fileorg : str
+        refers to the organisation of the files
+        
+    workers : int
+        number of processes used to parse the files, if 1 the files are
+        read one after the other in this process - DEFAULT: number of 
+        processors
+        
+    kwargs :
+        message, bool : if True, overlapping data is reported - DEFAULT:
+            False
+        other kwargs are passed to read
+        
+    Returns
+    -------
+    smps : smps
+        mysmps.core.smps object, samples are ordered in time, where files
+        overlap the data of the later file is kept
+        
+    """
+    message = kwargs.pop('message', False)
+    filenames = list(filenames)
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(filenames))
+    
+    if workers <= 1:
+        pslist = [read(filename, fileorg = fileorg, **kwargs) for filename in filenames]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = [executor.submit(read, filename, fileorg, **kwargs) for filename in filenames]
+            pslist = [future.result() for future in futures]
+    
+    for filename, smps in zip(filenames, pslist):
+        if not isinstance(smps, ParticleSizer):
+            raise TypeError('File does not contain particle sizer data: ' + str(filename))
+    
+    return concat(pslist, fill_gaps = False, message = message)
+
+
+def _read(filename, fileorg = 'AIM', **kwargs):
+    """
+    Reads a file without using the cache, see read
+    """
     
     filetype = determine_filetype(filename)
     
-    # Gzip, uncompress and see if we can determine the type
-    if filetype == 'GZ':
-        gzfile = gzip.open(filename, 'rb')
-        try:
-            smps = read(gzfile, **kwargs)
-        except:
-            raise ValueError(
-                'Gzip file cannot be read compressed, '
-                'uncompress and try again')
-        finally:
-            gzfile.close()
-        return smps
+    # Compressed file, decompress while parsing
+    if filetype in _STREAMS:
+        name = _uncompressed_name(filename)
+        if kwargs.get('chunksize') is not None:
+            # the stream is kept open while chunks are read
+            return _iter_stream(filename, filetype, name, fileorg = fileorg, **kwargs)
+        with _STREAMS[filetype](filename, 'rb') as stream:
+            return _read_stream(stream, name, fileorg = fileorg, **kwargs)
+    
+    # Zip archive, parse every member
+    if filetype == 'ZIP':
+        return _read_zip(filename, fileorg = fileorg, **kwargs)
+    
+    kwargs.pop('workers', None)
     
     # CSV
     if filetype == 'CSV':
@@ -75,8 +188,8 @@ def read(filename, fileorg = 'AIM', **kwargs):
             return read_opc_csv(filename, fileorg = fileorg, **kwargs)
         elif fileorg == 'MET':
             vardict = read_csv(filename, fileorg = fileorg, **kwargs)
-            MET(**vardict)
-            
+            return MET(**vardict)
+
         else:
             try:
                 vardict = read_csv(filename, fileorg = fileorg, **kwargs)
@@ -99,6 +212,94 @@ def read(filename, fileorg = 'AIM', **kwargs):
 
         
     raise TypeError('Unknown or unsupported file format: ' + filetype)
+
+
+# decompression streams of compressed single files
+_STREAMS = {'GZ': gzip.open, 'BZ2': bz2.open, 'XZ': lzma.open}
+_COMPRESSED_EXTENSIONS = ('.gz', '.gzip', '.bz2', '.xz')
+
+def _read_stream(stream, name, fileorg = 'AIM', **kwargs):
+    """
+    Reads a decompressed stream, the type of the file is taken from
+    the extension of its name (i.e. 201124.csv)
+    """
+    kwargs.pop('workers', None)
+    ext = os.path.splitext(name)[1].lower()
+    
+    if ext in ('.csv', '.txt'):
+        if fileorg == 'AIM':
+            reader = read_aim_txt if ext == '.txt' else read_aim_csv
+            return reader(stream, fileorg = fileorg, **kwargs)
+        if fileorg == 'OPC':
+            kwargs.setdefault('name', name)
+            reader = read_opc_txt if ext == '.txt' else read_opc_csv
+            return reader(stream, fileorg = fileorg, **kwargs)
+        raise TypeError('Unknown or unsupported file organisation for compressed files: ' + fileorg)
+    
+    raise TypeError('Unknown or unsupported compressed file format: ' + name)
+
+def _iter_stream(filename, filetype, name, fileorg = 'AIM', **kwargs):
+    """
+    Reads a compressed file in chunks
+    """
+    with _STREAMS[filetype](filename, 'rb') as stream:
+        yield from _read_stream(stream, name, fileorg = fileorg, **kwargs)
+
+def _read_zip(filename, fileorg = 'AIM', **kwargs):
+    """
+    Reads every file in a zip archive, members are parsed in parallel
+    and combined into one object
+    """
+    workers = kwargs.pop('workers', None)
+    message = kwargs.get('message', False)
+    if kwargs.get('chunksize') is not None:
+        raise ValueError('zip archives can not be read in chunks')
+    
+    with zipfile.ZipFile(filename) as archive:
+        members = [info.filename for info in archive.infolist() 
+                   if not info.is_dir() and not info.filename.startswith('__MACOSX')]
+    if not members:
+        raise ValueError('Zip archive is empty: ' + str(filename))
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(members))
+    
+    if workers <= 1:
+        results = [_read_zip_member(filename, member, fileorg, **kwargs) for member in members]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = [executor.submit(_read_zip_member, filename, member, fileorg, **kwargs) for member in members]
+            results = [future.result() for future in futures]
+    
+    if len(results) == 1:
+        return results[0]
+    if all(isinstance(r, ParticleSizer) for r in results):
+        return concat(results, fill_gaps = False, message = message)
+    return dict(zip(members, results))
+
+def _read_zip_member(filename, member, fileorg, **kwargs):
+    """
+    Reads one member of a zip archive
+    """
+    with zipfile.ZipFile(filename) as archive:
+        with archive.open(member) as stream:
+            if _uncompressed_name(member) != member:
+                # compressed file inside the archive
+                filetype = determine_filetype(stream)
+                with _STREAMS[filetype](stream, 'rb') as inner:
+                    return _read_stream(inner, _uncompressed_name(member), fileorg = fileorg, **kwargs)
+            return _read_stream(stream, member, fileorg = fileorg, **kwargs)
+
+def _uncompressed_name(filename):
+    """
+    Returns the name of a compressed file without compression extension
+    """
+    name = str(getattr(filename, 'name', filename))
+    pre, ext = os.path.splitext(name)
+    if ext.lower() in _COMPRESSED_EXTENSIONS:
+        return pre
+    return name
     
     
 def determine_filetype(filename):
@@ -116,11 +317,14 @@ def determine_filetype(filename):
     * 'NETCDF4'
     * 'HDF4'
     * 'gzip'
+    * 'bzip2'
+    * 'xz'
+    * 'zip'
 
     Parameters
     ----------
-    filename : str
-        Name of file to examine.
+    filename : str or file object
+        Name of file to examine, or binary file object.
 
     Returns
     -------
@@ -136,8 +340,10 @@ def determine_filetype(filename):
         f.close()
     except TypeError:
         f = filename
-        begin = f.read(12)
-        f.seek(-12, 1)
+        begin = f.peek(12)[:12] if hasattr(f, 'peek') else f.read(12)
+        if not hasattr(f, 'peek'):
+            f.seek(-len(begin), 1)
+        filename = str(getattr(f, 'name', ''))
         
     # CSV - no file signature as far as I know
     csv_signature = "csv"
@@ -180,9 +386,19 @@ def determine_filetype(filename):
     if begin[:2] == gzip_signature:
         return 'GZ'
     
+    # bzip2 filetype
+    bz2_signature = b'BZh'
+    if begin[:3] == bz2_signature:
+        return 'BZ2'
+    
+    # xz filetype
+    xz_signature = b'\xfd7zXZ\x00'
+    if begin[:6] == xz_signature:
+        return 'XZ'
+    
     # zip filetype
-    zip_signature = b'PK\x03\x04\x14\x00\x08\x00\x08\x00\x84y'
-    if begin == zip_signature:
+    zip_signature = b'PK\x03\x04'
+    if begin[:4] == zip_signature:
         return 'ZIP'
     
     # Cannot determine filetype
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 #################
+import re
 import numpy as np
 import warnings
 
-from ..config import get_metadata, _DEFAULT_VARIABLES,  _FIELD_MAPPING, _CONVERSIONS
-from ..util.ps_utils import convert_units
+from ..config import get_variable, _DEFAULT_VARIABLES,  _FIELD_MAPPING, _CONVERSIONS
+from ..util.ps_utils import convert_units, OPCseconds
+from ..util.timeaxis import to_datetime64
+from .columnar import to_float
 from ..util.timetransform import TimeTransform
 tt = TimeTransform()
 
@@ -26,10 +29,27 @@ Revision history:   15.07.2020 - Created
                     20.07.2020 - Completed until working version
                     27.07.2020 - Resolved reading issues text files with exceptions
                     14.09.2020 - Added OPC reading
+                    18.10.2026 - smps_file_to_config takes typed columns
+                               - opc_file_to_config takes typed columns
+                               - columns which were not read are left out
+                               - variables are Variable instances sharing
+                        the metadata of the config file
+                               - grimm_file_to_config lists its data
+                        variables
+                               - file_to_config looks up mappings in
+                        both directions and converts numeric columns
+                               - opc_file_to_config builds the time axis
+                        (timestamp) without time and date strings
 
 
 """
 
+# file organisations of AIM exports, tried in turn for missing columns
+_AIM_ORGANISATIONS = ('AIM', 'AIM_text', 'AIM_csv')
+
+# OPC bin columns: bin0 ... bin23
+_OPC_BIN = re.compile(r'^bin\d+$')
+
 def smps_file_to_config(datadict, metadatadict, header, fileorg = 'AIM', **kwargs):
     """
     Unfortunately a rather long script that organises data read
@@ -58,263 +78,143 @@ def smps_file_to_config(datadict, metadatadict, header, fileorg = 'AIM', **kwarg
     """
 
     # date and time
-    date = get_metadata('date')
+    date = get_variable('date')
     date['data'] = datadict['Date']
 
-    time = get_metadata('time')
+    time = get_variable('time')
     time['data'] = datadict['Start Time']
 
 
     # data, sample and diameter variables
     field = {}
     datafield = _DEFAULT_VARIABLES[metadatadict['Units']][metadatadict['Weight']]
-    field[datafield] = get_metadata(datafield)
+    field[datafield] = get_variable(datafield)
     field['variables'] = [datafield]
 
-    sample = get_metadata('sample')
+    sample = get_variable('sample')
     data = []
 
     if 'Sample #' in header:   # diameters in header columns, samples in rows. Should be adjusted for different readers
         field['coordinates'] = ['diameter','sample']
-        diameter = get_metadata('diameter')
+        diameter = get_variable('diameter')
         diameterdata = []
 
         for item in header:
             try:
-                if isinstance( float(item), float):
-                    diameterdata.append(float(item))
-                    data.append([float(i) for i in datadict[item]])
+                diameterdata.append(float(item))
             except ValueError:
-                pass
+                continue
+            data.append(to_float(datadict[item]))
         diameter['data'] = diameterdata
-        field[datafield]['data'] = np.ma.asarray(data)
-        sample['data'] = [float(i) for i in datadict['Sample #']]
+        field[datafield]['data'] = np.ma.asarray(np.vstack(data))
+        sample['data'] = to_float(datadict['Sample #'])
 
         if 'Upper Size (nm)' in datadict.keys():
-            diameter['valid_max'] = np.max( [float(i) for i in datadict['Upper Size (nm)']] )
+            diameter['valid_max'] = np.max( to_float(datadict['Upper Size (nm)']) )
         if 'Lower Size (nm)' in datadict.keys():
-            diameter['valid_min'] = np.max( [float(i) for i in datadict['Lower Size (nm)']] )
+            diameter['valid_min'] = np.max( to_float(datadict['Lower Size (nm)']) )
 
     else:
         field['coordinates'] = ['sample', 'diameter']
         # TODO
 
 
-    variable = 'temperature'
-    temperature = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    temperature['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'pressure'
-    pressure = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    pressure['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'relative_humidity'
-    relative_humidity = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    relative_humidity['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'mean_free_path'
-    mean_free_path = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    mean_free_path['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'viscosity'
-    viscosity = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    viscosity['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'scan_time'
-    scan_time = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    scan_time['data'] =  [float(i) for i in datadict[filenaming]]
-
-    variable = 'retrace_time'
-    retrace_time = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    retrace_time['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'scan_resolution'
-    scan_resolution = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    scan_resolution['data'] =  [float(i) for i in datadict[filenaming]]
-
-    variable = 'scans_per_sample'
-    scans_per_sample = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    scans_per_sample['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'sheath_flow'
-    sheath_flow = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    sheath_flow['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'aerosol_flow'
-    aerosol_flow = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    aerosol_flow['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'bypass_flow'
-    bypass_flow = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    bypass_flow['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'low_voltage'
-    low_voltage = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    low_voltage['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'high_voltage'
-    high_voltage = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    high_voltage['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'lower_size'
-    lower_size = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    lower_size['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'upper_size'
-    upper_size = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    upper_size['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'density'
-    density = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    try:
-        density['data'] = [float(i) for i in datadict[filenaming]]
-    except KeyError:
-        if fileorg == 'AIM':
-            filenaming = _FIELD_MAPPING['AIM_text'][variable]
-            density['data'] = [float(i) for i in datadict[filenaming]]
-        elif fileorg == 'AIM_text':
-            filenaming = _FIELD_MAPPING['AIM'][variable]
-            density['data'] = [float(i) for i in datadict[filenaming]]
-        else:
-            warnings.warn("If reading fails, try a different file organisation")
-
-    variable = 'td+05'
-    td05 = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    td05['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'tf'
-    tf = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    tf['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'D50'
-    D50 = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    D50['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'neutralizer_status'
-    neutralizer_status = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
+    # sample attributes, None for columns which were not read (see the
+    # columns and fields options of read_aim_csv)
+
+    temperature = _smps_attribute(datadict, header, fileorg, 'temperature')
+    pressure = _smps_attribute(datadict, header, fileorg, 'pressure')
+    relative_humidity = _smps_attribute(datadict, header, fileorg, 'relative_humidity')
+    mean_free_path = _smps_attribute(datadict, header, fileorg, 'mean_free_path')
+    viscosity = _smps_attribute(datadict, header, fileorg, 'viscosity')
+    scan_time = _smps_attribute(datadict, header, fileorg, 'scan_time')
+    retrace_time = _smps_attribute(datadict, header, fileorg, 'retrace_time')
+    scan_resolution = _smps_attribute(datadict, header, fileorg, 'scan_resolution')
+    scans_per_sample = _smps_attribute(datadict, header, fileorg, 'scans_per_sample')
+    sheath_flow = _smps_attribute(datadict, header, fileorg, 'sheath_flow')
+    aerosol_flow = _smps_attribute(datadict, header, fileorg, 'aerosol_flow')
+    bypass_flow = _smps_attribute(datadict, header, fileorg, 'bypass_flow')
+    low_voltage = _smps_attribute(datadict, header, fileorg, 'low_voltage')
+    high_voltage = _smps_attribute(datadict, header, fileorg, 'high_voltage')
+    lower_size = _smps_attribute(datadict, header, fileorg, 'lower_size')
+    upper_size = _smps_attribute(datadict, header, fileorg, 'upper_size')
+    density = _smps_attribute(datadict, header, fileorg, 'density')
+    td05 = _smps_attribute(datadict, header, fileorg, 'td+05')
+    tf = _smps_attribute(datadict, header, fileorg, 'tf')
+    D50 = _smps_attribute(datadict, header, fileorg, 'D50')
+    neutralizer_status = _smps_attribute(datadict, header, fileorg, 'neutralizer_status', kind = 'any')
+    median = _smps_attribute(datadict, header, fileorg, 'median')
+    mean = _smps_attribute(datadict, header, fileorg, 'mean')
+    geo_mean = _smps_attribute(datadict, header, fileorg, 'geo_mean')
+    mode = _smps_attribute(datadict, header, fileorg, 'mode')
+    geo_std_dev = _smps_attribute(datadict, header, fileorg, 'geo_std_dev')
+    total_concentration = _smps_attribute(datadict, header, fileorg, 'total_concentration')
+    title = _smps_attribute(datadict, header, fileorg, 'title', kind = 'str')
+    user_name = _smps_attribute(datadict, header, fileorg, 'user_name', kind = 'str')
+    sample_id = _smps_attribute(datadict, header, fileorg, 'sample_id', kind = 'any')
+    instrument_id = _smps_attribute(datadict, header, fileorg, 'instrument_id', kind = 'str')
+    lab_id = _smps_attribute(datadict, header, fileorg, 'lab_id', kind = 'str')
+    leak_test_rate = _smps_attribute(datadict, header, fileorg, 'leak_test_rate', kind = 'any')
+    instrument_errors = _smps_attribute(datadict, header, fileorg, 'instrument_errors', kind = 'any')
+    comment = _smps_attribute(datadict, header, fileorg, 'comment', kind = 'str')
 
-    try:
-        neutralizer_status['data'] = [float(i) for i in datadict[filenaming]]
-    except ValueError:
-        neutralizer_status['data'] = datadict[filenaming]
-
-    variable = 'median'
-    median = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    median['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'mean'
-    mean = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    mean['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'geo_mean'
-    geo_mean = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    geo_mean['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'mode'
-    mode = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    mode['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'geo_std_dev'
-    geo_std_dev = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    geo_std_dev['data'] = [float(i) for i in datadict[filenaming]]
-
-    variable = 'total_concentration'
-    total_concentration = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    try:
-        total_concentration['data'] = [float(i) for i in datadict[filenaming]]
-    except KeyError:
-        if fileorg == 'AIM':
-            filenaming = _FIELD_MAPPING['AIM_text'][variable]
-            total_concentration['data'] = [float(i) for i in datadict[filenaming]]
-        elif fileorg == 'AIM_text':
-            filenaming = _FIELD_MAPPING['AIM'][variable]
-            total_concentration['data'] = [float(i) for i in datadict[filenaming]]
-        else:
-            warnings.warn("If reading fails, try a different file organisation")
-
-    variable = 'title'
-    title = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    title['data'] = datadict[filenaming]
-
-    variable = 'user_name'
-    user_name = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    user_name['data'] = datadict[filenaming]
-
-    variable = 'sample_id'
-    sample_id = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    try:
-        sample_id['data'] = [float(i) for i in datadict[filenaming]]
-    except ValueError:
-        sample_id['data'] = datadict[filenaming]
+    return field, diameter, date, time, sample, temperature, pressure, relative_humidity, mean_free_path, viscosity, scan_time, retrace_time, scan_resolution, scans_per_sample, sheath_flow, aerosol_flow, bypass_flow, low_voltage, high_voltage, lower_size, upper_size, density, td05, tf, D50, median, mean, geo_mean, mode, geo_std_dev, total_concentration, title, user_name, sample_id, instrument_id, lab_id, leak_test_rate, instrument_errors, comment
 
-    variable = 'instrument_id'
-    instrument_id = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    try:
-        instrument_id['data'] = datadict[filenaming]
-    except ValueError:
-        instrument_id['data'] = [float(i) for i in datadict[filenaming]]
+def _smps_attribute(datadict, header, fileorg, variable, kind = 'float'):
+    """
+    Returns the metadata dictionary of an SMPS sample attribute with the
+    data of its column
 
-    variable = 'lab_id'
-    lab_id = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    try:
-        lab_id['data'] = datadict[filenaming]
-    except ValueError:
-        lab_id['data'] = [float(i) for i in datadict[filenaming]]
+    Parameters
+    ----------
+    datadict : dict
+        dictionary with data read from file
 
-    variable = 'leak_test_rate'
-    leak_test_rate = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    try:
-        leak_test_rate['data'] = [float(i) for i in datadict[filenaming]]
-    except ValueError:
-        leak_test_rate['data'] = datadict[filenaming]
+    header : list
+        file header
 
-    variable = 'instrument_errors'
-    instrument_errors = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    try:
-        instrument_errors['data'] =  [float(i) for i in datadict[filenaming]]
-    except ValueError:
-        instrument_errors['data'] =  datadict[filenaming]
+    fileorg : str
+        organisation of the file, if the column is not found the names
+        of the other AIM organisations are tried
 
-    variable = 'comment'
-    comment = get_metadata(variable)
-    filenaming =  _FIELD_MAPPING[fileorg][variable]
-    comment['data'] = datadict[filenaming]
+    variable : str
+        name of the attribute
 
-    return field, diameter, date, time, sample, temperature, pressure, relative_humidity, mean_free_path, viscosity, scan_time, retrace_time, scan_resolution, scans_per_sample, sheath_flow, aerosol_flow, bypass_flow, low_voltage, high_voltage, lower_size, upper_size, density, td05, tf, D50, median, mean, geo_mean, mode, geo_std_dev, total_concentration, title, user_name, sample_id, instrument_id, lab_id, leak_test_rate, instrument_errors, comment
+    kind : str
+        'float' for numeric columns, 'str' for text columns, 'any' for
+        columns which are numeric if possible
+
+    Returns
+    -------
+    attribute : dict or None
+        metadata dictionary, None if the column is in the header but was
+        not read
+    """
+    attribute = get_variable(variable)
+
+    names = [_FIELD_MAPPING[fileorg][variable]]
+    for org in _AIM_ORGANISATIONS:
+        name = _FIELD_MAPPING[org].get(variable)
+        if name is not None and name not in names:
+            names.append(name)
+
+    for filenaming in names:
+        if filenaming in datadict:
+            break
+    else:
+        if any(name in header for name in names):
+            return None
+        raise KeyError(names[0])
+
+    column = datadict[filenaming]
+    if kind == 'float':
+        attribute['data'] = to_float(column)
+    elif kind == 'any':
+        attribute['data'] = to_float(column, strict = False)
+    else:
+        attribute['data'] = column
+
+    return attribute
 
 def opc_file_to_config(datadict, metadatadict, header, fileorg = 'OPC', **kwargs):
     """
@@ -335,6 +235,9 @@ def opc_file_to_config(datadict, metadatadict, header, fileorg = 'OPC', **kwargs
     fileorg : str
         organisation of the file
 
+    kwargs :
+        sample_offset, int : number of the first sample - DEFAULT: 0
+
     Returns
     -------
     metadatadictionaries : dict
@@ -342,6 +245,8 @@ def opc_file_to_config(datadict, metadatadict, header, fileorg = 'OPC', **kwargs
 
 
     """
+    sample_offset = kwargs.get('sample_offset', 0)
+
     # get conversions dict if exists
     if fileorg in _CONVERSIONS:
         convdict = _CONVERSIONS[fileorg]
@@ -349,62 +254,78 @@ def opc_file_to_config(datadict, metadatadict, header, fileorg = 'OPC', **kwargs
     else:
         convvars = []
     outdict = {}
+    bins = []
+    times = {}
 
     #variables = ['time','duration','latitude','longitude','fix_time', 'temperature','relative_humidity']
     variables = header
     for variable in variables:
-        if 'bin' in variable:
-            pass
-        else:
-            filenaming =  _FIELD_MAPPING[fileorg][variable]
-
-        outdict[filenaming] = get_metadata(filenaming)
-        try:
-            _ = datadict[variable]
-            if filenaming == 'time' or filenaming == 'date':
-                # prevent time from being converted into a float
-                outdict[filenaming]['data'] = [i for i in datadict[variable]]
-            else:
-                try:
-                    outdict[filenaming]['data'] = [float(i) for i in datadict[variable]]
-                except ValueError:
-                    outdict[filenaming]['data'] = [i for i in datadict[variable]]
-            if filenaming in convvars:
-                    outdict[filenaming]['data'] = convert_units(outdict[filenaming]['data'], *convdict[filenaming])
-        except KeyError:
-            pass
-
-    diameter = get_metadata('diameter')
+        if _OPC_BIN.match(variable):
+            bins.append(variable)
+            continue
+        if variable not in datadict:
+            continue
+
+        filenaming =  _FIELD_MAPPING[fileorg].get(variable, variable)
+        outdict[filenaming] = get_variable(filenaming)
+
+        data = datadict[variable]
+        if filenaming in ('time', 'date'):
+            # time axis, see below
+            times[filenaming] = data
+            continue
+        data = to_float(data, strict = False)
+        if filenaming in convvars:
+            data = convert_units(data, *convdict[filenaming])
+        outdict[filenaming]['data'] = data
+
+    diameter = get_variable('diameter')
     diameter['data'] = [0.35, 0.46, 0.66, 1.0, 1.3, 1.7, 2.3, 3.0, 4.0, 5.2, 6.5, 8.0, 10.0, 12.0, 14.0, 16.0, 18.0, 20.0, 22.0, 25.0, 28.0, 31.0, 34.0, 37.0, 40.0]
 
-    bins = ["bin0", "bin1", "bin2", "bin3", "bin4", "bin5", "bin6", "bin7", "bin8", "bin9", "bin10", "bin11", "bin12", "bin13", "bin14", "bin15", "bin16", "bin17", "bin18", "bin19", "bin20", "bin21", "bin22", "bin23"]
-
-    data = []
-    for abin in bins:
-        data.append([float(i) for i in datadict[abin]])
-
-    #data = []
-    #for abin in bins:
-    #    for i in range(0,len(datadict[abin])):
-    #        try:
-    #            data.append(float(datadict[abin][i]))
-    #        except ValueError:
-    #            print(i)
+    if not bins:
+        bins = ["bin%d"%(i) for i in range(len(diameter['data'])-1)]
 
     field = {}
     datafield = _DEFAULT_VARIABLES['Raw Counts']['Number']
-    field[datafield] = get_metadata(datafield)
-    field[datafield]['data'] = np.ma.asarray(data)
+    field[datafield] = get_variable(datafield)
+    field[datafield]['data'] = np.ma.asarray(np.vstack([to_float(datadict[abin]) for abin in bins]))
     field['coordinates'] = ['diameter','sample']
     field['variables'] = [datafield]
 
+    if 'time' in times and 'date' in times:
+        # time axis from the day and the seconds since midnight, the time
+        # and date strings are only formatted when they are used
+        timestamp = _opc_day_column(times['date']) + OPCseconds(times['time']).astype('timedelta64[s]')
+        outdict['timestamp'] = get_variable('timestamp', data = timestamp.astype('datetime64[ns]'))
+        del outdict['date']
+    else:
+        for name, data in times.items():
+            if isinstance(data, np.ndarray) and data.dtype.kind == 'M':
+                data = [day.replace('-', '') for day in np.datetime_as_string(data, unit = 'D')]
+            elif name == 'date' and isinstance(data, np.ndarray):
+                # prevent date from being converted into a float
+                data = data.astype(np.int64).astype(str).tolist()
+            if name in convvars:
+                data = convert_units(data, *convdict[name])
+            outdict[name]['data'] = data
+
     time = outdict.pop('time')
 
-    sample = get_metadata('sample')
-    sample['data'] = np.arange(0,len(time['data']))
+    sample = get_variable('sample')
+    sample['data'] = np.arange(sample_offset, sample_offset + len(field[datafield]['data'][0]))
 
     return time, sample, field, diameter, outdict
 
+def _opc_day_column(data):
+    """
+    Returns the day of each OPC sample as numpy.datetime64[D], from the
+    days dated from the file name or from a date column (%Y%m%d)
+    """
+    if isinstance(data, np.ndarray) and data.dtype.kind == 'M':
+        return data.astype('datetime64[D]')
+    days = ['%08d'%(d) for d in to_float(data).astype(np.int64)]
+    return to_datetime64(days, '%Y%m%d').astype('datetime64[D]')
+
 def grimm_file_to_config(datadict, metadatadict, header, fileorg = 'Grimm', **kwargs):
     """
     Organises data read from file into metadata dictionaries
@@ -437,7 +358,7 @@ def grimm_file_to_config(datadict, metadatadict, header, fileorg = 'Grimm', **kw
         convvars = list(convdict.keys())
 
     outdict = {}
-    diameter = get_metadata('diameter')
+    diameter = get_variable('diameter')
     diameter['data'] = [0.0] #GRIMM does not have a lower limit
     bins = []
 
@@ -447,11 +368,14 @@ def grimm_file_to_config(datadict, metadatadict, header, fileorg = 'Grimm', **kw
             diameter['data'].append(float(variable))
             bins.append(variable)
         except ValueError:
+            if variable not in datadict:
+                # column not read
+                continue
             try:
                 filenaming =  _FIELD_MAPPING[fileorg][variable]
             except KeyError:
                 filenaming = variable
-            outdict[filenaming] = get_metadata(filenaming)
+            outdict[filenaming] = get_variable(filenaming)
             try:
                 _ = datadict[variable]
                 try:
@@ -471,10 +395,11 @@ def grimm_file_to_config(datadict, metadatadict, header, fileorg = 'Grimm', **kw
 
     field = {}
     datafield = _DEFAULT_VARIABLES['Concentration (DW)']['Number']
-    field[datafield] = get_metadata(datafield)
+    field[datafield] = get_variable(datafield)
     field[datafield]['data'] = np.ma.asarray(data)
     field['units'] = '#/L'
     field['coordinates'] = ['diameter','sample']
+    field['variables'] = [datafield]
 
 
     try:
@@ -482,7 +407,7 @@ def grimm_file_to_config(datadict, metadatadict, header, fileorg = 'Grimm', **kw
     except KeyError:
         time = outdict.pop('datetime')
 
-    sample = get_metadata('sample')
+    sample = get_variable('sample')
     sample['data'] = np.arange(0,len(time['data']))
 
     return time, sample, field, diameter, outdict
@@ -514,15 +439,21 @@ def file_to_config(datadict, metadatadict, header, fileorg, **kwargs):
     """
     outdict = {}
 
+    # field mappings are organised file name to variable name or variable
+    # name to file name, columns which are not mapped keep their name
+    mapping = (_FIELD_MAPPING.get(fileorg) or {}) if fileorg is not None else {}
+    inverse = {column: name for name, column in mapping.items() if isinstance(column, str)}
+
     variable_list = list(datadict.keys())
     for variable in variable_list:
-        if fileorg is not None:
-            varname = _FIELD_MAPPING[fileorg][variable]
-        else:
-            varname = variable
+        varname = mapping.get(variable) or inverse.get(variable, variable)
+
+        data = datadict[variable]
+        if varname not in ('time', 'date', 'datetime'):
+            data = to_float(data, strict = False)
 
-        vardict = get_metadata(varname)
-        vardict['data'] = datadict[variable]
+        vardict = get_variable(varname)
+        vardict['data'] = data
         outdict[varname] = vardict
 
     return outdict
@@ -1,12 +1,11 @@
 # -*- coding: utf-8 -*-
 #################
-import os
 import numpy as np
 #import pandas as pd
 import csv
 from csv import reader
 
-from .csv_read import read_aim_csv
+from .csv_read import read_aim_csv, read_opc_csv
 #################
 
 """
@@ -23,6 +22,8 @@ Created on Thu Jul 24 11:22 2020
 
 Revision history:   24.07.2020 - Created
                     14.09.2020 - read_opc_txt added
+                    18.10.2026 - files are parsed in place instead of
+                                being renamed to csv
 
 
 """
@@ -33,8 +34,8 @@ def read_aim_txt(filename, fileorg = 'AIM', **kwargs):
     
     Parameters
     ----------
-    filename : str
-        path and name of file to read
+    filename : str or file object
+        path and name of file to read, or binary file object
         
     fileorg : str
         different file organisations can be found in the default_config
@@ -50,15 +51,12 @@ def read_aim_txt(filename, fileorg = 'AIM', **kwargs):
     smps : smps
         mysmps.core.smps object
     """
-    # rename file into csv file
+    # the text file is organised as a csv file, the file
+    # itself is left untouched
     
-    pre, ext = os.path.splitext(filename)
-    newfilename = pre + '.csv'
-    os.rename(filename, newfilename)    
+    kwargs.setdefault('encoding', 'iso8859_15')
     
-    # pass to csv reader
-    
-    SMPS = read_aim_csv(newfilename, fileorg, encoding = 'iso8859_15', **kwargs)
+    SMPS = read_aim_csv(filename, fileorg, **kwargs)
     
     return SMPS
 
@@ -68,8 +66,8 @@ def read_opc_txt(filename, fileorg = 'OPC', **kwargs):
     
     Parameters
     ----------
-    filename : str
-        path and name of file to read
+    filename : str or file object
+        path and name of file to read, or binary file object
         
     fileorg : str
         different file organisations can be found in the default_config
@@ -85,17 +83,12 @@ def read_opc_txt(filename, fileorg = 'OPC', **kwargs):
     smps : smps
         mysmps.core.smps object
     """
-    # rename file into csv file
-    
-    pre, ext = os.path.splitext(filename)
-    newfilename = pre + '.csv'
-    os.rename(filename, newfilename)    
+    # the text file is organised as a csv file, the file
+    # itself is left untouched
     
-    # pass to csv reader
+    SMPS = read_opc_csv(filename, fileorg, **kwargs)
     
-    #SMPS = read_aim_csv(newfilename, fileorg, encoding = 'iso8859_15', **kwargs)
-    
-    #return SMPS
+    return SMPS
 
 
     
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#################
+import numpy as np
+#################
+
+"""
+mysmps.util.bins
+================
+
+Geometry of the size bins of a particle sizer:
+    BinGeometry
+    bins_from_edges
+    bins_from_channels
+    bins_from_diameters
+
+Created on Sun Oct 18 21:00 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+
+class BinGeometry(object):
+    """
+    Edges, midpoints and widths of the size bins (channels) of a particle
+    sizer. All values are arrays with one value per channel, except edges
+
+    Parameters
+    ----------
+    lower : numpy.ndarray
+        lower edge of each bin
+
+    upper : numpy.ndarray
+        upper edge of each bin
+
+    diameters : numpy.ndarray
+        nominal diameter of each bin - DEFAULT: the midpoints
+
+    Attributes
+    ----------
+    edges : numpy.ndarray
+        lower edges and the upper edge of the last bin
+
+    midpoints : numpy.ndarray
+        geometric mean of the edges of each bin, the arithmetic mean for
+        bins starting at 0
+
+    widths : numpy.ndarray
+        upper minus lower edge
+
+    dlogdp : numpy.ndarray
+        log10(upper / lower), the width of each bin in log space
+    """
+    ## ------------------------------------------------------------------ ##
+    ## Constructors/Destructors                                           ##
+    ## ------------------------------------------------------------------ ##
+
+    def __init__(self, lower, upper, diameters = None):
+        self.lower = np.asarray(lower, dtype = float)
+        self.upper = np.asarray(upper, dtype = float)
+
+        self.edges = np.append(self.lower, self.upper[-1:])
+        self.widths = self.upper - self.lower
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            self.midpoints = np.where(self.lower > 0, np.sqrt(self.lower * self.upper), (self.lower + self.upper) / 2.)
+            self.dlogdp = np.log10(self.upper / self.lower)
+
+        self.diameters = self.midpoints if diameters is None else np.asarray(diameters, dtype = float)
+
+        for values in (self.lower, self.upper, self.diameters, self.edges, self.widths, self.midpoints, self.dlogdp):
+            values.flags.writeable = False
+
+    def __del__(self):
+        pass
+
+    def __len__(self):
+        return len(self.lower)
+
+    ## ------------------------------------------------------------------ ##
+    ## Methods                                                            ##
+    ## ------------------------------------------------------------------ ##
+
+    # public:
+
+    def normalise(self, values):
+        """
+        Divides values per bin (i.e. dN) by dlogDp (i.e. into dN/dlogDp)
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            (diameter, sample) array
+
+        Returns
+        -------
+        normalised : numpy.ndarray
+            values / dlogDp
+        """
+        return values / self.dlogdp[:np.shape(values)[0], None]
+
+    def denormalise(self, values):
+        """
+        Multiplies values normalised by dlogDp (i.e. dN/dlogDp) by dlogDp
+        (i.e. into dN)
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            (diameter, sample) array
+
+        Returns
+        -------
+        denormalised : numpy.ndarray
+            values * dlogDp
+        """
+        return values * self.dlogdp[:np.shape(values)[0], None]
+
+
+def bins_from_edges(edges):
+    """
+    Returns the geometry of bins given by their edges (i.e. OPC)
+
+    Parameters
+    ----------
+    edges : list or numpy.ndarray
+        n + 1 edges of n bins
+
+    Returns
+    -------
+    geometry : BinGeometry
+    """
+    edges = np.asarray(edges, dtype = float)
+    return BinGeometry(edges[:-1], edges[1:])
+
+def bins_from_channels(diameters, channels_per_decade, dmin, dmax):
+    """
+    Returns the geometry of bins of equal width in log space, as the
+    channels of an SMPS scan. The first bin starts at dmin, each bin is
+    1 / channels_per_decade decades wide and the last bin ends at dmax
+
+    Parameters
+    ----------
+    diameters : list or numpy.ndarray
+        nominal diameter of each channel
+
+    channels_per_decade : float
+        number of channels per decade
+
+    dmin : float
+        lower size limit of the instrument
+
+    dmax : float
+        upper size limit of the instrument
+
+    Returns
+    -------
+    geometry : BinGeometry
+    """
+    diameters = np.asarray(diameters, dtype = float)
+    lower = np.round(dmin * 10**(np.arange(len(diameters)) / float(channels_per_decade)), 4)
+    upper = np.append(lower[1:], dmax)
+    return BinGeometry(lower, upper, diameters)
+
+def bins_from_diameters(diameters, upper = None):
+    """
+    Returns the geometry of bins around nominal diameters, the edges are
+    the geometric means of neighbouring diameters
+
+    Parameters
+    ----------
+    diameters : list or numpy.ndarray
+        nominal diameter of each bin, at least two
+
+    upper : float
+        upper edge of the last bin - DEFAULT: extrapolated in log space
+
+    Returns
+    -------
+    geometry : BinGeometry
+    """
+    diameters = np.asarray(diameters, dtype = float)
+    inner = np.sqrt(diameters[:-1] * diameters[1:])
+    first = diameters[0]**2 / inner[0]
+    last = diameters[-1]**2 / inner[-1] if upper is None else upper
+    return BinGeometry(np.append(first, inner), np.append(inner, last), diameters)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#################
+import numpy as np
+#################
+
+"""
+mysmps.util.moments
+===================
+
+Integral properties of particle size distributions:
+    size_moments
+
+All samples are computed together from the (diameter, sample) matrix of
+the number concentration in each size bin.
+
+Created on Sun Oct 18 21:40 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# conversion of density [g/cm3] x volume concentration [unit3/cm3]
+# into mass concentration [ug/m3] for diameters in nm and um
+_MASS_FACTOR = {'nm': 1e-9, 'um': 1.0}
+
+def size_moments(dn, geometry, density = 1.0, diameter_units = 'nm'):
+    """
+    Computes number, surface, volume and mass concentration and the
+    statistical diameters of every sample of a size distribution
+
+    Parameters
+    ----------
+    dn : numpy.ndarray or numpy.ma.MaskedArray
+        (diameter, sample) number concentration in each bin [#/cm3],
+        masked and not finite values count as empty bins
+
+    geometry : BinGeometry
+        geometry of the size bins
+
+    density : float or numpy.ndarray
+        particle density [g/cm3], a single value or one per sample
+
+    diameter_units : str
+        units of the diameters of the bins, 'nm' or 'um'
+
+    Returns
+    -------
+    moments : dict
+        arrays with one value per sample, masked where a sample has no
+        particles:
+        total_concentration [#/cm3], total_surface_concentration
+        [unit2/cm3], total_volume_concentration [unit3/cm3],
+        total_mass_concentration [ug/m3], mean, geo_mean (geometric mean
+        diameter), geo_std_dev (geometric standard deviation), median
+        (count median diameter) and mode (diameter of the largest
+        dN/dlogDp)
+    """
+    if diameter_units not in _MASS_FACTOR:
+        raise ValueError( ("diameter_units must be 'nm' or 'um', not %s")%(diameter_units) )
+
+    dn = np.ma.masked_invalid(np.ma.asarray(dn, dtype = float))
+    empty = np.ma.getmaskarray(dn).all(axis = 0)
+    dn = np.ma.filled(dn, 0.0)
+
+    nrows = dn.shape[0]
+    d = geometry.diameters[:nrows, None]
+    lower = geometry.lower[:nrows, None]
+    upper = geometry.upper[:nrows, None]
+    dlogdp = geometry.dlogdp[:nrows, None]
+
+    moments = {}
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        # integral moments
+        n = dn.sum(axis = 0)
+        moments['total_concentration'] = n
+        moments['total_surface_concentration'] = np.pi * (dn * d**2).sum(axis = 0)
+        volume = np.pi / 6. * (dn * d**3).sum(axis = 0)
+        moments['total_volume_concentration'] = volume
+        moments['total_mass_concentration'] = np.asarray(density, dtype = float) * volume * _MASS_FACTOR[diameter_units]
+
+        # diameter statistics
+        lnd = np.log(d)
+        moments['mean'] = (dn * d).sum(axis = 0) / n
+        lngm = (dn * lnd).sum(axis = 0) / n
+        moments['geo_mean'] = np.exp(lngm)
+        moments['geo_std_dev'] = np.exp(np.sqrt((dn * (lnd - lngm)**2).sum(axis = 0) / n))
+        moments['mode'] = d[np.argmax(np.where(np.isfinite(dlogdp) & (dlogdp > 0), dn / dlogdp, 0.0), axis = 0), 0]
+
+        # count median diameter, interpolated in log space in the bin
+        # where the cumulative concentration reaches half of the total
+        cumulative = np.cumsum(dn, axis = 0)
+        idx = np.argmax(cumulative >= n / 2., axis = 0)[None, :]
+        binned = np.take_along_axis(dn, idx, axis = 0)[0]
+        before = np.take_along_axis(cumulative, idx, axis = 0)[0] - binned
+        fraction = np.clip((n / 2. - before) / binned, 0., 1.)
+        loglower = np.log(np.where(lower > 0, lower, d))[idx[0], 0]
+        logupper = np.log(upper)[idx[0], 0]
+        moments['median'] = np.exp(loglower + fraction * (logupper - loglower))
+
+    invalid = empty | ~(n > 0)
+    for name, values in moments.items():
+        moments[name] = np.ma.masked_where(invalid | ~np.isfinite(values), values)
+    return moments
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 #################
+import warnings
 import numpy as np
 import datetime as dt
 import copy
 
 from .basic import conversion
 from .timetransform import TimeTransform
+from .timeaxis import to_datetime64, format_datetime64
+from ..core.variable import DerivedVariable
 tt = TimeTransform()
 #################
 
@@ -14,6 +17,9 @@ mysmps.util.stack_ps
 ==================
 
 Functions for working with particle sizer instances
+    stack_ps
+    concat
+    convert_units
     
 
 Created on Tue Sep 22 13:56 2020
@@ -24,6 +30,16 @@ Revision history:   22.09.2020 - Created
                                - stack_ps added
                     23.09.2020 - stacking finished, added fill_time to stack_ps 
                                 debugging of stack_ps (sample problem)
+                    18.10.2026 - OPCtimetransform and temporal conversions
+                                are vectorized
+                               - concat added
+                               - instances are ordered and cut on their
+                                datetime64 time axis
+                               - concat keeps Variable attributes
+                               - concat resolves overlaps of any
+                                number of instances, fills gaps and
+                                keeps bin edges, stack_ps uses concat
+                               - convert_units accepts empty data
                 
 """
 
@@ -59,244 +75,342 @@ def stack_ps(ps1, ps2, keep_unique = False, fill_time = False, message = True):
     new_ps : ParticleSizer
         mypysmps.core.smps.ParticleSizer object with
         data from both input objects
+        
+    See Also
+    --------
+    concat
+    """
+    return concat([ps1, ps2], overlap = 'prefer_later', fill_gaps = fill_time, keep_unique = keep_unique, message = message)
+
+def concat(pslist, overlap = 'prefer_later', fill_gaps = True, keep_unique = False, message = False):
+    """
+    Combine any number of particle sizer instances into one.
+    Instances are ordered by their time ranges and every field of the
+    result is allocated once, the samples of each instance are copied
+    into it with slice assignment. The input instances are not changed.
+    
+    Parameters
+    ----------
+    pslist : list of ParticleSizer
+        mypysmps.core.smps.ParticleSizer objects, the samples of each
+        instance are expected in time order
+        
+    overlap : str
+        where instances overlap in time, 'prefer_later' keeps the data of
+        the instance starting later, 'prefer_earlier' the data of the
+        instance starting earlier, 'error' raises a ValueError
+        
+    fill_gaps : bool
+        if set to True, time gaps longer than 1.5 times the resolution
+        between instances are filled with masked samples (NaN for
+        numeric attributes) at the resolution of the earlier instance,
+        so that the result has a regular time axis - DEFAULT: True
+        
+    keep_unique : bool
+        if set to True, attributes and fields which are present in some
+        instances only are kept (masked for the other instances), if
+        False, only those common to all instances are preserved
+        
+    message : bool
+        if set to True, helpful warning messages will
+        be printed
+        
+    Returns
+    -------
+    new_ps : ParticleSizer
+        mypysmps.core.smps.ParticleSizer object with
+        data from all input objects
     """
-    # create deepcopies to avoid changing original instances
+    if overlap not in _OVERLAP:
+        raise ValueError( ('overlap must be one of %s, not %s')%(', '.join(_OVERLAP), overlap) )
+    
+    pslist = [ps for ps in pslist if len(ps.sample['data']) > 0]
+    if len(pslist) == 0:
+        raise ValueError('no particle sizer data to combine')
+    
+    # order instances by their time ranges
+    
+    times = [_time_axis(ps) for ps in pslist]
+    order = sorted(range(len(pslist)), key = lambda k: (times[k][0], times[k][-1]))
+    pslist = [pslist[k] for k in order]
+    times = [times[k] for k in order]
     
-    ps1 = copy.deepcopy(ps1)
-    ps2 = copy.deepcopy(ps2)
+    # samples kept of each instance, as (instance, start, stop) segments
     
-    # create datetime information in PS instances
+    segments = _segments(times, overlap, message)
     
-    try:
-        _ = getattr(ps1, "datetime")
-    except AttributeError:
-        ps1.createTimeDate()
+    # gaps between segments, filled with samples at the resolution of
+    # the earlier instance
+    
+    gaps = [None] * len(segments)
+    if fill_gaps:
+        for i, (seg, nextseg) in enumerate(zip(segments[:-1], segments[1:])):
+            gaps[i] = _gap_times(times[seg[0]], times[seg[0]][seg[2] - 1], times[nextseg[0]][nextseg[1]])
+            if gaps[i] is not None and message:
+                print( ("time gap filled with %d samples")%(len(gaps[i])) )
+    
+    # position of each segment and gap in the result
+    
+    parts = []
+    total = 0
+    for seg, gap in zip(segments, gaps):
+        parts.append((seg, total))
+        total += seg[2] - seg[1]
+        if gap is not None:
+            parts.append((gap, total))
+            total += len(gap)
+    
+    first = pslist[0]
+    
+    # common diameters, bin edges (n + 1 diameters for n rows) are kept
+    
+    coordinates = list(first.data.get('coordinates', ['diameter', 'sample']))
+    grids = [_diameter_grid(ps) for ps in pslist]
+    edges = all(grid[1] for grid in grids)
+    if edges:
+        diamlist = np.unique(np.concatenate([grid[0] for grid in grids]))
+        nrows = len(diamlist) - 1
+    else:
+        diamlist = np.unique(np.concatenate([grid[0][:grid[2]] for grid in grids]))
+        nrows = len(diamlist)
+    rows = [_rows(np.searchsorted(diamlist, grid[0][:grid[2]])) for grid in grids]
+    
+    # attributes and fields to combine
+    
+    if keep_unique:
+        names = _union([ps._sample_attributes() for ps in pslist])
+        variables = _union([ps.data['variables'] for ps in pslist])
+    else:
+        names = [name for name in first._sample_attributes() if all(name in ps._sample_attributes() for ps in pslist[1:])]
+        variables = [var for var in first.data['variables'] if all(var in ps.data['variables'] for ps in pslist[1:])]
+    names = [name for name in names if name not in ('timestamp', 'sample', 'diameter')]
+    
+    new_ps = copy.copy(first)
+    if keep_unique:
+        for ps in pslist[1:]:
+            for name, value in ps.__getstate__().items():
+                if name not in new_ps.__dict__:
+                    new_ps.__dict__[name] = value
+    else:
+        for name in first.__dict__:
+            if any(name not in ps.__dict__ for ps in pslist[1:]):
+                delattr(new_ps, name)
+    
+    for name in names:
+        owner = next(ps for ps in pslist if name in ps.__dict__)
+        afield = owner.__dict__[name].copy()
+        afield['data'] = _combine([ps.__dict__[name]['data'] if name in ps.__dict__ else None for ps in pslist], parts, total)
+        setattr(new_ps, name, afield)
+    
+    new_ps.timestamp = first.timestamp.copy()
+    new_ps.timestamp['data'] = _combine(times, parts, total, fill = times)
+    
+    # data fields
+    
+    data = {key: copy.copy(value) for key, value in first.data.items() if key not in first.data['variables']}
+    data['variables'] = variables
+    
+    for var in variables:
+        owner = next(ps for ps in pslist if var in ps.data['variables'])
+        if isinstance(owner.data[var], DerivedVariable):
+            # computed from the combined dependencies when used
+            data[var] = owner.data[var].bind(new_ps)
+            continue
         
-    try: 
-        _ = getattr(ps2, "datetime")
-    except AttributeError:
-        ps2.createTimeDate()
+        fields = [ps.data[var]['data'] if var in ps.data['variables'] else None for ps in pslist]
+        if coordinates[0] != 'diameter':
+            fields = [None if f is None else f.T for f in fields]
         
-    # check time resolutions
-    res1 = (dt.datetime.strptime(ps1.datetime['data'][1], ps1.datetime['units']) - dt.datetime.strptime(ps1.datetime['data'][0], ps1.datetime['units'])).seconds
-    res2 = (dt.datetime.strptime(ps2.datetime['data'][1], ps2.datetime['units']) - dt.datetime.strptime(ps2.datetime['data'][0], ps2.datetime['units'])).seconds
-    
-    if abs(res1-res2) > 60:
-        if message:
-            print( ("warning: resolutions differ %d seconds")%(abs(res1-res2)) )
-         
-    # check if ps1 is "older" than ps2
-    
-    reversed_order = False
-    cut = None
-    
-    if dt.datetime.strptime(ps1.datetime['data'][-1], ps1.datetime['units']) < dt.datetime.strptime(ps2.datetime['data'][0], ps2.datetime['units']):
-        # ps2 starts after ps1 ends
-        timediff = (dt.datetime.strptime(ps2.datetime['data'][0], ps2.datetime['units']) - dt.datetime.strptime(ps1.datetime['data'][-1], ps1.datetime['units'])).total_seconds()
-    elif dt.datetime.strptime(ps2.datetime['data'][-1], ps2.datetime['units']) < dt.datetime.strptime(ps1.datetime['data'][0], ps1.datetime['units']):
-        # ps1 starts after ps2 ends (user has inadvertently switched the order of the instances)
-        reversed_order = True
-        timediff = (dt.datetime.strptime(ps1.datetime['data'][0], ps1.datetime['units']) - dt.datetime.strptime(ps2.datetime['data'][-1], ps2.datetime['units'])).total_seconds()
-    else:
-        # yikes! The particle sizer instances have overlapping data
-        # it is assumed that ps2 data replaces ps1 data starting 
-        # from the overlapping time
-        cut, cutdate = tt.findNearestDate(ps1.datetime['data'], ps2.datetime['data'][0])   
-        fill_time = False
+        complete = (all(f is not None and not np.ma.is_masked(f) for f in fields) and
+                    all(isinstance(r, slice) and r == slice(0, nrows) for r in rows) and
+                    total == sum(seg[2] - seg[1] for seg in segments))
         
-    #print(timediff, 1.5*res1)
-    # check if filling is required
-    if fill_time is True:
-        # check time difference
-        if reversed_order:
-        # ps1 starts after ps2 ends
-            if timediff > 1.5*res2:
-            # the time gap between two instances has to be
-            #  larger than twice the normal resolution
-                numdates = int(np.ceil(timediff/res2))
-                base = dt.datetime.strptime(ps1.datetime['data'][0], ps1.datetime['units'])
-                date_list = [base - dt.timedelta(seconds=res2*x) for x in range(numdates)]
-                date_list = list(reversed(date_list[1:]))# because numdates starts at 0, first date on date_list is the same as the startdate from the second instance
-                datetimelist = [dt.datetime.strftime(dl, ps2.datetime['units']) for dl in date_list]
-                ps2.datetime['data'] = np.append(ps2.datetime['data'], datetimelist)
-                timelist =  [dt.datetime.strftime(dl, ps2.time['units']) for dl in date_list]
-                ps2.time['data'] = np.append(ps2.time['data'], timelist)
-                datelist = [dt.datetime.strftime(dl, ps2.date['units']) for dl in date_list]
-                ps2.date['data'] = np.append(ps2.date['data'], datelist)
-            else:
-                fill_time = False
-        else:
-            if timediff > 1.5*res1:
-            # the time gap between two instances has to be
-            #  larger than twice the normal resolution
-                numdates = int(np.ceil(timediff/res1))
-                base = dt.datetime.strptime(ps2.datetime['data'][0], ps2.datetime['units'])
-                date_list = [base - dt.timedelta(seconds=res1*x) for x in range(numdates)]
-                date_list = list(reversed(date_list[1:])) # because numdates starts at 0, first date on date_list is the same as the startdate from the second instance
-                datetimelist = [dt.datetime.strftime(dl, ps1.datetime['units']) for dl in date_list]
-                ps1.datetime['data'] = np.append(ps1.datetime['data'], datetimelist)
-                timelist =  [dt.datetime.strftime(dl, ps1.time['units']) for dl in date_list]
-                ps1.time['data'] = np.append(ps1.time['data'], timelist)
-                datelist = [dt.datetime.strftime(dl, ps1.date['units']) for dl in date_list]
-                ps1.date['data'] = np.append(ps1.date['data'], datelist)
-            else:
-                fill_time = False
+        dtype = np.result_type(*[f.dtype for f in fields if f is not None])
+        values = np.empty((nrows, total), dtype = dtype)
+        mask = None if complete else np.ones((nrows, total), dtype = bool)
         
-    if message:
-        print("reversed order:", reversed_order)
-    # check which attributes are similar in both instances
-    if reversed_order:
-        # ps1 starts after ps2 ends
-        new_ps = copy.deepcopy(ps2)
-        for attribute in ps1.__dict__.keys():
-            if attribute in ps2.__dict__.keys():
-                afield = getattr(new_ps, attribute)
-                if attribute == 'diameter':
-                    st11, st12, st21, st22, diamlist = check_diameters(ps1.diameter['data'], ps2.diameter['data'], ps1.instrument_type)
-                              
-                    for var in new_ps.data['variables']:
-                        if fill_time is True:
-                            add = np.ma.zeros((ps2.data[var]['data'].shape[0],len(date_list))) 
-                            add[:] = np.nan
-                            newdata = np.append(ps2.data[var]['data'],add,axis=1)
-                            ps2.data[var]['data'] = newdata
-                            
-                        sh1 = ps1.data[var]['data'].shape
-                        sh2 = ps2.data[var]['data'].shape
-                        newfields = (len(diamlist) ,sh1[1] + sh2[1])
-                        new_field = np.ma.zeros(newfields)
-                        new_field[:] = np.ma.masked
-                        
-                        new_field[st21:st22, 0:ps2.data[var]['data'][:,:cut].shape[1]] = ps2.data[var]['data'][:,:cut]
-                        new_field[st11:st12, ps2.data[var]['data'][:,:cut].shape[1]:] = ps1.data[var]['data']
-                        
-                        new_ps.data[var]['data'] = new_field
-                        
-                    afield['data'] = diamlist
-                    
-                elif attribute == 'data':
-                    # data has been appended with diameters
-                    pass
-                else:
-                    try:
-                        field_ps2 = getattr(ps2, attribute)
-                        field_ps1 = getattr(ps1, attribute)
-                    except TypeError:
-                        if attribute == 'header':
-                            pass
-                        else:
-                            if message:
-                                print( ("Could not append %s attribute")%(attribute) )
-                    try:
-                        data_ps2 = field_ps2['data']
-                        data_ps1 = field_ps1['data']
-                        if attribute in ['date', 'datetime', 'time']: # these have already been extended with the correct data
-                            afield['data'] = np.append(data_ps2[:cut], data_ps1)
-                        elif fill_time:
-                            add = np.ma.zeros(len(date_list))
-                            add[:] = np.nan
-                            afield['data'] = np.append(np.append(data_ps2[:cut],add), data_ps1)
-                        else:
-                            afield['data'] = np.append(data_ps2[:cut], data_ps1)
-                    except:
-                        if message:
-                            print( ("Could not append %s attribute")%(attribute) )
-                   
-            else:
-                if keep_unique:
-                    newattribute = getattr(ps1,attribute)
-                    newattribute['time'] = ps1['datetime']['data']
-                    setattr(new_ps, attribute, newattribute)
-                else:
-                    pass
-        if keep_unique is False:
-            # get rid of attributes which were in ps2 but not in ps1
-            for attribute in ps2.__dict__.keys():
-                if attribute in ps1.__dict__.keys():
-                    pass
-                else:
-                    delattr(new_ps, attribute)
-            
-            
-    else:
-        # ps2 starts after ps1 ends
-        new_ps = copy.deepcopy(ps1)
-        for attribute in ps2.__dict__.keys():
-            if attribute in ps1.__dict__.keys():
-                afield = getattr(new_ps, attribute)
-                if attribute == 'diameter':
-                    st11, st12, st21, st22, diamlist = check_diameters(ps1.diameter['data'], ps2.diameter['data'], ps1.instrument_type)
-                    for var in new_ps.data['variables']:
-                        if fill_time is True:
-                            add = np.ma.zeros((ps1.data[var]['data'].shape[0],len(date_list))) 
-                            add[:] = np.nan
-                            newdata = np.append(ps1.data[var]['data'],add,axis=1)
-                            ps1.data[var]['data'] = newdata
-                            
-                        sh1 = ps1.data[var]['data'].shape
-                        sh2 = ps2.data[var]['data'].shape
-                        newfields = (len(diamlist) ,sh1[1] + sh2[1])
-                        new_field = np.ma.zeros(newfields)
-                        new_field[:] = np.ma.masked
-                        
-                        new_field[st11:st12, 0:ps1.data[var]['data'][:,:cut].shape[1]] = ps1.data[var]['data'][:,:cut]
-                        new_field[st21:st22, ps1.data[var]['data'][:,:cut].shape[1]:] = ps2.data[var]['data']
-                        
-                        new_ps.data[var]['data'] = new_field
-                        
-                    afield['data'] = diamlist
-                    
-                elif attribute == 'data':
-                    # data has been appended with diameters
-                    pass
-                else:
-                    try:
-                        field_ps2 = getattr(ps2, attribute)
-                        field_ps1 = getattr(ps1, attribute)
-                    except TypeError:
-                        if attribute == 'header':
-                            pass
-                        else:
-                            if message:
-                                print( ("Could not append %s attribute")%(attribute) )
-                    try:
-                        data_ps2 = field_ps2['data']
-                        data_ps1 = field_ps1['data']
-                        if attribute in ['date', 'datetime', 'time']: # these have already been extended with the correct data
-                            afield['data'] = np.append(data_ps1[:cut], data_ps2)
-                        elif fill_time:
-                            add = np.ma.zeros(len(date_list))
-                            add[:] = np.nan
-                            afield['data'] = np.append(np.append(data_ps1[:cut],add), data_ps2)
-                        else:
-                            afield['data'] = np.append(data_ps1[:cut], data_ps2)
-                    except:
-                        if message:
-                            print( ("Could not append %s attribute")%(attribute) )
-                    
-            else:
-                if keep_unique:
-                    newattribute = getattr(ps2,attribute)
-                    newattribute['time'] = ps2['datetime']['data']
-                    setattr(new_ps, attribute,newattribute)
-                else:
-                    pass
-        if keep_unique is False:
-            # get rid of attributes which were in ps2 but not in ps1
-            for attribute in ps1.__dict__.keys():
-                if attribute in ps2.__dict__.keys():
-                    pass
-                else:
-                    delattr(new_ps, attribute)
-                    
-    new_ps.sample['data'] = np.arange(1.0, len(new_ps.datetime['data'])+1)
-    new_ps.instrument_type = ps1.instrument_type.split('_')[0] + '_concatenated'
-    
-    if message:
-        print('filltime: ', fill_time)
+        for part, start in parts:
+            if not isinstance(part, tuple) or fields[part[0]] is None:
+                continue
+            k, lo, hi = part
+            field = fields[k]
+            values[rows[k], start:start+hi-lo] = np.ma.getdata(field)[:, lo:hi]
+            if mask is not None:
+                mask[rows[k], start:start+hi-lo] = np.ma.getmaskarray(field)[:, lo:hi]
+        
+        new_field = np.ma.MaskedArray(values, mask = mask if mask is not None else np.ma.nomask)
+        data[var] = owner.data[var].copy()
+        data[var]['data'] = new_field if coordinates[0] == 'diameter' else new_field.T
+    
+    new_ps.data = data
+    new_ps.diameter = first.diameter.copy()
+    new_ps.diameter['data'] = list(diamlist)
+    new_ps.sample = first.sample.copy()
+    new_ps.sample['data'] = np.arange(1.0, total+1)
+    new_ps.instrument_type = first.instrument_type.split('_')[0] + '_concatenated'
+    new_ps._set_time_views(keep = False)
     
     return new_ps
 
+# overlap handling of concat
+_OVERLAP = ('prefer_later', 'prefer_earlier', 'error')
+
+def _time_axis(ps):
+    """
+    Returns the datetime64 time axis of a particle sizer instance
+    """
+    if not hasattr(ps, 'timestamp'):
+        ps._set_timestamp()
+    return np.asarray(ps.timestamp['data'], dtype = 'datetime64[ns]')
+
+def _segments(times, overlap, message = False):
+    """
+    Returns the samples kept of each instance as (instance, start, stop)
+    segments ordered in time, given the time axes of the instances
+    ordered by their time ranges
+    """
+    segments = []
+    for k, axis in enumerate(times):
+        t0, t1 = axis[0], axis[-1]
+        pieces = [(k, 0, len(axis))]
+        kept = []
+        for seg in segments:
+            j, lo, hi = seg
+            s0, s1 = times[j][lo], times[j][hi - 1]
+            if s1 < t0 or s0 > t1:
+                kept.append(seg)
+                continue
+            if overlap == 'error':
+                raise ValueError('particle sizer instances overlap in time')
+            if overlap == 'prefer_later':
+                # samples of the earlier segment within the new instance
+                # are replaced
+                cut = _cut(times[j], lo, hi, t0, t1)
+                if message and sum(b - a for _, a, b in cut) < hi - lo:
+                    print( ("overlapping data: %d samples replaced")%(hi - lo - sum(b - a for _, a, b in cut)) )
+                kept.extend((j, a, b) for _, a, b in cut)
+            else:
+                # samples of the new instance within the earlier segment
+                # are dropped
+                kept.append(seg)
+                cut = []
+                for _, a, b in pieces:
+                    cut.extend(_cut(axis, a, b, s0, s1))
+                if message and sum(b - a for _, a, b in cut) < sum(b - a for _, a, b in pieces):
+                    print( ("overlapping data: %d samples dropped")%(sum(b - a for _, a, b in pieces) - sum(b - a for _, a, b in cut)) )
+                pieces = [(k, a, b) for _, a, b in cut]
+        segments = kept + pieces
+    
+    segments.sort(key = lambda seg: times[seg[0]][seg[1]])
+    return segments
+
+def _cut(axis, lo, hi, t0, t1):
+    """
+    Returns the parts of the samples lo:hi of a time axis outside of
+    [t0, t1], as (None, start, stop) segments
+    """
+    a = lo + int(np.searchsorted(axis[lo:hi], t0, side = 'left'))
+    b = lo + int(np.searchsorted(axis[lo:hi], t1, side = 'right'))
+    return [(None, start, stop) for start, stop in ((lo, a), (b, hi)) if stop > start]
+
+def _gap_times(axis, last, nextfirst):
+    """
+    Returns the times filling the gap between two instances at the
+    resolution of the earlier instance (time axis axis), counted back
+    from the first sample of the later instance. None if the gap is
+    shorter than 1.5 times the resolution
+    """
+    if len(axis) < 2:
+        return None
+    resolution = np.median(np.diff(axis))
+    gap = nextfirst - last
+    if resolution <= np.timedelta64(0, 'ns') or gap <= 1.5 * resolution:
+        return None
+    numdates = int(np.ceil(gap / resolution))
+    return nextfirst - resolution * np.arange(numdates - 1, 0, -1)
+
+def _diameter_grid(ps):
+    """
+    Returns the diameters of an instance as float array, whether they
+    are bin edges (one more diameter than rows) and the number of rows
+    """
+    diameters = np.asarray(ps.diameter['data'], dtype = float)
+    nrows = len(diameters)
+    if ps.data.get('variables'):
+        axis = 0 if list(ps.data.get('coordinates', ['diameter', 'sample']))[0] == 'diameter' else 1
+        nrows = np.shape(ps.data[ps.data['variables'][0]]['data'])[axis]
+    return diameters, len(diameters) == nrows + 1, min(nrows, len(diameters))
+
+def _rows(idx):
+    """
+    Returns the rows of the common diameters as slice where they are
+    consecutive
+    """
+    if len(idx) > 0 and (np.diff(idx) == 1).all():
+        return slice(int(idx[0]), int(idx[-1]) + 1)
+    return idx
+
+def _union(lists):
+    """
+    Returns the names in any of the lists, in order of first appearance
+    """
+    names = []
+    for names_ in lists:
+        for name in names_:
+            if name not in names:
+                names.append(name)
+    return names
+
+def _combine(values, parts, total, fill = None):
+    """
+    Returns the values of a per sample attribute for the combined
+    samples. values holds the attribute of each instance (None where
+    missing), parts the segments and gaps with their position. Gaps take
+    the values in fill, else missing values (NaN for floats, masked or
+    None)
+    """
+    arrays = [v for v in values if v is not None]
+    if not all(isinstance(v, np.ndarray) for v in arrays):
+        out = [None] * total
+        for part, start in parts:
+            if isinstance(part, tuple):
+                if values[part[0]] is not None:
+                    out[start:start+part[2]-part[1]] = list(values[part[0]][part[1]:part[2]])
+            elif fill is not None:
+                out[start:start+len(part)] = list(part)
+        return out
+    
+    dtype = np.result_type(*[v.dtype for v in arrays])
+    out = np.empty(total, dtype = dtype)
+    masked = any(isinstance(v, np.ma.MaskedArray) for v in arrays)
+    mask = np.zeros(total, dtype = bool) if masked else None
+    for part, start in parts:
+        if isinstance(part, tuple):
+            k, lo, hi = part
+            sl = slice(start, start + hi - lo)
+            if values[k] is None:
+                missing = sl
+            else:
+                out[sl] = np.ma.getdata(values[k])[lo:hi]
+                if mask is not None:
+                    mask[sl] = np.ma.getmaskarray(values[k])[lo:hi]
+                continue
+        else:
+            sl = slice(start, start + len(part))
+            if fill is not None:
+                out[sl] = part
+                continue
+            missing = sl
+        if dtype.kind in 'fc':
+            out[missing] = np.nan
+        else:
+            if mask is None:
+                mask = np.zeros(total, dtype = bool)
+            mask[missing] = True
+    if mask is not None:
+        return np.ma.MaskedArray(out, mask = mask)
+    return out
+
 def convert_units(data, typec,fromm, to):
     """
     Converts data from one unit to another
@@ -325,9 +439,9 @@ def convert_units(data, typec,fromm, to):
     if typec == 'OPC_temporal':
         cdata = OPCtimetransform(data, to)
     elif typec == 'temporal':
-        if isinstance(data[0], float):
+        if len(data) > 0 and isinstance(data[0], float):
             data = [str(i) for i in data]
-        cdata = tt.convertTime(data, fromm, to)
+        cdata = format_datetime64(to_datetime64(data, fromm), to)
     elif typec == 'units':
         for measure in data:
             cdata.append(conversion(measure, fromm, to))
@@ -346,7 +460,7 @@ def OPCtimetransform(data, to):
     
     Parameters
     ----------
-    data : list of str
+    data : list of str or numpy.ndarray
         list of data values to be converted
         
     to : str
@@ -357,70 +471,56 @@ def OPCtimetransform(data, to):
     outtimes : list of str
         list of time values with transformed formatting
     """
+    seconds = OPCseconds(data)
     
-    remove_times = []
-    outtimes = []
-    times = {'ms':[],'SS':[],'MM':[],'HH':[]}
+    return format_datetime64(np.datetime64('1900-01-01', 'ns') + seconds.astype('timedelta64[s]'), to)
 
-    for i in range(0, len(data)):
-        times['HH'] = 0
-        times['MM'] = 0
-        times['SS'] = 0
-        times['ms'] = 0
-
-        item = data[i]
+def OPCseconds(data):
+    """
+    Converts OPC times (HHMMSS.ms) into seconds since midnight. 
+    Values with an extra digit (i.e. 2319010.00) are repaired into 
+    231910.00, minutes or seconds of 60 are rounded up and hours
+    beyond 23 are reset to 23.
+    
+    Parameters
+    ----------
+    data : list of str or numpy.ndarray
+        OPC time values
         
-        try:
-            if len(item.split('.')[1]) < 2:
-                item += '0'
-        except IndexError:
-            item += '.00'
-        if len(item) < 9:
-            item = item.zfill(9)
-        if int(item[:2]) > 23:
-            item = '0' + item
-            
-        # remove items with extra zero (2319010.00 to 231910)
-        if len(item) > 9:
-            olditem = item
-            newitem = item[:4] + item[5:]
-            print( ('Repairing strange value %s into %s')%(olditem, newitem) )
-            item = newitem
-        else:
-            pass
-        try:
-            md = dt.datetime.strptime(item, "%H%M%S.%f")
-            
-        # round off items which exceed 59 minutes or 59 seconds 
-        # (i.e. 146001 to 150001.)
-        except ValueError:
-            
-            try:
-                times['HH'] = int(item[0:2])
-                times['MM'] = int(item[2:4])
-                times['SS'] = int(item[4:6])
-                times['ms'] = int(item[7:9])
-            except ValueError:
-                print(i, item)
-
-            if times['SS'] > 59:
-                times['MM'] += 1
-                times['SS'] = 0
-            if times['MM'] > 59:
-                times['HH'] += 1
-                times['MM'] = 0
-            # discard items which exceed 23 hours
-            if times['HH'] > 23:
-                times['HH'] = 23
-                print( ('resetting value %s')%(item) )
-            
-
-            md = dt.datetime(1900,1,1,times['HH'], times['MM'], times['SS']) 
-
-                
-        outtimes.append( dt.datetime.strftime(md, to) )
-
-    return outtimes
+    Returns
+    -------
+    seconds : numpy.ndarray of int
+        seconds since midnight
+    """
+    values = np.asarray(data, dtype=float)
+    values = np.where(np.isnan(values), 0., values)
+    
+    whole = values.astype(np.int64)
+    
+    # remove items with extra digit (2319010.00 to 231910)
+    strange = whole >= 240000
+    if strange.any():
+        warnings.warn( ('Repairing %d strange time values (i.e. %s)')%(strange.sum(), values[np.argmax(strange)]) )
+        whole = np.where(strange, (whole // 1000) * 100 + whole % 100, whole)
+    
+    hours = whole // 10000
+    minutes = whole // 100 % 100
+    seconds = whole % 100
+    
+    # round off items which exceed 59 minutes or 59 seconds 
+    # (i.e. 146001 to 150001.)
+    over = seconds > 59
+    minutes = minutes + over
+    seconds = np.where(over, 0, seconds)
+    
+    over = minutes > 59
+    hours = hours + over
+    minutes = np.where(over, 0, minutes)
+    
+    # discard items which exceed 23 hours
+    hours = np.minimum(hours, 23)
+    
+    return hours * 3600 + minutes * 60 + seconds
 
 def OPCtimetransformOld(data, to):
     """
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#################
+import numpy as np
+
+from .timeaxis import as_timedelta64
+#################
+
+"""
+mysmps.util.resample
+====================
+
+Aggregation of samples on a regular time grid:
+    time_bins
+    resample_values
+
+All samples of a bin are reduced at once with numpy ufuncs along the
+sample axis, for every diameter channel together. Masked and not finite
+values are left out of the reductions, bins without valid values are
+masked.
+
+Created on Sun Oct 18 20:10 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# aggregations known to resample_values
+_HOW = ('mean', 'median', 'sum', 'count', 'percentile', 'min', 'max')
+
+def time_bins(times, rule, origin = None):
+    """
+    Assigns samples to the bins of a regular time grid
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        datetime64 time of each sample, in any order
+
+    rule : int, str, datetime.timedelta or numpy.timedelta64
+        width of the bins, see timeaxis.as_timedelta64 (i.e. '1h', '1D')
+
+    origin : str, datetime or numpy.datetime64
+        time the bins are aligned to, the grid starts with the bin
+        holding the first sample - DEFAULT: midnight of the day of the
+        first sample
+
+    Returns
+    -------
+    grid : numpy.ndarray
+        datetime64[ns] start time of each bin
+
+    labels : numpy.ndarray
+        bin of each sample
+    """
+    step = as_timedelta64(rule)
+    if step <= np.timedelta64(0, 'ns'):
+        raise ValueError('time step must be positive')
+
+    times = np.asarray(times, dtype = 'datetime64[ns]')
+    if len(times) == 0:
+        return np.array([], dtype = 'datetime64[ns]'), np.array([], dtype = np.int64)
+
+    if origin is None:
+        origin = times.min().astype('datetime64[D]')
+    origin = np.datetime64(origin, 'ns')
+
+    first = (times.min() - origin) // step
+    if first < 0:
+        raise ValueError('samples before the origin of the time grid')
+    origin = origin + first * step
+
+    labels = (times - origin) // step
+
+    grid = origin + np.arange(labels.max() + 1) * step
+    return grid, labels
+
+def resample_values(values, labels, nbins, how = 'mean', q = None, min_count = 1):
+    """
+    Aggregates the samples in each bin
+
+    Parameters
+    ----------
+    values : numpy.ndarray, numpy.ma.MaskedArray or list
+        values along the last axis are samples, i.e. a (diameter, sample)
+        field or a per sample attribute
+
+    labels : numpy.ndarray
+        bin of each sample, see time_bins
+
+    nbins : int
+        number of bins
+
+    how : str
+        'mean', 'median', 'sum', 'count', 'percentile', 'min' or 'max'
+
+    q : float
+        percentile between 0 and 100, for how = 'percentile'
+
+    min_count : int
+        smallest number of valid values of a bin, bins with fewer values
+        are masked
+
+    Returns
+    -------
+    resampled : numpy.ma.MaskedArray or list
+        values with nbins along the last axis. Values which are not
+        numeric keep the first value of each bin (None for empty bins),
+        except for how = 'count'
+    """
+    if how not in _HOW:
+        raise ValueError( ('how must be one of %s, not %s')%(', '.join(_HOW), how) )
+    if how == 'percentile':
+        if q is None:
+            raise ValueError("q is required for how = 'percentile'")
+    elif how == 'median':
+        q = 50.0
+
+    labels = np.asarray(labels, dtype = np.int64)
+    data = np.ma.getdata(values) if isinstance(values, np.ndarray) else np.asarray(values)
+    numeric = data.dtype.kind in 'biuf'
+
+    # samples of a bin are made contiguous
+
+    order = None
+    if len(labels) > 1 and (labels[1:] < labels[:-1]).any():
+        order = np.argsort(labels, kind = 'stable')
+        labels = labels[order]
+
+    if len(labels) == 0:
+        starts = np.array([], dtype = np.intp)
+    else:
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    occupied = labels[starts]
+
+    if not numeric and how != 'count':
+        return _first_values(values, order, starts, occupied, nbins)
+
+    # valid values
+
+    if numeric:
+        valid = ~np.ma.getmaskarray(values) if isinstance(values, np.ma.MaskedArray) else np.ones(data.shape, dtype = bool)
+        if data.dtype.kind == 'f':
+            valid &= np.isfinite(data)
+    else:
+        valid = np.array([value is not None and value != '' for value in data], dtype = bool)
+
+    if order is not None:
+        valid = valid[..., order]
+        if numeric:
+            data = data[..., order]
+
+    shape = data.shape[:-1] + (nbins,)
+    if len(starts) == 0:
+        if how == 'count':
+            return np.ma.zeros(shape, dtype = np.int64)
+        return np.ma.masked_all(shape, dtype = float)
+
+    counts = np.add.reduceat(valid.astype(np.int64), starts, axis = -1)
+
+    # reductions of the occupied bins
+
+    if how == 'count':
+        out = np.ma.zeros(shape, dtype = np.int64)
+        out[..., occupied] = counts
+        return out
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        if how in ('sum', 'mean'):
+            if data.dtype.kind == 'f' or how == 'mean':
+                result = np.add.reduceat(np.where(valid, data, 0).astype(float), starts, axis = -1)
+            else:
+                result = np.add.reduceat(np.where(valid, data, 0), starts, axis = -1)
+            if how == 'mean':
+                result = result / np.maximum(counts, 1)
+        elif how in ('min', 'max'):
+            fill = np.inf if how == 'min' else -np.inf
+            ufunc = np.minimum if how == 'min' else np.maximum
+            result = ufunc.reduceat(np.where(valid, data.astype(float), fill), starts, axis = -1)
+        else:
+            result = _percentile(data, valid, starts, counts, q)
+
+    out = np.ma.masked_all(shape, dtype = result.dtype)
+    out[..., occupied] = np.ma.masked_where(counts < max(min_count, 1), result)
+    return out
+
+def _percentile(data, valid, starts, counts, q):
+    """
+    Returns the q-th percentile of the valid values in each group of
+    contiguous samples, interpolated linearly as numpy.percentile. Groups
+    with the same number of samples are sorted together as one block
+    """
+    values = np.where(valid, data.astype(float), np.inf)
+    sizes = np.diff(np.r_[starts, values.shape[-1]])
+
+    pos = (np.maximum(counts, 1) - 1) * (float(q) / 100.0)
+    lower = np.floor(pos).astype(np.int64)
+    upper = np.ceil(pos).astype(np.int64)
+
+    result = np.empty(counts.shape, dtype = float)
+    for size in np.unique(sizes):
+        groups = np.flatnonzero(sizes == size)
+        # (..., group, sample) block, invalid values sorted last
+        block = np.sort(values[..., starts[groups][:, None] + np.arange(size)], axis = -1)
+        vlower = np.take_along_axis(block, lower[..., groups, None], axis = -1)[..., 0]
+        vupper = np.take_along_axis(block, upper[..., groups, None], axis = -1)[..., 0]
+        result[..., groups] = vlower + (vupper - vlower) * (pos[..., groups] - lower[..., groups])
+    return result
+
+def _first_values(values, order, starts, occupied, nbins):
+    """
+    Returns the first value of each bin for values which are not numeric
+    """
+    out = [None] * nbins
+    for start, label in zip(starts, occupied):
+        out[label] = values[order[start] if order is not None else start]
+    return out
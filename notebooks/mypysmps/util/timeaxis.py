@@ -0,0 +1,583 @@
+# -*- coding: utf-8 -*-
+#################
+import re
+import datetime as dt
+import numpy as np
+#################
+
+"""
+mysmps.util.timeaxis
+====================
+
+Vectorized conversions between formatted time strings and numpy
+datetime64 arrays:
+    to_datetime64
+    format_datetime64
+    as_datetime64
+    as_timedelta64
+    parse_time
+    join_date_time
+    nearest_index
+    TimeIndex
+    TimeView
+
+Created on Sun Oct 18 11:03 2026
+
+@author: flovan / fvanden
+
+Revision history:   18.10.2026 - Created
+                               - as_datetime64 added
+                               - fixed width strings are parsed without
+                        strptime, added parse_time, join_date_time,
+                        nearest_index and TimeView
+                               - added TimeIndex
+                               - added as_timedelta64
+
+
+"""
+## -------------------------------------------------------------------------- ##
+
+# time steps given as number and unit, units in nanoseconds
+_TIMEDELTA = re.compile(r'^\s*(\d+(?:\.\d*)?)?\s*([a-zA-Z]+)\s*$')
+_TIMEDELTA_UNITS = {'d': 86400e9, 'day': 86400e9, 'days': 86400e9,
+                    'h': 3600e9, 'hour': 3600e9, 'hours': 3600e9,
+                    'min': 60e9, 'm': 60e9, 't': 60e9, 'minute': 60e9, 'minutes': 60e9,
+                    's': 1e9, 'sec': 1e9, 'second': 1e9, 'seconds': 1e9,
+                    'ms': 1e6, 'us': 1e3, 'ns': 1.0}
+
+# strftime directives which can be formatted without leaving numpy
+_DIRECTIVE = re.compile(r'%[YmdHMSyf%]|%.')
+_FAST_DIRECTIVES = ('%Y', '%m', '%d', '%H', '%M', '%S', '%y', '%f', '%%')
+
+# strptime directives which can be parsed without leaving numpy, with the
+# number of digits they take in zero padded strings
+_FIXED_WIDTHS = {'%Y': 4, '%y': 2, '%m': 2, '%d': 2, '%H': 2, '%M': 2, '%S': 2}
+
+def to_datetime64(strings, fmt):
+    """
+    Converts formatted time strings into a datetime64[ns] array.
+    Every distinct string is only parsed once.
+
+    Parameters
+    ----------
+    strings : list or array of str
+        formatted times
+
+    fmt : str
+        format of the strings (i.e. '%d/%m/%Y %H:%M:%S')
+
+    Returns
+    -------
+    times : numpy.ndarray
+        datetime64[ns] array
+    """
+    strings = np.asarray(strings, dtype=str)
+    if strings.size == 0:
+        return np.array([], dtype='datetime64[ns]')
+
+    parsed = _parse_fixed(strings.ravel(), fmt)
+    if parsed is not None:
+        return parsed.reshape(strings.shape)
+
+    uniques, inverse = np.unique(strings, return_inverse=True)
+    parsed = np.array([dt.datetime.strptime(u, fmt) for u in uniques], dtype='datetime64[ns]')
+
+    return parsed[inverse.reshape(strings.shape)]
+
+def _parse_fixed(strings, fmt):
+    """
+    Parses zero padded time strings of equal length (i.e. '24/11/2020')
+    with array operations. Returns None if the strings or the format are
+    not suited, so that they are parsed with strptime
+    """
+    tokens = _DIRECTIVE.split(fmt)
+    directives = _DIRECTIVE.findall(fmt)
+    if not all(d in _FIXED_WIDTHS for d in directives) or len(set(directives)) != len(directives):
+        return None
+
+    length = sum(len(t) for t in tokens) + sum(_FIXED_WIDTHS[d] for d in directives)
+    if strings.dtype.itemsize != 4 * length or not (np.char.str_len(strings) == length).all():
+        return None
+
+    chars = strings.view('U1').reshape(-1, length)
+    digits = chars.view(np.uint32).astype(np.int64) - ord('0')
+
+    values = {}
+    pos = len(tokens[0])
+    if tokens[0] and not (chars[:, :pos] == np.array(list(tokens[0]))).all():
+        return None
+    for directive, literal in zip(directives, tokens[1:]):
+        width = _FIXED_WIDTHS[directive]
+        block = digits[:, pos:pos+width]
+        if ((block < 0) | (block > 9)).any():
+            return None
+        values[directive] = block @ (10 ** np.arange(width - 1, -1, -1))
+        pos += width
+        if literal and not (chars[:, pos:pos+len(literal)] == np.array(list(literal))).all():
+            return None
+        pos += len(literal)
+
+    # defaults as in strptime: 1900-01-01 00:00:00
+    if '%Y' in values:
+        years = values['%Y']
+    elif '%y' in values:
+        years = np.where(values['%y'] < 69, 2000, 1900) + values['%y']
+    else:
+        years = np.full(len(strings), 1900)
+    months = values.get('%m', 1)
+    days = values.get('%d', 1)
+    hours = values.get('%H', 0)
+    minutes = values.get('%M', 0)
+    seconds = values.get('%S', 0)
+
+    month = (years - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (np.asarray(months) - 1)
+    monthdays = ((month + 1).astype('datetime64[D]') - month.astype('datetime64[D]')).astype(np.int64)
+    if (np.any((np.asarray(months) < 1) | (np.asarray(months) > 12)) or np.any(np.asarray(days) < 1) or np.any(days > monthdays)
+            or np.any(np.asarray(hours) > 23) or np.any(np.asarray(minutes) > 59) or np.any(np.asarray(seconds) > 61)):
+        # invalid dates, strptime raises the error
+        return None
+
+    times = month.astype('datetime64[D]') + (np.asarray(days) - 1)
+    return times.astype('datetime64[ns]') + (hours * 3600 + minutes * 60 + seconds) * np.timedelta64(1, 's')
+
+def format_datetime64(times, fmt):
+    """
+    Formats a datetime64 array into strings
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        datetime64 array
+
+    fmt : str
+        strftime format (i.e. '%Y.%m.%d %H:%M:%S')
+
+    Returns
+    -------
+    strings : list of str
+        formatted times
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    if times.size == 0:
+        return []
+
+    tokens = _DIRECTIVE.split(fmt)
+    directives = _DIRECTIVE.findall(fmt)
+
+    if not all(d in _FAST_DIRECTIVES for d in directives):
+        # fall back on strftime, only once for every distinct time
+        uniques, inverse = np.unique(times, return_inverse=True)
+        formatted = np.array([dt.datetime.strftime(u, fmt) for u in uniques.astype('datetime64[us]').astype(object)])
+        return formatted[inverse.ravel()].tolist()
+
+    days = times.astype('datetime64[D]')
+    months = times.astype('datetime64[M]')
+    years = times.astype('datetime64[Y]')
+    nanoseconds = (times - days).astype(np.int64)
+    seconds = nanoseconds // 10**9
+
+    components = {
+        '%Y': (years.astype(np.int64) + 1970, 4),
+        '%y': ((years.astype(np.int64) + 1970) % 100, 2),
+        '%m': (months.astype(np.int64) % 12 + 1, 2),
+        '%d': ((days - months).astype(np.int64) + 1, 2),
+        '%H': (seconds // 3600, 2),
+        '%M': (seconds // 60 % 60, 2),
+        '%S': (seconds % 60, 2),
+        '%f': (nanoseconds % 10**9 // 1000, 6),
+        }
+
+    # every string has the same length: the characters are written
+    # into a code point matrix which is viewed as strings
+    length = sum(len(t) for t in tokens) + sum(components[d][1] if d != '%%' else 1 for d in directives)
+    codes = np.empty((times.size, length), dtype=np.uint32)
+
+    pos = 0
+    for i, literal in enumerate(tokens):
+        for char in literal:
+            codes[:, pos] = ord(char)
+            pos += 1
+        if i == len(directives):
+            break
+        directive = directives[i]
+        if directive == '%%':
+            codes[:, pos] = ord('%')
+            pos += 1
+            continue
+        values, width = components[directive]
+        values = values.ravel()
+        for k in range(width):
+            codes[:, pos] = ord('0') + values // 10**(width - 1 - k) % 10
+            pos += 1
+
+    return codes.view('U%d'%(length)).ravel().tolist()
+
+def as_datetime64(value):
+    """
+    Converts a single time into numpy.datetime64[ns]
+
+    Parameters
+    ----------
+    value : str, datetime.datetime, numpy.datetime64 or None
+        time, strings in ISO format (i.e. '2020-11-24 12:00')
+
+    Returns
+    -------
+    time : numpy.datetime64 or None
+        time with nanosecond resolution, None if value is None
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip().replace(' ', 'T')
+    return np.datetime64(value, 'ns')
+
+def as_timedelta64(value):
+    """
+    Converts a time step into numpy.timedelta64[ns]
+
+    Parameters
+    ----------
+    value : int, float, str, datetime.timedelta or numpy.timedelta64
+        time step, numbers are minutes (as in TimeTransform.groupbyDate),
+        strings a number and a unit (i.e. '10min', '1h', '1D', '30s')
+
+    Returns
+    -------
+    step : numpy.timedelta64
+        time step with nanosecond resolution
+    """
+    if isinstance(value, np.timedelta64):
+        return value.astype('timedelta64[ns]')
+    if isinstance(value, dt.timedelta):
+        return np.timedelta64(value).astype('timedelta64[ns]')
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return np.timedelta64(int(round(float(value) * 60e9)), 'ns')
+
+    match = _TIMEDELTA.match(str(value))
+    if match is None or match.group(2).lower() not in _TIMEDELTA_UNITS:
+        raise ValueError( ('time step %s not recognised')%(value) )
+    number = float(match.group(1)) if match.group(1) else 1.0
+    return np.timedelta64(int(round(number * _TIMEDELTA_UNITS[match.group(2).lower()])), 'ns')
+
+def parse_time(value, fmt = None):
+    """
+    Converts a single time into numpy.datetime64[ns]. Strings are parsed
+    with fmt, as ISO time or, as in TimeTransform.findNearestDate, from
+    their digits (yyyymmdd, yyyymmddHHMM or yyyymmddHHMMSS)
+
+    Parameters
+    ----------
+    value : str, datetime.datetime or numpy.datetime64
+        time
+
+    fmt : str
+        (optional) format of the string
+
+    Returns
+    -------
+    time : numpy.datetime64
+        time with nanosecond resolution
+    """
+    if not isinstance(value, str):
+        return as_datetime64(value)
+
+    if fmt is not None:
+        try:
+            return np.datetime64(dt.datetime.strptime(value, fmt), 'ns')
+        except ValueError:
+            pass
+    try:
+        return as_datetime64(value)
+    except ValueError:
+        pass
+
+    digits = re.sub(r"[ -.:]", r"", value)
+    formats = {8: '%Y%m%d', 12: '%Y%m%d%H%M', 14: '%Y%m%d%H%M%S'}
+    if len(digits) not in formats:
+        raise ValueError( ('time format of %s not recognised')%(value) )
+    return np.datetime64(dt.datetime.strptime(digits, formats[len(digits)]), 'ns')
+
+def join_date_time(dates, date_format, times, time_format):
+    """
+    Combines separate date and time strings into a datetime64[ns] array
+
+    Parameters
+    ----------
+    dates : list or array of str
+        formatted dates
+
+    date_format : str
+        format of the dates (i.e. '%d/%m/%Y')
+
+    times : list or array of str
+        formatted times of day
+
+    time_format : str
+        format of the times (i.e. '%H:%M:%S')
+
+    Returns
+    -------
+    times : numpy.ndarray
+        datetime64[ns] array
+    """
+    days = to_datetime64(dates, date_format)
+    clock = to_datetime64(times, time_format)
+    return days.astype('datetime64[D]').astype('datetime64[ns]') + (clock - clock.astype('datetime64[D]'))
+
+def nearest_index(times, targets):
+    """
+    Returns the index of the time closest to each target. Of equally close
+    times, the earliest is taken
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        datetime64 array
+
+    targets : numpy.ndarray or numpy.datetime64
+        times to look up
+
+    Returns
+    -------
+    idx : numpy.ndarray or int
+        indices in times
+    """
+    return TimeIndex(times).nearest(targets)
+
+
+class TimeIndex(object):
+    """
+    Sorted index of a datetime64 time axis. Times are kept as int64
+    nanoseconds in ascending order, so that every lookup is a binary
+    search. Unordered time axes are sorted once, the indices returned
+    always refer to the original order.
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        datetime64 array (i.e. ParticleSizer.timestamp['data'])
+    """
+
+    def __init__(self, times):
+        self.times = times
+        keys = np.asarray(times, dtype='datetime64[ns]').view(np.int64)
+        if len(keys) > 1 and (keys[1:] < keys[:-1]).any():
+            self.order = np.argsort(keys, kind='stable')
+            self.keys = keys[self.order]
+        else:
+            self.order = None
+            self.keys = keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def indexes(self, times):
+        """
+        Returns True if the index was built from the array times
+        """
+        return times is self.times and len(times) == len(self.keys)
+
+    def is_sorted(self):
+        """
+        Returns True if the time axis is in ascending order
+        """
+        return self.order is None
+
+    def nearest(self, targets):
+        """
+        Returns the index of the time closest to each target. Of equally
+        close times, the earliest is taken
+
+        Parameters
+        ----------
+        targets : numpy.ndarray, numpy.datetime64 or str
+            times to look up
+
+        Returns
+        -------
+        idx : numpy.ndarray or int
+            indices in times
+        """
+        scalar, targets = self._targets(targets)
+        n = len(self.keys)
+        if n == 0:
+            raise ValueError('time axis is empty')
+
+        right = np.clip(np.searchsorted(self.keys, targets, side='left'), 0, n - 1)
+        left = np.clip(right - 1, 0, n - 1)
+        pos = np.where(targets - self.keys[left] <= self.keys[right] - targets, left, right)
+
+        return self._result(pos, scalar)
+
+    def floor(self, targets):
+        """
+        Returns the index of the last time at or before each target, -1
+        where all times are later
+
+        Parameters
+        ----------
+        targets : numpy.ndarray, numpy.datetime64 or str
+            times to look up
+
+        Returns
+        -------
+        idx : numpy.ndarray or int
+            indices in times
+        """
+        scalar, targets = self._targets(targets)
+        pos = np.searchsorted(self.keys, targets, side='right') - 1
+        return self._result(pos, scalar)
+
+    def ceil(self, targets):
+        """
+        Returns the index of the first time at or after each target,
+        len(times) where all times are earlier
+
+        Parameters
+        ----------
+        targets : numpy.ndarray, numpy.datetime64 or str
+            times to look up
+
+        Returns
+        -------
+        idx : numpy.ndarray or int
+            indices in times
+        """
+        scalar, targets = self._targets(targets)
+        pos = np.searchsorted(self.keys, targets, side='left')
+        return self._result(pos, scalar)
+
+    def bounds(self, start = None, end = None):
+        """
+        Returns the positions in the sorted time axis of the times between
+        start and end (both included)
+
+        Parameters
+        ----------
+        start : numpy.datetime64 or str
+            start of the window, None for no lower limit
+
+        end : numpy.datetime64 or str
+            end of the window, None for no upper limit
+
+        Returns
+        -------
+        i0, i1 : int
+            times[i0:i1] are in the window if the time axis is sorted
+        """
+        i0 = 0 if start is None else int(np.searchsorted(self.keys, self._targets(start)[1][0], side='left'))
+        i1 = len(self.keys) if end is None else int(np.searchsorted(self.keys, self._targets(end)[1][0], side='right'))
+        return i0, max(i0, i1)
+
+    def range(self, start = None, end = None):
+        """
+        Returns the indices of the times between start and end (both
+        included), ordered in time
+
+        Parameters
+        ----------
+        start : numpy.datetime64 or str
+            start of the window, None for no lower limit
+
+        end : numpy.datetime64 or str
+            end of the window, None for no upper limit
+
+        Returns
+        -------
+        idx : numpy.ndarray
+            indices in times
+        """
+        i0, i1 = self.bounds(start, end)
+        if self.order is None:
+            return np.arange(i0, i1)
+        return self.order[i0:i1]
+
+    def _targets(self, targets):
+        """
+        Returns whether targets is a single time and the targets as int64
+        nanoseconds
+        """
+        scalar = np.ndim(targets) == 0
+        if isinstance(targets, str):
+            targets = as_datetime64(targets)
+        targets = np.atleast_1d(np.asarray(targets, dtype='datetime64[ns]')).view(np.int64)
+        return scalar, targets
+
+    def _result(self, pos, scalar):
+        """
+        Maps positions in the sorted time axis to indices in times, out of
+        range positions are kept
+        """
+        if self.order is not None:
+            inside = (pos >= 0) & (pos < len(self.order))
+            pos = np.where(inside, self.order[np.clip(pos, 0, max(len(self.order) - 1, 0))], pos)
+        return int(pos[0]) if scalar else pos
+
+
+class TimeView(dict):
+    """
+    Metadata dictionary of the time, date or datetime attribute of a
+    particle sizer. Unless strings were stored in it, 'data' is formatted
+    from the datetime64 time axis with the format in 'units' when it is
+    first used, and formatted again if the time axis is replaced.
+
+    Parameters
+    ----------
+    metadata : dict
+        metadata of the attribute, with 'units' the strftime format
+
+    source : dict
+        metadata dictionary of the time axis, 'data' holds the datetime64
+        array (i.e. ParticleSizer.timestamp)
+    """
+
+    def __init__(self, metadata, source):
+        dict.__init__(self, metadata)
+        self.source = source
+        self._cache = None
+
+    def __reduce__(self):
+        return (TimeView, (dict(dict.items(self)), self.source))
+
+    def __missing__(self, key):
+        if key != 'data' or self.source is None:
+            raise KeyError(key)
+        times = self.source['data']
+        units = dict.get(self, 'units')
+        if self._cache is None or self._cache[0] is not times or self._cache[1] != units or self._cache[2] != len(times):
+            self._cache = (times, units, len(times), format_datetime64(times, units))
+        return self._cache[3]
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or (key == 'data' and self.source is not None)
+
+    def __iter__(self):
+        for key in dict.__iter__(self):
+            yield key
+        if not dict.__contains__(self, 'data') and self.source is not None:
+            yield 'data'
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def keys(self):
+        return list(iter(self))
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def get(self, key, default = None):
+        return self[key] if key in self else default
+
+    def copy(self):
+        return dict(self.items())
+
+    def loaded(self):
+        """
+        Returns True if strings are stored in the view
+        """
+        return dict.__contains__(self, 'data')